@@ -1,14 +1,18 @@
 import json
+import math
 import time
 import os
 import random
 import shutil
+import socket
+import sys
 import threading
 import requests
 from base64 import b64decode
 from dotenv import load_dotenv
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from itertools import cycle
+from queue import Queue
 from collections import defaultdict
 from datetime import datetime, timedelta
 
@@ -16,12 +20,30 @@ from Crypto.Cipher import AES
 from Crypto.Util.Padding import unpad
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from openpyxl import Workbook
 from fake_useragent import UserAgent
 
 from utils.generatePremiumStatesImageReport import generate_premium_states_image_report
 from utils.generateHybridStatesHTMLReport import generate_hybrid_states_html_report
+from utils.generatePremiumCityImageReport import generate_premium_city_image_report
+from utils.generateHybridCityHTMLReport import generate_hybrid_city_html_report
 from utils.sendReportEmail import send_collection_report
+from utils.workQueue import WorkQueue
+from utils.showSpill import ShowRollup, ShowSpill, read_jsonl_dir
+from utils.fetchPlan import FetchPlan
+from utils.showMatcher import match_shows
+from utils.showRecord import ShowRecord
+from utils.showStore import ShowStore
+from utils.showArchive import append_run
+from utils.bookingSeries import BookingSeries
+from utils.reportAggregates import aggregate_shows
+from utils.excelStream import StreamingWorkbook
+from utils.imageEncode import ImageEncoder
+from utils.reportStage import ReportStage
+from utils.reportFingerprint import DatasetHash, ReportFingerprints, fingerprint
+from utils.runPlanner import CityTimings, plan_run
+from utils.sampleEstimator import (MIN_PER_STRATUM, allocate, city_tiers, draw_sample, estimate,
+                                   historical_weights, stratum_means, stratum_of)
+from utils.trackingScheduler import RefreshScheduler, refresh_interval
 
 # Load environment variables
 load_dotenv()
@@ -34,6 +56,12 @@ INPUT_STATE_LIST = [
     'Andhra Pradesh', 'Telangana', 'Karnataka', 'Tamil Nadu', 'Maharashtra'
 ]
 
+# Optional city-wise report from the same run: (state, reporting city) pairs.
+# Cities already covered by INPUT_STATE_LIST are not scraped twice.
+INPUT_CITY_LIST = [
+    # ('Telangana', 'Hyderabad'),
+]
+
 # File paths
 DISTRICT_CONFIG_PATH = os.path.join("utils", "district_cities_config.json")
 BMS_CONFIG_PATH      = os.path.join("utils", "bms_cities_config.json")
@@ -58,6 +86,74 @@ BOOKED_STATES  = {"2"}
 DISTRICT_CITY_WORKERS = 12    # parallel city workers for District (pure HTTP)
 BMS_DRIVER_POOL_SIZE  = 3     # cities processed in parallel (each gets a fresh Chrome)
 DISTRICT_RATE         = 5     # max requests/second to district.in (conservative to avoid 403)
+FREEZE_GRACE_MINS     = 20    # shows this long past their start are frozen to their last recorded values
+CROSS_PLATFORM_PLAN   = True  # list District first and skip BMS layouts for shows District already covers (see utils/fetchPlan.py)
+
+# Deadline planning (see utils/runPlanner.py) — sizes workers and defers low-value cities
+RUN_DEADLINE         = None   # "HH:MM" (local time) the report must be out by; None disables planning
+REPORT_STAGE_SECS    = 180    # reserved after scraping for merge, reports and email
+MAX_DISTRICT_WORKERS = 24
+MAX_BMS_DRIVERS      = 6
+CITY_TIMINGS_PATH    = os.path.join("reports", "city_timings.json")
+
+# Sharded execution (see utils/workQueue.py)
+#   python reportStateCollections.py                        → single process (default)
+#   python reportStateCollections.py coordinator            → enqueue cities, scrape, wait for workers, report
+#   python reportStateCollections.py worker [bms|district]  → lease and scrape queued cities only
+#   python reportStateCollections.py track                  → run continuously (see TRACK_* below)
+#   python reportStateCollections.py sample                 → quick estimate from a stratified sample (see SAMPLE_* below)
+#   python reportStateCollections.py all-india              → every configured state, results spilled to disk (see SPILL_DIR)
+# Start workers once the coordinator has queued the run; workers on other
+# machines must point QUEUE_PATH at the same shared file.
+QUEUE_PATH          = os.path.join("reports", "work_queue.db")
+QUEUE_POLL_INTERVAL = 5       # seconds between polls while other workers hold leases
+COORDINATOR_SCRAPES = True    # coordinator also runs a local worker while waiting
+
+# Second pass over failed cities and rate-limited shows, with fresh sessions/drivers
+RETRY_BUDGET_SECS      = 10 * 60   # time the retry pass may take; 0 disables it
+RETRY_COOLDOWN_SECS    = 30        # pause before retrying so rate limits can reset
+RETRY_DISTRICT_WORKERS = 3
+RETRY_BMS_DRIVERS      = 1
+RETRY_SHOW_DELAY       = 3         # seconds between retried BMS seat layouts
+
+# All-India run — per-city results go to disk and are merged one state at a time (see utils/showSpill.py)
+SPILL_DIR = os.path.join("reports", "spill")
+
+# Merged shows of every report set, upserted by session id each run (see utils/showStore.py)
+SHOW_STORE_PATH = os.path.join("reports", "shows.db")
+
+# Booked tickets / gross of every show at every run, as deltas (see utils/bookingSeries.py)
+SERIES_PATH = os.path.join("reports", "booking_series.db")
+
+# Columnar history: every run's tracked shows, partitioned by movie/date/run (see utils/showArchive.py)
+ARCHIVE_RUNS = True
+ARCHIVE_DIR  = os.path.join("old_reports", "archive")
+
+# Excel workbooks are streamed (see utils/excelStream.py); Show Wise continues on "Show Wise (2)", ... past this
+EXCEL_SHOW_SHEET_ROWS = None       # None = only at Excel's row limit
+EXCEL_SIDE_FILE       = None       # "csv" / "parquet": also write Show Wise rows to <report>_Show_Wise.<ext>
+
+# Report images (see utils/imageEncode.py)
+IMAGE_FORMAT         = "png"   # "png-palette": ~⅓ the size, encodes much faster; "webp": lossless, written as .webp
+IMAGE_EFFORT         = None    # zlib level 0–9 for PNG, WebP method 0–6; None = the format's default
+IMAGE_ENCODE_WORKERS = 2       # images encode in the background while the rest of the set is written; 0 = inline
+
+# Report stage — the Excel / PNG / HTML of every dataset are built in parallel (see utils/reportStage.py)
+REPORT_WORKERS      = None     # processes; None = one per CPU, 0 = one after another in this process
+REPORT_TIMINGS_PATH = os.path.join("reports", "report_timings.jsonl")   # per-artifact timings of every run
+
+# A report set whose data hasn't changed since its last run keeps its reports: no render, archive copy or email
+SKIP_UNCHANGED_REPORTS   = True
+REPORT_FINGERPRINTS_PATH = os.path.join("reports", "report_fingerprints.json")   # see utils/reportFingerprint.py
+
+# Continuous tracking (python reportStateCollections.py track) — see utils/trackingScheduler.py
+TRACK_REPORT_INTERVAL    = 30 * 60   # seconds between report regenerations
+TRACK_DISCOVERY_INTERVAL = 60 * 60   # seconds between city page reloads to pick up new shows
+TRACK_SEND_EMAIL         = False     # email every regenerated report set
+
+# Sampling run (python reportStateCollections.py sample) — see utils/sampleEstimator.py
+SAMPLE_FRACTION = 0.05    # share of listed shows whose seat layout is fetched
+SAMPLE_SEED     = None    # fix to make the sample reproducible
 
 
 # =============================================================================
@@ -71,7 +167,43 @@ _global_bms_sids_lock = threading.Lock()
 _global_district_sids = set()
 _global_district_sids_lock = threading.Lock()
 
+def claim_sid(seen, lock, sid):
+    """
+    Marks `sid` as processed in `seen`; False if it already was. Claims made
+    during a queue task are noted so a failed attempt can hand them back.
+    """
+    with lock:
+        if sid in seen:
+            return False
+        seen.add(sid)
+    claimed = getattr(_thread_local, 'claimed_sids', None)
+    if claimed is not None:
+        claimed.append((seen, lock, sid))
+    return True
+
+def release_sids(claimed):
+    """Forgets SIDs claimed by a failed attempt, so its retry fetches those shows again."""
+    for seen, lock, sid in claimed:
+        with lock:
+            seen.discard(sid)
+
 VENUE_MAP = {}  # BMS VenueCode -> District cinema_id mapping
+FETCH_PLAN = None  # FetchPlan for the current run (local mode only)
+FROZEN_SIDS = set()  # SIDs of recorded shows already past their start (not fetched again)
+
+CITY_TIMINGS = CityTimings(CITY_TIMINGS_PATH)  # per-city run times, recorded every run
+SHOW_STORE = None  # ShowStore of the merged shows behind the tracked reports (opened in main)
+BOOKING_SERIES = None  # BookingSeries of per-show booking history across runs (opened in main)
+IMAGE_ENCODER = None  # ImageEncoder of the report images (created in main)
+REPORT_FINGERPRINTS = ReportFingerprints(REPORT_FINGERPRINTS_PATH)  # input hash of every report set's last reports
+SCRAPE_DEADLINE_TS = None  # epoch seconds by which scraping must stop (RUN_DEADLINE minus report stage)
+_deferred_cities = []
+_deferred_cities_lock = threading.Lock()
+
+RECORD_FAILURES = False  # set for batch runs; failures are then replayed by run_retry_pass
+_retry_tasks = []
+_retry_tasks_lock = threading.Lock()
+MISSING_CITIES = []  # still failing after the retry pass — listed in the reports
 
 
 # =============================================================================
@@ -135,6 +267,18 @@ def get_normalized_city_name(state, raw_city, source):
     lookup = DISTRICT_CITY_MAP if source == "district" else BMS_CITY_MAP
     return lookup.get((state, raw_city), raw_city)
 
+def select_cities(config, source):
+    """Returns the (state, city) config entries in scope: whole INPUT_STATE_LIST states plus
+    any city that reports into a city of INPUT_CITY_LIST. Each city appears once."""
+    city_scope = set(INPUT_CITY_LIST)
+    states = list(dict.fromkeys(list(INPUT_STATE_LIST) + [s for s, _ in INPUT_CITY_LIST]))
+    selected = []
+    for state in states:
+        for c in config.get(state, []):
+            if state in INPUT_STATE_LIST or (state, get_normalized_city_name(state, c['name'], source)) in city_scope:
+                selected.append((state, c))
+    return selected
+
 def district_gmt_to_ist(dt_str):
     """Converts a District GMT time string to IST."""
     gmt = datetime.fromisoformat(dt_str)
@@ -146,6 +290,13 @@ def normalize_bms_time(show_date, show_time):
     dt = datetime.strptime(f"{show_date} {show_time}", "%Y-%m-%d %I:%M %p")
     return dt.strftime("%Y-%m-%d %H:%M")
 
+def is_show_final(normalized_time, now=None):
+    """True once a show is FREEZE_GRACE_MINS past its start — its bookings can no longer change."""
+    if not normalized_time:
+        return False
+    start = datetime.strptime(normalized_time, "%Y-%m-%d %H:%M")
+    return (now or datetime.now()) >= start + timedelta(minutes=FREEZE_GRACE_MINS)
+
 def build_seat_signature(seat_map):
     """Creates a unique signature string based on the seat map counts."""
     return "|".join(str(c) for c in sorted(seat_map.values()))
@@ -206,83 +357,88 @@ def get_district_seat_layout(cinema_id, session_id):
         pass
     return None
 
+def scrape_district_session(s, venue, state, reporting_city):
+    """Fetches one District session's seat layout and builds its show record."""
+    sid = str(s.get('sid', ''))
+    cid = s.get('cid')
+
+    price_map = {}
+    code_to_label = {}
+    for area in s.get('areas', []):
+        price_map[area['code']] = float(area['price'])
+        code_to_label[area['code']] = area['label']
+
+    b_gross, p_gross, b_tkts, t_tkts = 0, 0, 0, 0
+    seat_map = defaultdict(int)
+    price_seat_map = defaultdict(int)
+    layout_res = get_district_seat_layout(cid, sid) if cid else None
+
+    if layout_res and 'seatLayout' in layout_res:
+        for area in layout_res['seatLayout'].get('colAreas', {}).get('objArea', []):
+            area_code = area.get('AreaCode')
+            price = area.get('AreaPrice', price_map.get(area_code, 0))
+            label = code_to_label.get(area_code, area_code)
+            for row in area.get('objRow', []):
+                for seat in row.get('objSeat', []):
+                    status = seat.get('SeatStatus')
+                    t_tkts += 1; p_gross += price
+                    seat_map[label] += 1
+                    price_seat_map[float(price)] += 1
+                    if status != '0' and status != 0:
+                        b_tkts += 1; b_gross += price
+    else:
+        for a in s.get('areas', []):
+            tot, av, pr = a['sTotal'], a['sAvail'], a['price']
+            bk = tot - av
+            seat_map[a['label']] = tot
+            b_tkts += bk; t_tkts += tot
+            b_gross += bk * pr; p_gross += tot * pr
+            price_seat_map[float(pr)] += tot
+
+    price_seat_list = sorted(price_seat_map.items())
+    occ = round((b_tkts / t_tkts) * 100, 2) if t_tkts else 0
+    normalized_time = district_gmt_to_ist(s['showTime'])
+
+    return ShowRecord.from_dict({
+        "source": "district",
+        "sid": sid,
+        "state": state,
+        "city": reporting_city,
+        "venue": venue,
+        "cinema_id": str(cid) if cid else "",
+        "showTime": s['showTime'],
+        "normalized_show_time": normalized_time,
+        "seat_category_map": dict(seat_map),
+        "price_seat_map": dict(price_seat_map),
+        "price_seat_signature": price_seat_list,
+        "seat_signature": build_seat_signature(seat_map),
+        "total_tickets": abs(t_tkts),
+        "booked_tickets": min(abs(b_tkts), abs(t_tkts)),
+        "total_gross": abs(p_gross),
+        "booked_gross": min(abs(int(b_gross)), abs(int(p_gross))),
+        "occupancy": min(100, abs(occ)),
+        "is_fallback": False,
+    })
+
 def process_district_venue(cin, state, city_name, reporting_city):
     """Processes all shows for a given District venue."""
     results = []
     venue = cin['cinemaInfo']['name']
     for s in cin.get('sessions', []):
         sid = str(s.get('sid', ''))
-        cid = s.get('cid')
 
-        with _global_district_sids_lock:
-            if sid in _global_district_sids:
-                continue
-            _global_district_sids.add(sid)
-
-        price_map = {}
-        code_to_label = {}
-        for area in s.get('areas', []):
-            price_map[area['code']] = float(area['price'])
-            code_to_label[area['code']] = area['label']
-
-        b_gross, p_gross, b_tkts, t_tkts = 0, 0, 0, 0
-        seat_map = defaultdict(int)
-        price_seat_map = defaultdict(int)
-        layout_res = get_district_seat_layout(cid, sid) if cid else None
-
-        if layout_res and 'seatLayout' in layout_res:
-            for area in layout_res['seatLayout'].get('colAreas', {}).get('objArea', []):
-                area_code = area.get('AreaCode')
-                price = area.get('AreaPrice', price_map.get(area_code, 0))
-                label = code_to_label.get(area_code, area_code)
-                for row in area.get('objRow', []):
-                    for seat in row.get('objSeat', []):
-                        status = seat.get('SeatStatus')
-                        t_tkts += 1; p_gross += price
-                        seat_map[label] += 1
-                        price_seat_map[float(price)] += 1
-                        if status != '0' and status != 0:
-                            b_tkts += 1; b_gross += price
-        else:
-            for a in s.get('areas', []):
-                tot, av, pr = a['sTotal'], a['sAvail'], a['price']
-                bk = tot - av
-                seat_map[a['label']] = tot
-                b_tkts += bk; t_tkts += tot
-                b_gross += bk * pr; p_gross += tot * pr
-                price_seat_map[float(pr)] += tot
-
-        price_seat_list = sorted(price_seat_map.items())
-        occ = round((b_tkts / t_tkts) * 100, 2) if t_tkts else 0
-        normalized_time = district_gmt_to_ist(s['showTime'])
-
-        results.append({
-            "source": "district",
-            "sid": sid,
-            "state": state,
-            "city": reporting_city,
-            "venue": venue,
-            "cinema_id": str(cid) if cid else "",
-            "showTime": s['showTime'],
-            "normalized_show_time": normalized_time,
-            "seat_category_map": dict(seat_map),
-            "price_seat_map": dict(price_seat_map),
-            "price_seat_signature": price_seat_list,
-            "seat_signature": build_seat_signature(seat_map),
-            "total_tickets": abs(t_tkts),
-            "booked_tickets": min(abs(b_tkts), abs(t_tkts)),
-            "total_gross": abs(p_gross),
-            "booked_gross": min(abs(int(b_gross)), abs(int(p_gross))),
-            "occupancy": min(100, abs(occ)),
-            "is_fallback": False,
-        })
+        if not claim_sid(_global_district_sids, _global_district_sids_lock, sid):
+            continue
+        if sid in FROZEN_SIDS:
+            continue
+
+        results.append(scrape_district_session(s, venue, state, reporting_city))
     return results
 
-def fetch_district_city(state, city, city_counter_str):
-    """Fetches and processes all District data for a single city."""
+def fetch_district_cinemas(state, city, city_counter_str):
+    """Loads a District city page and returns its cinemas with their sessions."""
     city_name = city['name']
     slug = city.get('slug')
-    reporting_city = get_normalized_city_name(state, city_name, "district")
 
     if not slug:
         print(f"   ⚠️  [District] {city_counter_str} {city_name:<15} — skipped (no slug)")
@@ -305,12 +461,14 @@ def fetch_district_city(state, city, city_counter_str):
 
             if resp.status_code != 200:
                 print(f"   ⚠️  [District] {city_counter_str} {city_name:<15} — HTTP {resp.status_code}")
+                record_failure("district", state, city, f"HTTP {resp.status_code}")
                 return []
             
             html = resp.text
             marker = 'id="__NEXT_DATA__"'
             idx = html.find(marker)
             if idx == -1:
+                record_failure("district", state, city, "no __NEXT_DATA__")
                 return []
 
             start = html.find('>', idx) + 1
@@ -324,8 +482,18 @@ def fetch_district_city(state, city, city_counter_str):
             break 
         except Exception as e:
             print(f"   ❌ [District] {city_counter_str} {city_name:<15} — Error: {str(e).splitlines()[0]}")
+            record_failure("district", state, city, str(e).splitlines()[0])
             return []
 
+    return cinemas
+
+def fetch_district_city(state, city, city_counter_str, cinemas=None):
+    """Fetches and processes all District data for a single city (`cinemas` skips the page load)."""
+    city_name = city['name']
+    reporting_city = get_normalized_city_name(state, city_name, "district")
+
+    if cinemas is None:
+        cinemas = fetch_district_cinemas(state, city, city_counter_str)
     if not cinemas:
         return []
 
@@ -339,8 +507,45 @@ def fetch_district_city(state, city, city_counter_str):
         print(f"   ✅ [District] {city_counter_str} {city_name:<15} → {reporting_city:<15} | Shows: {len(city_results):<3} | Gross: ₹{gross:<10,}")
     return city_results
 
-def run_district(all_cities):
-    """Executes District scraping for all given cities in parallel."""
+def list_district_cities(all_cities):
+    """Loads every District city page in parallel; returns {city index: cinemas}."""
+    listings = {}
+    total = len(all_cities)
+    print(f"\n📋 [District] Listing shows — {total} cities, {DISTRICT_CITY_WORKERS} workers\n")
+
+    def _list(idx, state, city):
+        return idx, fetch_district_cinemas(state, city, f"[{idx}/{total}]")
+
+    with ThreadPoolExecutor(max_workers=DISTRICT_CITY_WORKERS) as executor:
+        futures = [
+            executor.submit(_list, idx, state, city)
+            for idx, (state, city) in enumerate(all_cities, 1)
+        ]
+        for future in as_completed(futures):
+            try:
+                idx, cinemas = future.result()
+                listings[idx] = cinemas
+            except Exception as e:
+                print(f"   ❌ [District] City listing error: {str(e).splitlines()[0]}")
+
+    return listings
+
+def build_fetch_plan(listings):
+    """Registers every listed District session with a seat layout in a new FetchPlan."""
+    plan = FetchPlan(VENUE_MAP)
+    sessions = 0
+    for cinemas in listings.values():
+        for cin in cinemas:
+            for s in cin.get('sessions', []):
+                if s.get('cid') and s.get('showTime') and str(s.get('sid', '')) not in FROZEN_SIDS:
+                    plan.add_district_session(s['cid'], district_gmt_to_ist(s['showTime']), s.get('sid'))
+                    sessions += 1
+    print(f"🧭 Fetch plan: {sessions} District sessions at {len(VENUE_MAP)} mapped BMS venues")
+    return plan
+
+def run_district(all_cities, listings=None, sink=None):
+    """Executes District scraping for all given cities in parallel (reusing `listings` when given).
+    With `sink`, each city's records are handed to sink(platform, state, records) instead of returned."""
     all_results = []
     total = len(all_cities)
     completed = [0]
@@ -349,7 +554,20 @@ def run_district(all_cities):
 
     def _wrapped(state, city, idx, total):
         counter_str = f"[{idx}/{total}]"
-        results = fetch_district_city(state, city, counter_str)
+        cinemas = listings.get(idx, []) if listings is not None else None
+        release = None
+        if FETCH_PLAN is not None and cinemas:
+            # BMS skips the layouts of shows paired with this city's sessions — withdraw them first
+            sids = [s.get('sid') for cin in cinemas for s in cin.get('sessions', [])]
+            release = lambda: FETCH_PLAN.release(sids)
+        if defer_for_deadline("district", state, city['name'], counter_str, release):
+            return []
+        t0 = time.monotonic()
+        results = fetch_district_city(state, city, counter_str, cinemas)
+        record_city_timing("district", state, city['name'], time.monotonic() - t0, results)
+        if sink:
+            sink("district", state, results)
+            results = []
         with lock:
             completed[0] += 1
         return results
@@ -538,22 +756,139 @@ def calculate_show_collection(decrypted, price_map):
     occ = round((b_tkts / t_tkts) * 100, 2) if t_tkts else 0
     return t_tkts, b_tkts, int(t_gross), int(b_gross), occ, seats, local_price_map
 
+def load_bms_venues(driver, city_slug):
+    """Loads a BMS city page in `driver` and returns its venue groups (None if the page had no state)."""
+    state_data = extract_initial_state_from_page(driver, BMS_URL_TEMPLATE.format(city=city_slug))
+    if not state_data:
+        return None
+    return extract_venues(state_data)
+
+def scrape_bms_show(driver, state_name, reporting_city, v_name, v_code, show, screen_capacity_map,
+                    on_rate_limit=None):
+    """Fetches one BMS show's seat layout and builds its record (None when the show is skipped).
+    `on_rate_limit(error_msg)` is called when the layout request was rate limited."""
+    sid = str(show["additionalData"]["sessionId"])
+    show_time = show.get("title")
+    raw_screen = show.get("screenAttr", "")
+    screenName = raw_screen if raw_screen else "Main Screen"
+
+    seat_map = {}
+    is_fallback = False
+    price_seat_map = {}
+
+    cats = show["additionalData"].get("categories", [])
+    price_map = {c["areaCatCode"]: float(c["curPrice"]) for c in cats}
+    enc, error_msg = get_single_seat_layout(driver, v_code, sid)
+    data = None
+
+    if not enc:
+        if not price_map: return None
+        max_price = max(price_map.values())
+        is_fallback = True
+        for p in price_map.values(): price_seat_map[float(p)] = 0
+
+        if error_msg and "sold out" in error_msg.lower():
+            recovered_capacity = None
+            recovered_seat_map = None
+            if screenName in screen_capacity_map:
+                recovered_seat_map = screen_capacity_map[screenName]
+                recovered_capacity = sum(recovered_seat_map.values()) if isinstance(recovered_seat_map, dict) else recovered_seat_map
+
+            if not recovered_capacity:
+                try:
+                    base_sid = int(sid)
+                    for offset in range(7, 0, -1):
+                        target_sid = str(base_sid + offset)
+                        time.sleep(1)
+                        n_enc, _ = get_single_seat_layout(driver, v_code, target_sid)
+                        if n_enc:
+                            n_dec = decrypt_data(n_enc)
+                            n_res = calculate_show_collection(n_dec, {})
+                            if n_res[0] > 0:
+                                recovered_capacity = n_res[0]
+                                recovered_seat_map = n_res[5]
+                                break
+                except Exception:
+                    pass
+
+            if recovered_capacity:
+                calc_gross = sum(count * price_map.get(ac, 0) for ac, count in recovered_seat_map.items())
+                if calc_gross > 0:
+                    t_tkts = b_tkts = recovered_capacity
+                    t_gross = b_gross = calc_gross
+                    screen_capacity_map[screenName] = recovered_seat_map and sum(recovered_seat_map.values()) or recovered_capacity
+                    seat_map = recovered_seat_map
+                    ps_map = defaultdict(int)
+                    for ac, count in seat_map.items():
+                        ps_map[float(price_map.get(ac, 0))] += count
+                    price_seat_map = dict(ps_map)
+                else:
+                    recovered_capacity = None
+
+            if not recovered_capacity:
+                FALLBACK_SEATS = screen_capacity_map.get(screenName, 400)
+                t_tkts = b_tkts = FALLBACK_SEATS
+                t_gross = b_gross = int(FALLBACK_SEATS * max_price)
+
+            occ = 100.0
+            data = {"total_tickets": t_tkts, "booked_tickets": b_tkts,
+                    "total_gross": t_gross, "booked_gross": b_gross, "occupancy": occ}
+        else:
+            if error_msg and "rate limit" in (error_msg or "").lower():
+                if on_rate_limit: on_rate_limit(error_msg)
+                return None
+            t_tkts = 400; b_tkts = 200
+            t_gross = int(t_tkts * max_price); b_gross = int(b_tkts * max_price)
+            data = {"total_tickets": t_tkts, "booked_tickets": b_tkts,
+                    "total_gross": t_gross, "booked_gross": b_gross, "occupancy": 50.0}
+    else:
+        decrypted = decrypt_data(enc)
+        res = calculate_show_collection(decrypted, price_map)
+        data = {"total_tickets": abs(res[0]), "booked_tickets": min(abs(res[1]), abs(res[0])),
+                "total_gross": abs(res[2]), "booked_gross": min(abs(res[3]), abs(res[2])),
+                "occupancy": min(100, abs(res[4]))}
+        seat_map = res[5]
+        final_price_map = res[6] if len(res) > 5 else {}
+
+        if data["total_tickets"] > 0:
+            ps_map = defaultdict(int); ps_list = []
+            for ac, count in seat_map.items():
+                pr = float(final_price_map.get(ac, 0)) if final_price_map else float(price_map.get(ac, 0))
+                ps_map[pr] += count; ps_list.append((pr, count))
+            price_seat_map = dict(ps_map)
+            data["price_seat_signature"] = sorted(ps_list)
+            screen_capacity_map[screenName] = data["total_tickets"]
+
+    if data and data.get('total_tickets', 0) > 0:
+        normalized_time = normalize_bms_time(SHOW_DATE, show_time)
+        data.update({
+            "source": "bms", "sid": sid,
+            "state": state_name, "city": reporting_city,
+            "venue": v_name, "venue_code": v_code, "showTime": show_time,
+            "normalized_show_time": normalized_time,
+            "seat_category_map": seat_map, "price_seat_map": price_seat_map,
+            "price_seat_signature": data.get("price_seat_signature", []),
+            "seat_signature": build_seat_signature(seat_map),
+            "is_fallback": is_fallback,
+        })
+        return ShowRecord.from_dict(data)
+    return None
+
 def process_bms_city_simple(state_name, city_name, city_slug, city_counter_str):
     """Processes all venues and shows for a specific BMS city."""
     reporting_city = get_normalized_city_name(state_name, city_name, "bms")
-    url = BMS_URL_TEMPLATE.format(city=city_slug)
     proxy = next(proxy_pool) if proxy_pool else None
     driver = None
     results_all = []
+    planned = 0
     
     try:
         driver = _create_chrome_driver(proxy)
-        state_data = extract_initial_state_from_page(driver, url)
-        if not state_data:
+        venues = load_bms_venues(driver, city_slug)
+        if venues is None:
             print(f"   ⚠️  [BMS] {city_counter_str} {city_name:<15} — skipped (no state data)")
+            record_failure("bms", state_name, (city_name, city_slug), "no state data")
             return []
-            
-        venues = extract_venues(state_data)
         if not venues:
             print(f"   ⚠️  [BMS] {city_counter_str} {city_name:<15} — skipped (no venues)")
             return []
@@ -567,112 +902,25 @@ def process_bms_city_simple(state_name, city_name, city_slug, city_counter_str):
 
             for show in shows:
                 sid = str(show["additionalData"]["sessionId"])
-                show_time = show.get("title")
-                raw_screen = show.get("screenAttr", "")
-                screenName = raw_screen if raw_screen else "Main Screen"
 
-                with _global_bms_sids_lock:
-                    if sid in _global_bms_sids: continue
-                    _global_bms_sids.add(sid)
+                if not claim_sid(_global_bms_sids, _global_bms_sids_lock, sid): continue
+                if sid in FROZEN_SIDS: continue
+
+                # Same show at a mapped venue is already being fetched from District
+                if FETCH_PLAN is not None and FETCH_PLAN.claim(
+                        v_code, normalize_bms_time(SHOW_DATE, show.get("title")), sid):
+                    planned += 1
+                    continue
 
-                seat_map = {}
-                is_fallback = False
-                price_seat_map = {}
+                def _rate_limited(error_msg, show=show, v_name=v_name, v_code=v_code,
+                                  capacity_map=screen_capacity_map):
+                    record_failure("bms", state_name, (city_name, city_slug), "rate limit",
+                                   show=(reporting_city, v_name, v_code, show, capacity_map))
 
                 try:
-                    cats = show["additionalData"].get("categories", [])
-                    price_map = {c["areaCatCode"]: float(c["curPrice"]) for c in cats}
-                    enc, error_msg = get_single_seat_layout(driver, v_code, sid)
-                    data = None
-
-                    if not enc:
-                        if not price_map: continue
-                        max_price = max(price_map.values())
-                        is_fallback = True
-                        for p in price_map.values(): price_seat_map[float(p)] = 0
-
-                        if error_msg and "sold out" in error_msg.lower():
-                            recovered_capacity = None
-                            recovered_seat_map = None
-                            if screenName in screen_capacity_map:
-                                recovered_seat_map = screen_capacity_map[screenName]
-                                recovered_capacity = sum(recovered_seat_map.values()) if isinstance(recovered_seat_map, dict) else recovered_seat_map
-
-                            if not recovered_capacity:
-                                try:
-                                    base_sid = int(sid)
-                                    for offset in range(7, 0, -1):
-                                        target_sid = str(base_sid + offset)
-                                        time.sleep(1)
-                                        n_enc, _ = get_single_seat_layout(driver, v_code, target_sid)
-                                        if n_enc:
-                                            n_dec = decrypt_data(n_enc)
-                                            n_res = calculate_show_collection(n_dec, {})
-                                            if n_res[0] > 0:
-                                                recovered_capacity = n_res[0]
-                                                recovered_seat_map = n_res[5]
-                                                break
-                                except Exception:
-                                    pass
-
-                            if recovered_capacity:
-                                calc_gross = sum(count * price_map.get(ac, 0) for ac, count in recovered_seat_map.items())
-                                if calc_gross > 0:
-                                    t_tkts = b_tkts = recovered_capacity
-                                    t_gross = b_gross = calc_gross
-                                    screen_capacity_map[screenName] = recovered_seat_map and sum(recovered_seat_map.values()) or recovered_capacity
-                                    seat_map = recovered_seat_map
-                                    ps_map = defaultdict(int)
-                                    for ac, count in seat_map.items():
-                                        ps_map[float(price_map.get(ac, 0))] += count
-                                    price_seat_map = dict(ps_map)
-                                else:
-                                    recovered_capacity = None
-
-                            if not recovered_capacity:
-                                FALLBACK_SEATS = screen_capacity_map.get(screenName, 400)
-                                t_tkts = b_tkts = FALLBACK_SEATS
-                                t_gross = b_gross = int(FALLBACK_SEATS * max_price)
-
-                            occ = 100.0
-                            data = {"total_tickets": t_tkts, "booked_tickets": b_tkts,
-                                    "total_gross": t_gross, "booked_gross": b_gross, "occupancy": occ}
-                        else:
-                            if error_msg and "rate limit" in (error_msg or "").lower(): continue
-                            t_tkts = 400; b_tkts = 200
-                            t_gross = int(t_tkts * max_price); b_gross = int(b_tkts * max_price)
-                            data = {"total_tickets": t_tkts, "booked_tickets": b_tkts,
-                                    "total_gross": t_gross, "booked_gross": b_gross, "occupancy": 50.0}
-                    else:
-                        decrypted = decrypt_data(enc)
-                        res = calculate_show_collection(decrypted, price_map)
-                        data = {"total_tickets": abs(res[0]), "booked_tickets": min(abs(res[1]), abs(res[0])),
-                                "total_gross": abs(res[2]), "booked_gross": min(abs(res[3]), abs(res[2])),
-                                "occupancy": min(100, abs(res[4]))}
-                        seat_map = res[5]
-                        final_price_map = res[6] if len(res) > 5 else {}
-
-                        if data["total_tickets"] > 0:
-                            ps_map = defaultdict(int); ps_list = []
-                            for ac, count in seat_map.items():
-                                pr = float(final_price_map.get(ac, 0)) if final_price_map else float(price_map.get(ac, 0))
-                                ps_map[pr] += count; ps_list.append((pr, count))
-                            price_seat_map = dict(ps_map)
-                            data["price_seat_signature"] = sorted(ps_list)
-                            screen_capacity_map[screenName] = data["total_tickets"]
-
-                    if data and data.get('total_tickets', 0) > 0:
-                        normalized_time = normalize_bms_time(SHOW_DATE, show_time)
-                        data.update({
-                            "source": "bms", "sid": sid,
-                            "state": state_name, "city": reporting_city,
-                            "venue": v_name, "showTime": show_time,
-                            "normalized_show_time": normalized_time,
-                            "seat_category_map": seat_map, "price_seat_map": price_seat_map,
-                            "price_seat_signature": data.get("price_seat_signature", []),
-                            "seat_signature": build_seat_signature(seat_map),
-                            "is_fallback": is_fallback,
-                        })
+                    data = scrape_bms_show(driver, state_name, reporting_city, v_name, v_code,
+                                           show, screen_capacity_map, _rate_limited)
+                    if data:
                         results_all.append(data)
                 except Exception:
                     pass
@@ -680,6 +928,7 @@ def process_bms_city_simple(state_name, city_name, city_slug, city_counter_str):
                 except Exception: pass
     except Exception as e:
         print(f"   ❌ [BMS] {city_counter_str} {city_name:<15} — Error: {str(e).splitlines()[0]}")
+        record_failure("bms", state_name, (city_name, city_slug), str(e).splitlines()[0])
     finally:
         if driver:
             try: driver.quit()
@@ -688,11 +937,14 @@ def process_bms_city_simple(state_name, city_name, city_slug, city_counter_str):
     if results_all:
         gross = sum(r.get('booked_gross', 0) for r in results_all)
         print(f"   ✅ [BMS] {city_counter_str} {city_name:<15} → {reporting_city:<15} | Shows: {len(results_all):<3} | Gross: ₹{gross:<10,}")
+    if planned:
+        print(f"   🧭 [BMS] {city_counter_str} {city_name:<15} — {planned} show(s) left to District")
 
     return results_all
 
-def run_bms(all_cities):
-    """Executes BMS scraping for all given cities using parallel browser workers."""
+def run_bms(all_cities, sink=None):
+    """Executes BMS scraping for all given cities using parallel browser workers.
+    With `sink`, each city's records are handed to sink(platform, state, records) instead of returned."""
     all_results = []
     total = len(all_cities)
     workers = min(BMS_DRIVER_POOL_SIZE, total)
@@ -701,7 +953,15 @@ def run_bms(all_cities):
     def _process_city(args):
         idx, (state, city_name, city_slug) = args
         counter_str = f"[{idx}/{total}]"
-        return process_bms_city_simple(state, city_name, city_slug, counter_str)
+        if defer_for_deadline("bms", state, city_name, counter_str):
+            return []
+        t0 = time.monotonic()
+        results = process_bms_city_simple(state, city_name, city_slug, counter_str)
+        record_city_timing("bms", state, city_name, time.monotonic() - t0, results)
+        if sink:
+            sink("bms", state, results)
+            return []
+        return results
 
     with ThreadPoolExecutor(max_workers=workers) as city_pool:
         futures = [
@@ -717,6 +977,627 @@ def run_bms(all_cities):
     return all_results
 
 
+# =============================================================================
+# ── 5b. SHARDED EXECUTION (COORDINATOR / WORKER) ─────────────────────────────
+# =============================================================================
+
+def _run_queue_task(task):
+    """
+    Scrapes a single leased (platform, state, city) task. The scrapers report
+    errors through record_failure and return what they have, so failures are
+    collected for this task; a whole-city failure raises and the task is failed.
+    A failed attempt releases the SIDs it claimed, so the retry (often in this
+    same process) doesn't skip those shows as duplicates.
+    """
+    counter_str = f"[#{task['id']}]"
+    city = task["payload"]
+    _thread_local.failures, _thread_local.claimed_sids = [], []
+    t0 = time.monotonic()
+    try:
+        if task["platform"] == "bms":
+            results = process_bms_city_simple(task["state"], city["name"], city["slug"], counter_str)
+        else:
+            results = fetch_district_city(task["state"], city, counter_str)
+    except Exception:
+        release_sids(_thread_local.claimed_sids)
+        raise
+    finally:
+        failures, _thread_local.failures = _thread_local.failures, None
+        claimed, _thread_local.claimed_sids = _thread_local.claimed_sids, None
+    record_city_timing(task["platform"], task["state"], city["name"], time.monotonic() - t0, results)
+    city_failures = [f for f in failures if f["show"] is None]
+    if city_failures:
+        release_sids(claimed)
+        raise RuntimeError(city_failures[0]["reason"])
+    if failures:
+        print(f"   ⚠️  [Worker] Task #{task['id']}: {len(failures)} rate-limited show(s) not fetched")
+    return results
+
+def run_queue_worker(queue, platforms=None):
+    """Leases tasks from the shared queue until it is empty, pushing results back."""
+    platforms = platforms or ["bms", "district"]
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    pools = []
+    if "bms" in platforms:      pools += [["bms"]] * BMS_DRIVER_POOL_SIZE
+    if "district" in platforms: pools += [["district"]] * DISTRICT_CITY_WORKERS
+    print(f"\n🛠️  [Worker] {worker_id} — {len(pools)} threads ({', '.join(platforms)})\n")
+
+    def _loop(thread_idx, thread_platforms):
+        lease_id = f"{worker_id}-{thread_idx}"
+        done = 0
+        while True:
+            task = queue.lease(lease_id, thread_platforms)
+            if task is None:
+                # Leases held by other workers may still expire and come back
+                if queue.is_drained():
+                    return done
+                time.sleep(QUEUE_POLL_INTERVAL)
+                continue
+            # Keep the lease while a long city runs, so no other worker scrapes it again
+            stop = threading.Event()
+            def _renew(task_id=task["id"]):
+                while not stop.wait(queue.lease_seconds / 3):
+                    queue.renew(task_id, lease_id)
+            heartbeat = threading.Thread(target=_renew, daemon=True)
+            heartbeat.start()
+            try:
+                if queue.complete(task["id"], lease_id, _run_queue_task(task)):
+                    done += 1
+                else:
+                    print(f"   ⚠️  [Worker] Task #{task['id']}: lease lost to another worker — results dropped")
+            except Exception as e:
+                print(f"   ❌ [Worker] Task #{task['id']} failed: {str(e).splitlines()[0]}")
+                queue.fail(task["id"], lease_id, str(e).splitlines()[0])
+            finally:
+                stop.set()
+                heartbeat.join()
+
+    with ThreadPoolExecutor(max_workers=len(pools)) as pool:
+        total_done = sum(pool.map(_loop, range(len(pools)), pools))
+    print(f"\n🛠️  [Worker] {worker_id} finished — {total_done} tasks completed.")
+    return total_done
+
+def run_coordinator(queue, district_cities, bms_cities):
+    """Enqueues every city, waits for the workers to drain the queue and collects the results."""
+    queue.reset()
+    for state, city in district_cities:
+        queue.enqueue("district", state, city)
+    for state, city_name, city_slug in bms_cities:
+        queue.enqueue("bms", state, {"name": city_name, "slug": city_slug})
+    print(f"\n📬 [Coordinator] Queued {len(bms_cities)} BMS + {len(district_cities)} District tasks → {QUEUE_PATH}")
+
+    if COORDINATOR_SCRAPES:
+        run_queue_worker(queue)
+
+    def _progress(counts):
+        print(f"   📬 [Coordinator] pending: {counts.get('pending', 0)} | leased: {counts.get('leased', 0)} | "
+              f"done: {counts.get('done', 0)} | failed: {counts.get('failed', 0)}")
+
+    queue.wait_until_drained(poll_interval=QUEUE_POLL_INTERVAL, on_progress=_progress)
+    for t in queue.failed_tasks():
+        city = t["payload"]
+        name = city.get("name", "?")
+        print(f"   ⚠️  [Coordinator] {t['platform']} {t['state']} / {name} failed after {t['attempts']} attempts: {t['error']}")
+        # Handed to the retry pass like a failure of the local run
+        record_failure(t["platform"], t["state"], (name, city.get("slug")) if t["platform"] == "bms" else city,
+                       t["error"] or "failed")
+
+    return queue.collect_results("bms"), queue.collect_results("district")
+
+
+# =============================================================================
+# ── 5c. CONTINUOUS TRACKING ──────────────────────────────────────────────────
+# =============================================================================
+
+class ShowTracker:
+    """Long-running tracker that keeps drivers warm and refreshes each show by urgency."""
+
+    def __init__(self, district_cities, bms_cities):
+        self.district_cities = district_cities
+        self.bms_cities      = bms_cities
+        self.scheduler       = RefreshScheduler()
+        self.records         = {}    # (source, sid) -> latest show record
+        self.contexts        = {}    # (source, sid) -> what is needed to re-scrape the show
+        self._lock           = threading.Lock()
+        self._drivers        = Queue()
+        for _ in range(BMS_DRIVER_POOL_SIZE):
+            self._drivers.put(None)  # created lazily on first use
+        # Long-lived pools: District HTTP sessions live per thread, so the same threads keep them warm
+        self._dpool = ThreadPoolExecutor(max_workers=DISTRICT_CITY_WORKERS, thread_name_prefix="track-district")
+        self._bpool = ThreadPoolExecutor(max_workers=BMS_DRIVER_POOL_SIZE, thread_name_prefix="track-bms")
+
+    # ── Warm BMS drivers ────────────────────────────────────────────────────
+    def _borrow_driver(self):
+        driver = self._drivers.get()
+        if driver is None:
+            driver = _create_chrome_driver(next(proxy_pool) if proxy_pool else None)
+        return driver
+
+    def _return_driver(self, driver, healthy=True):
+        if not healthy:
+            try: driver.quit()
+            except Exception: pass
+            driver = None
+        self._drivers.put(driver)
+
+    def close(self):
+        self._dpool.shutdown(wait=True, cancel_futures=True)
+        self._bpool.shutdown(wait=True, cancel_futures=True)
+        while not self._drivers.empty():
+            driver = self._drivers.get()
+            if driver:
+                try: driver.quit()
+                except Exception: pass
+
+    # ── Discovery ───────────────────────────────────────────────────────────
+    def _register(self, key, show_time, context):
+        with self._lock:
+            self.contexts[key] = context
+            if key in self.scheduler or key in self.records:
+                return 0
+        if refresh_interval(show_time) is None:
+            return 0
+        self.scheduler.add(key, show_time)
+        return 1
+
+    def _discover_district(self, state, city):
+        reporting_city = get_normalized_city_name(state, city['name'], "district")
+        added = 0
+        for cin in fetch_district_cinemas(state, city, "[track]"):
+            venue = cin['cinemaInfo']['name']
+            for sess in cin.get('sessions', []):
+                key = ("district", str(sess.get('sid', '')))
+                added += self._register(key, district_gmt_to_ist(sess['showTime']),
+                                        ("district", sess, venue, state, reporting_city))
+        return added
+
+    def _discover_bms(self, state, city_name, city_slug):
+        reporting_city = get_normalized_city_name(state, city_name, "bms")
+        driver = self._borrow_driver()
+        healthy = True
+        added = 0
+        try:
+            for venue in load_bms_venues(driver, city_slug) or []:
+                v_name = venue["additionalData"]["venueName"]
+                v_code = venue["additionalData"]["venueCode"]
+                screen_capacity_map = {}
+                for show in venue.get("showtimes", []):
+                    key = ("bms", str(show["additionalData"]["sessionId"]))
+                    added += self._register(key, normalize_bms_time(SHOW_DATE, show.get("title")),
+                                            ("bms", show, v_name, v_code, state, reporting_city,
+                                             screen_capacity_map))
+        except Exception as e:
+            healthy = False
+            print(f"   ❌ [Track] BMS {city_name} discovery error: {str(e).splitlines()[0]}")
+        finally:
+            self._return_driver(driver, healthy)
+        return added
+
+    def _discover_all(self):
+        futures  = [self._dpool.submit(self._discover_district, s, c) for s, c in self.district_cities]
+        futures += [self._bpool.submit(self._discover_bms, s, n, sl) for s, n, sl in self.bms_cities]
+        return sum(f.result() for f in as_completed(futures))
+
+    def discover(self):
+        """Reloads every city page and schedules newly listed shows."""
+        added = self._discover_all()
+        print(f"🔭 [Track] Discovery added {added} shows — tracking {len(self.scheduler)}")
+
+    # ── Refresh ─────────────────────────────────────────────────────────────
+    def _scrape(self, key):
+        """Fetches the seat layout of one known show; returns its record or None."""
+        context = self.contexts[key]
+        record = None
+        if context[0] == "district":
+            _, sess, venue, state, reporting_city = context
+            record = scrape_district_session(sess, venue, state, reporting_city)
+        else:
+            _, show, v_name, v_code, state, reporting_city, capacity_map = context
+            driver = self._borrow_driver()
+            healthy = True
+            try:
+                record = scrape_bms_show(driver, state, reporting_city, v_name, v_code, show, capacity_map)
+                time.sleep(1)
+            except Exception:
+                healthy = False
+            finally:
+                self._return_driver(driver, healthy)
+        return record
+
+    def _refresh(self, key):
+        record = None
+        try:
+            record = self._scrape(key)
+            if record:
+                with self._lock:
+                    self.records[key] = record
+        finally:
+            # A failed scrape keeps the last known occupancy and is retried at the next slot
+            self.scheduler.reschedule(key, occupancy=record["occupancy"] if record else None)
+
+    def refresh_due(self):
+        """Refreshes every show whose slot has come up; returns how many were refreshed."""
+        due = self.scheduler.pop_due()
+        if not due:
+            return 0
+        bms_keys  = [k for k in due if k[0] == "bms"]
+        dist_keys = [k for k in due if k[0] == "district"]
+        futures  = [self._dpool.submit(self._refresh, k) for k in dist_keys]
+        futures += [self._bpool.submit(self._refresh, k) for k in bms_keys]
+        for f in as_completed(futures):
+            try:
+                f.result()
+            except Exception as e:
+                print(f"   ❌ [Track] Refresh error: {str(e).splitlines()[0]}")
+        print(f"   🔁 [Track] Refreshed {len(bms_keys)} BMS + {len(dist_keys)} District shows "
+              f"| next in {int(self.scheduler.next_due_in() or 0)}s")
+        return len(due)
+
+    # ── Reports ─────────────────────────────────────────────────────────────
+    def publish(self):
+        with self._lock:
+            snapshot = [r.copy() for r in self.records.values()]
+        all_bms_data  = [r for r in snapshot if r["source"] == "bms"]
+        all_dist_data = [r for r in snapshot if r["source"] == "district"]
+        final_data = merge_data(all_dist_data, all_bms_data)
+        if final_data:
+            publish_all_reports(final_data, send_email=TRACK_SEND_EMAIL)
+
+    def run(self):
+        """Main loop: rediscover, refresh due shows, regenerate reports on cadence."""
+        next_discovery = next_report = time.monotonic()
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= next_discovery:
+                    self.discover()
+                    next_discovery = now + TRACK_DISCOVERY_INTERVAL
+                self.refresh_due()
+                if time.monotonic() >= next_report and self.records:
+                    self.publish()
+                    next_report = time.monotonic() + TRACK_REPORT_INTERVAL
+                wait = self.scheduler.next_due_in()
+                wait = 60 if wait is None else wait
+                time.sleep(max(1, min(wait, next_report - time.monotonic(),
+                                      next_discovery - time.monotonic(), 60)))
+        except KeyboardInterrupt:
+            print("\n🛑 [Track] Stopping — writing final reports...")
+            if self.records:
+                self.publish()
+        finally:
+            self.close()
+
+
+class ShowSampler(ShowTracker):
+    """One-shot preliminary run: lists every show, scrapes a stratified sample and scales it up."""
+
+    def __init__(self, district_cities, bms_cities, fraction=SAMPLE_FRACTION):
+        super().__init__(district_cities, bms_cities)
+        self.fraction   = fraction
+        self.show_times = {}
+
+    def _register(self, key, show_time, context):
+        with self._lock:
+            if key in self.contexts:
+                return 0
+            self.contexts[key] = context
+            self.show_times[key] = show_time
+        return 1
+
+    def _unit(self, key):
+        """(state, reporting city, venue, top ticket price) of a listed show."""
+        context = self.contexts[key]
+        if context[0] == "district":
+            _, sess, venue, state, reporting_city = context
+            prices = [float(a.get('price', 0)) for a in sess.get('areas', [])]
+        else:
+            _, show, venue, _, state, reporting_city, _ = context
+            prices = [float(c.get("curPrice", 0)) for c in show["additionalData"].get("categories", [])]
+        return state, reporting_city, venue, max(prices, default=0)
+
+    def _population(self):
+        """Listed shows, with BMS copies of District sessions at mapped venues left out."""
+        plan = FetchPlan(VENUE_MAP)
+        for key, context in self.contexts.items():
+            if key[0] == "district":
+                plan.add_district_session(context[1].get('cid'), self.show_times[key], key[1])
+        keys = []
+        for key, context in self.contexts.items():
+            if key[0] == "bms" and plan.claim(context[3], self.show_times[key], key[1]):
+                continue
+            keys.append(key)
+        return keys, plan
+
+    def _impute(self, key, means, count, i):
+        """Record for an unsampled show carrying its share of the stratum mean."""
+        state, reporting_city, venue, _ = self._unit(key)
+        # Cumulative rounding keeps the stratum total exact while every record stays an integer
+        vals = {f: round(means[f] * (i + 1)) - round(means[f] * i) for f in means}
+        occ = round(vals["booked_tickets"] / vals["total_tickets"] * 100, 2) if vals["total_tickets"] else 0
+        return ShowRecord.from_dict({
+            "source": key[0], "sid": key[1], "state": state, "city": reporting_city, "venue": venue,
+            "normalized_show_time": self.show_times[key],
+            "seat_category_map": {}, "price_seat_map": {}, "price_seat_signature": [], "seat_signature": "",
+            "occupancy": min(100, occ), "is_fallback": True, "is_estimated": True, **vals,
+        })
+
+    def run(self):
+        try:
+            self._discover_all()
+            keys, plan = self._population()
+            history = load_previous_run_records()
+            tiers = city_tiers(history)
+
+            units = defaultdict(list)
+            for key in keys:
+                state, reporting_city, _, top_price = self._unit(key)
+                units[stratum_of(state, reporting_city, top_price, tiers)].append(key)
+            sizes = {h: len(u) for h, u in units.items()}
+            n_total = max(1, math.ceil(len(keys) * self.fraction))
+            chosen = draw_sample(units, allocate(sizes, historical_weights(history, tiers), n_total), SAMPLE_SEED)
+            n_chosen = sum(len(c) for c in chosen.values())
+            print(f"🎯 [Sample] {len(keys)} shows in {len(units)} strata — fetching {n_chosen} "
+                  f"({n_chosen / max(1, len(keys)) * 100:.1f}%)")
+
+            sampled = {}
+            futures = {(self._dpool if key[0] == "district" else self._bpool).submit(self._scrape, key): key
+                       for picks in chosen.values() for key in picks}
+            for f in as_completed(futures):
+                try:
+                    record = f.result()
+                except Exception:
+                    record = None
+                if record:
+                    sampled[futures[f]] = record
+
+            strata = {h: {"N": sizes[h], "sample": [sampled[k] for k in chosen[h] if k in sampled]}
+                      for h in units}
+            result = estimate(strata)
+
+            # The report scales up what estimate() does: fallback records count as unsampled and are imputed
+            observed = {k: r for k, r in sampled.items() if not r.get("is_fallback")}
+            pooled = stratum_means(list(observed.values()))
+            final_data = []
+            for h, members in units.items():
+                means = stratum_means([observed[k] for k in chosen[h] if k in observed], pooled)
+                rest = [k for k in members if k not in observed]
+                final_data.extend(self._impute(k, means, len(rest), i) for i, k in enumerate(rest))
+                final_data.extend(observed[k] for k in members if k in observed)
+            for r in final_data:
+                paired = plan.bms_sid_for(r["sid"]) if r["source"] == "district" else None
+                r["bms_sid"] = r["sid"] if r["source"] == "bms" else paired
+                r["district_sid"] = r["sid"] if r["source"] == "district" else None
+
+            g = result["booked_gross"]
+            print(f"📈 [Sample] Estimated gross ₹{g['estimate']:,.0f} "
+                  f"(95% CI ₹{g['low']:,.0f} – ₹{g['high']:,.0f}, ±{g['margin_pct']}%)")
+            if result["low_sample_strata"] or result["fallback_excluded"]:
+                print(f"⚠️  [Sample] {result['low_sample_strata']} strata with under {MIN_PER_STRATUM} scraped shows "
+                      f"use a collapsed-stratum variance; {result['fallback_excluded']} fallback record(s) "
+                      f"left out of the estimate")
+            if final_data:
+                publish_estimate(final_data, result)
+        finally:
+            self.close()
+
+
+# =============================================================================
+# ── 5d. DEADLINE PLANNING ────────────────────────────────────────────────────
+# =============================================================================
+
+def record_city_timing(platform, state, city_name, secs, results):
+    """Adds one city's run time, show count and gross to the timing history."""
+    CITY_TIMINGS.record(platform, state, city_name, secs,
+                        shows=len(results), gross=sum(r.get('booked_gross', 0) for r in results))
+
+def defer_for_deadline(platform, state, city_name, city_counter_str="", release=None):
+    """
+    True (and records the city as deferred) if starting it now would run past the deadline.
+    `release` is called before deferring; if it returns False the city can't be dropped and runs.
+    """
+    if SCRAPE_DEADLINE_TS is None:
+        return False
+    if time.time() + CITY_TIMINGS.estimate(platform, state, city_name) <= SCRAPE_DEADLINE_TS:
+        return False
+    if release is not None and not release():
+        return False
+    with _deferred_cities_lock:
+        _deferred_cities.append((platform, state, city_name))
+    label = "BMS" if platform == "bms" else "District"
+    print(f"   ⏭️  [{label}] {city_counter_str} {city_name:<15} — deferred (would miss the {RUN_DEADLINE} deadline)")
+    return True
+
+def apply_run_deadline(district_cities, bms_cities):
+    """
+    Plans the run against RUN_DEADLINE: sets the worker counts, orders cities by
+    historical gross and drops the cities that cannot fit. Returns the city lists to run.
+    """
+    global DISTRICT_CITY_WORKERS, BMS_DRIVER_POOL_SIZE, SCRAPE_DEADLINE_TS
+
+    hh, mm = map(int, RUN_DEADLINE.split(":"))
+    now = datetime.now()
+    deadline = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    if deadline <= now:
+        deadline += timedelta(days=1)   # "01:00" on a run started at 22:00 means tomorrow
+    remaining = (deadline - now).total_seconds()
+    if remaining < REPORT_STAGE_SECS:
+        print(f"❌ Deadline {RUN_DEADLINE} is {remaining/60:.0f} min away — less than the "
+              f"{REPORT_STAGE_SECS/60:.0f} min reserved for reports (REPORT_STAGE_SECS). Nothing would be scraped; exiting.")
+        exit(1)
+    SCRAPE_DEADLINE_TS = deadline.timestamp() - REPORT_STAGE_SECS
+    budget = max(0, SCRAPE_DEADLINE_TS - time.time())
+
+    plan = plan_run(
+        {"district": [(s, c['name'], (s, c)) for s, c in district_cities],
+         "bms":      [(s, name, (s, name, slug)) for s, name, slug in bms_cities]},
+        CITY_TIMINGS, budget, DISTRICT_RATE,
+        {"district": MAX_DISTRICT_WORKERS, "bms": MAX_BMS_DRIVERS},
+    )
+    DISTRICT_CITY_WORKERS = plan["workers"]["district"]
+    BMS_DRIVER_POOL_SIZE  = plan["workers"]["bms"]
+
+    print(f"\n⏱️  Deadline {RUN_DEADLINE} — {budget/60:.0f} min for scraping | "
+          f"estimated {plan['full_estimate_secs']/60:.0f} min for the full scope")
+    print(f"   District: {DISTRICT_CITY_WORKERS} workers, ~{plan['estimate']['district']/60:.0f} min | "
+          f"BMS: {BMS_DRIVER_POOL_SIZE} browsers, ~{plan['estimate']['bms']/60:.0f} min")
+    if not plan["feasible"]:
+        lost = sum(CITY_TIMINGS.value(s, c) for _, s, c in plan["deferred"])
+        print(f"⚠️  Deadline cannot be met for the full scope — deferring {len(plan['deferred'])} "
+              f"lowest-value cities (₹{lost:,} historical gross):")
+        for platform, state, city_name in plan["deferred"]:
+            print(f"      • [{platform}] {state} / {city_name}")
+        with _deferred_cities_lock:
+            _deferred_cities.extend(plan["deferred"])
+
+    return plan["cities"]["district"], plan["cities"]["bms"]
+
+
+# =============================================================================
+# ── 5e. RETRY PASS ───────────────────────────────────────────────────────────
+# =============================================================================
+
+def record_failure(platform, state, city, reason, show=None):
+    """Records a failed city (or, with `show`, a single rate-limited BMS show) for the retry pass.
+    `city` is the District config entry or a BMS (name, slug) pair. While a queue
+    worker runs a task, failures are collected for that task instead (_run_queue_task)."""
+    task = {"platform": platform, "state": state, "city": city, "reason": reason, "show": show}
+    captured = getattr(_thread_local, 'failures', None)
+    if captured is not None:
+        captured.append(task)
+        return
+    if not RECORD_FAILURES:
+        return
+    with _retry_tasks_lock:
+        _retry_tasks.append(task)
+
+def _take_retry_tasks():
+    with _retry_tasks_lock:
+        tasks = list(_retry_tasks)
+        _retry_tasks.clear()
+    return tasks
+
+def _city_key(task):
+    city = task["city"]
+    name = city["name"] if isinstance(city, dict) else city[0]
+    return task["platform"], task["state"], name
+
+def summarize_missing(tasks):
+    """One entry per (platform, state, city) with its reasons and how many shows are missing."""
+    missing = {}
+    for t in tasks:
+        platform, state, name = _city_key(t)
+        entry = missing.setdefault((platform, state, name), {
+            "platform": platform, "state": state, "city": name, "reasons": set(), "shows": 0, "whole_city": False,
+        })
+        entry["reasons"].add(t["reason"])
+        if t["show"]:
+            entry["shows"] += 1
+        else:
+            entry["whole_city"] = True
+    return [dict(e, reasons=sorted(e["reasons"])) for e in missing.values()]
+
+def _retry_bms_shows(state, city_name, city_slug, show_tasks, deadline):
+    """Re-fetches rate-limited BMS shows of one city with a fresh driver."""
+    results = []
+    driver = None
+    try:
+        driver = _create_chrome_driver(next(proxy_pool) if proxy_pool else None)
+        load_bms_venues(driver, city_slug)   # fresh session on the city page before any XHR
+        for t in show_tasks:
+            reporting_city, v_name, v_code, show, capacity_map = t["show"]
+            if time.monotonic() > deadline:
+                with _retry_tasks_lock:
+                    _retry_tasks.append(dict(t, reason="retry budget exhausted"))
+                continue
+            record = scrape_bms_show(
+                driver, state, reporting_city, v_name, v_code, show, capacity_map,
+                lambda msg, t=t: record_failure("bms", state, (city_name, city_slug), "rate limit", show=t["show"]))
+            if record:
+                results.append(record)
+            time.sleep(RETRY_SHOW_DELAY)
+    except Exception as e:
+        record_failure("bms", state, (city_name, city_slug), str(e).splitlines()[0])
+    finally:
+        if driver:
+            try: driver.quit()
+            except Exception: pass
+    return results
+
+def run_retry_pass(all_dist_data, all_bms_data):
+    """
+    Replays the failures of the main pass at lower concurrency with fresh
+    sessions and drivers, within RETRY_BUDGET_SECS. Recovered shows are added
+    to the given lists; returns what is still missing (see summarize_missing).
+    """
+    tasks = _take_retry_tasks()
+    if not tasks or RETRY_BUDGET_SECS <= 0:
+        return summarize_missing(tasks)
+
+    city_tasks = {}
+    show_tasks = defaultdict(list)
+    for t in tasks:
+        if t["show"] is None:
+            city_tasks.setdefault(_city_key(t), t)
+    for t in tasks:
+        if t["show"] is not None and _city_key(t) not in city_tasks:
+            show_tasks[(t["state"],) + tuple(t["city"])].append(t)
+
+    print(f"\n🔁 Retry pass — {len(city_tasks)} cities, {sum(len(v) for v in show_tasks.values())} "
+          f"rate-limited shows | budget {RETRY_BUDGET_SECS // 60} min")
+    for (platform, state, name), t in city_tasks.items():
+        print(f"   • [{platform}] {state} / {name} — {t['reason']}")
+    time.sleep(RETRY_COOLDOWN_SECS)
+    deadline = time.monotonic() + RETRY_BUDGET_SECS
+
+    # Only shows that made it into the results stay deduplicated; the rest may be fetched again.
+    # BMS shows claimed by the fetch plan count as fetched: merge_data pairs their District copies.
+    with _global_district_sids_lock:
+        _global_district_sids.clear()
+        _global_district_sids.update(r['sid'] for r in all_dist_data)
+    with _global_bms_sids_lock:
+        _global_bms_sids.clear()
+        _global_bms_sids.update(r['sid'] for r in all_bms_data)
+        if FETCH_PLAN is not None:
+            _global_bms_sids.update(FETCH_PLAN.claimed_bms_sids())
+
+    def _retry_city(t):
+        if time.monotonic() > deadline:
+            with _retry_tasks_lock:
+                _retry_tasks.append(dict(t, reason="retry budget exhausted"))
+            return t["platform"], []
+        if t["platform"] == "district":
+            if hasattr(_thread_local, 'session'):
+                delattr(_thread_local, 'session')
+            return "district", fetch_district_city(t["state"], t["city"], "[retry]")
+        name, slug = t["city"]
+        return "bms", process_bms_city_simple(t["state"], name, slug, "[retry]")
+
+    dist_tasks = [t for t in city_tasks.values() if t["platform"] == "district"]
+    bms_tasks  = [t for t in city_tasks.values() if t["platform"] == "bms"]
+    recovered = 0
+    with ThreadPoolExecutor(max_workers=RETRY_DISTRICT_WORKERS) as dpool, \
+         ThreadPoolExecutor(max_workers=RETRY_BMS_DRIVERS) as bpool:
+        futures  = [dpool.submit(_retry_city, t) for t in dist_tasks]
+        futures += [bpool.submit(_retry_city, t) for t in bms_tasks]
+        futures += [bpool.submit(lambda k=k, v=v: ("bms", _retry_bms_shows(k[0], k[1], k[2], v, deadline)))
+                    for k, v in show_tasks.items()]
+        for f in as_completed(futures):
+            try:
+                platform, results = f.result()
+            except Exception as e:
+                print(f"   ❌ [Retry] Worker error: {str(e).splitlines()[0]}")
+                continue
+            (all_bms_data if platform == "bms" else all_dist_data).extend(results)
+            recovered += len(results)
+
+    missing = summarize_missing(_take_retry_tasks())
+    print(f"🔁 Retry pass recovered {recovered} shows — {len(missing)} cities still incomplete")
+    for m in missing:
+        what = "whole city" if m["whole_city"] else f"{m['shows']} shows"
+        print(f"   ⚠️  [{m['platform']}] {m['state']} / {m['city']} — {what} ({', '.join(m['reasons'])})")
+    return missing
+
+
 # =============================================================================
 # ── 6. DATA MERGING & DEDUPLICATION ──────────────────────────────────────────
 # =============================================================================
@@ -733,17 +1614,6 @@ def load_venue_mapping():
     else:
         print("⚠️  Venue mapping not found. Venue-based matching disabled.")
 
-def _is_same_venue(bms_show, dist_show):
-    """Checks if a BMS show and District show map to the same physical venue."""
-    bms_code = bms_show.get('venue_code', '')
-    dist_cid = dist_show.get('cinema_id', '')
-    if not bms_code or not dist_cid:
-        return 'unmapped'
-    mapped_dist = VENUE_MAP.get(bms_code)
-    if mapped_dist is None:
-        return 'unmapped'
-    return mapped_dist == dist_cid
-
 def dedup_same_platform(records, source_label):
     """Removes duplicate shows within the same platform based on SID."""
     seen = {}
@@ -773,94 +1643,21 @@ def merge_data(all_dist_data, all_bms_data):
     print(f"\n🔄 Merging {len(all_dist_data)} District + {len(all_bms_data)} BMS shows...")
 
     final_data = []
-    SEAT_TOLERANCE = 5
-    district_index = defaultdict(list)
-    
+    unplanned = []
+    planned = 0
     for r in all_dist_data:
-        district_index[(r['state'], r['normalized_show_time'])].append(r)
-
-    for bms in all_bms_data:
-        key = (bms['state'], bms['normalized_show_time'])
-        candidates = district_index.get(key, [])
-        match = None
-
-        for c in candidates:
-            # 1. Exact Match: Session ID matching between BMS and District. Highest confidence.
-            if c['sid'] == bms['sid']:
-                match = c
-                print(f"   🔗 SID Match: {bms['sid']}")
-                break
-
-        if not match and not bms.get('is_fallback', False):
-            # 2. Strong Deduplication: Compare exact prices and the count of seats per price category, combined with venue validation.
-            b_sig = bms.get('price_seat_signature', [])
-            for c in candidates:
-                d_sig = c.get('price_seat_signature', [])
-                if b_sig and d_sig and len(b_sig) == len(d_sig):
-                    if all(bp == dp and abs(bs - ds) <= SEAT_TOLERANCE for (bp, bs), (dp, ds) in zip(b_sig, d_sig)):
-                        if _is_same_venue(bms, c) is True:
-                            match = c
-                            print(f"   🔗 Price/Seat Sig + Venue Map: {bms['venue']} == {c['venue']}")
-                            break
-
-        if not match and not bms.get('is_fallback', False):
-            # 3. Moderate Deduplication: Compare total seat counts per category, without price, combined with venue validation.
-            b_seats = sorted(bms.get('seat_category_map', {}).values())
-            for c in candidates:
-                d_seats = sorted(c.get('seat_category_map', {}).values())
-                if b_seats and d_seats and len(b_seats) == len(d_seats):
-                    if all(abs(bs - ds) <= SEAT_TOLERANCE for bs, ds in zip(b_seats, d_seats)):
-                        if _is_same_venue(bms, c) is True:
-                            match = c
-                            print(f"   🔗 Seat Sig + Venue Map: {bms['venue']} == {c['venue']}")
-                            break
-
-        if not match and candidates:
-            # 4. Weak Deduplication: Fall back to validating if both shows share the exact same ticket price points and venue.
-            b_prices = {p for p in bms.get('price_seat_map', {}).keys() if p > 0}
-            for c in candidates:
-                d_prices = {p for p in c.get('price_seat_map', {}).keys() if p > 0}
-                if b_prices == d_prices and _is_same_venue(bms, c) is True:
-                    match = c
-                    print(f"   🔗 Venue Map + Price: {bms['venue']} == {c['venue']}")
-                    break
-
-        if not match and candidates:
-            # 5. Venue-Only Deduplication: Last resort, purely based on time and mapped venue.
-            for c in candidates:
-                if _is_same_venue(bms, c) is True:
-                    match = c
-                    print(f"   🔗 Venue Map Only: {bms['venue']} == {c['venue']}")
-                    break
-
-        if match:
-            candidates.remove(match)
-            # If BMS data is genuinely scraped (no fallbacks), it is the most accurate source of truth.
-            # If BMS used a fallback, District is preferred as it might have a better recent cache.
-            if not bms.get('is_fallback', False):
-                match.update({
-                    'total_tickets': bms['total_tickets'],
-                    'booked_tickets': bms['booked_tickets'],
-                    'total_gross': bms['total_gross'],
-                    'booked_gross': bms['booked_gross'],
-                    'occupancy': bms['occupancy'],
-                    'seat_category_map': bms['seat_category_map'],
-                    'price_seat_map': bms['price_seat_map'],
-                    'seat_signature': bms['seat_signature'],
-                })
-            match['bms_sid'] = bms['sid']
-            match['district_sid'] = match['sid']
-            final_data.append(match)
-        else:
-            bms['bms_sid'] = bms['sid']
-            bms['district_sid'] = None
-            final_data.append(bms)
+        if r.get('planned_bms_sid'):
+            # Paired by the fetch plan before any layout was fetched — BMS copy never scraped
+            r['bms_sid'] = r.pop('planned_bms_sid')
+            r['district_sid'] = r['sid']
+            final_data.append(r)
+            planned += 1
+            continue
+        unplanned.append(r)
+    if planned:
+        print(f"   🧭 Fetch plan: {planned} show(s) paired before scraping")
 
-    for sublist in district_index.values():
-        for show in sublist:
-            show['bms_sid'] = None
-            show['district_sid'] = show['sid']
-            final_data.append(show)
+    final_data.extend(match_shows(unplanned, all_bms_data, VENUE_MAP))
 
     print(f"✅ Merge complete — {len(final_data)} final shows.")
     return final_data
@@ -870,89 +1667,110 @@ def merge_data(all_dist_data, all_bms_data):
 # ── 7. REPORT EXPORT ─────────────────────────────────────────────────────────
 # =============================================================================
 
-def generate_consolidated_excel(all_results, filename):
-    """Generates an Excel workbook with summarized show collections."""
-    print(f"📊 Generating Excel Report: {filename}...")
-    wb = Workbook()
-    reports_dir = "reports"
-    os.makedirs(reports_dir, exist_ok=True)
-
-    ws_state = wb.active
-    ws_state.title = "State Wise"
-    ws_state.append(["State","Cities","Theatres","Shows","Total Seats","Booked Seats","Total Gross","Booked Gross","Occ %"])
-    state_map, city_tracker, theatre_tracker = {}, {}, {}
-    for r in all_results:
-        st = r["state"]
-        if st not in state_map:
-            state_map[st] = {"shows":0,"t_seats":0,"b_seats":0,"p_gross":0,"b_gross":0}
-            city_tracker[st] = set(); theatre_tracker[st] = set()
-        d = state_map[st]
-        d["shows"]+=1; d["t_seats"]+=r["total_tickets"]; d["b_seats"]+=r["booked_tickets"]
-        d["p_gross"]+=r["total_gross"]; d["b_gross"]+=r["booked_gross"]
-        city_tracker[st].add(r["city"]); theatre_tracker[st].add(r["venue"])
-        
-    for st, d in state_map.items():
-        occ = round((d["b_seats"]/d["t_seats"])*100,2) if d["t_seats"] else 0
-        ws_state.append([st,len(city_tracker[st]),len(theatre_tracker[st]),d["shows"],
-                         d["t_seats"],d["b_seats"],d["p_gross"],d["b_gross"],occ])
-
-    ws_city = wb.create_sheet(title="City Wise")
-    ws_city.append(["State","City","Theatres","Shows","Total Seats","Booked Seats","Total Gross","Booked Gross","Occ %"])
-    city_map, city_theatre_tracker = {}, {}
-    for r in all_results:
-        k = (r["state"],r["city"])
-        if k not in city_map:
-            city_map[k] = {"shows":0,"t_seats":0,"b_seats":0,"p_gross":0,"b_gross":0}
-            city_theatre_tracker[k] = set()
-        d = city_map[k]
-        d["shows"]+=1; d["t_seats"]+=r["total_tickets"]; d["b_seats"]+=r["booked_tickets"]
-        d["p_gross"]+=r["total_gross"]; d["b_gross"]+=r["booked_gross"]
-        city_theatre_tracker[k].add(r["venue"])
-        
-    for (st,ct), d in city_map.items():
-        occ = round((d["b_seats"]/d["t_seats"])*100,2) if d["t_seats"] else 0
-        ws_city.append([st,ct,len(city_theatre_tracker[(st,ct)]),d["shows"],
-                        d["t_seats"],d["b_seats"],d["p_gross"],d["b_gross"],occ])
-
-    ws_th = wb.create_sheet(title="Theatre Wise")
-    ws_th.append(["Source","State","City","Venue","Shows","Total Seats","Booked Seats","Total Gross","Booked Gross","Occ %"])
-    th_map = {}
-    for r in all_results:
-        k = (r["source"],r["state"],r["city"],r["venue"])
-        if k not in th_map:
-            th_map[k] = {"shows":0,"t_seats":0,"b_seats":0,"p_gross":0,"b_gross":0}
-        d = th_map[k]
-        d["shows"]+=1; d["t_seats"]+=r["total_tickets"]; d["b_seats"]+=r["booked_tickets"]
-        d["p_gross"]+=r["total_gross"]; d["b_gross"]+=r["booked_gross"]
-        
-    for (src,st,ct,vn), d in th_map.items():
-        occ = round((d["b_seats"]/d["t_seats"])*100,2) if d["t_seats"] else 0
-        ws_th.append([src,st,ct,vn,d["shows"],d["t_seats"],d["b_seats"],d["p_gross"],d["b_gross"],occ])
-
-    ws_show = wb.create_sheet(title="Show Wise")
-    ws_show.append(["Source","State","City","Venue","Time","SID","Total Seats","Booked Seats","Total Gross","Booked Gross","Occ %"])
-    for r in all_results:
-        ws_show.append([r["source"],r["state"],r["city"],r["venue"],
-                        r["normalized_show_time"],r["sid"],
-                        r["total_tickets"],r["booked_tickets"],
-                        r["total_gross"],r["booked_gross"],r["occupancy"]])
-
-    ws_sum = wb.create_sheet(title="Summary")
-    agg_t = sum(r["total_tickets"] for r in all_results)
-    agg_b = sum(r["booked_tickets"] for r in all_results)
-    agg_bg = sum(r["booked_gross"] for r in all_results)
-    occ = round((agg_b/agg_t)*100,2) if agg_t else 0
-    ws_sum.append(["Metric","Value"])
-    for row in [("States",len(state_map)),("Cities",len(city_map)),("Shows",len(all_results)),
-                ("Booked Gross",agg_bg),("Occupancy %",occ),
-                ("Generated At",datetime.now().strftime("%Y-%m-%d %H:%M:%S"))]:
-        ws_sum.append(list(row))
+SHOW_WISE_TYPES = {"Total Seats": "int64", "Booked Seats": "int64", "Total Gross": "float64",
+                   "Booked Gross": "float64", "Occ %": "float64"}
+
+def _occ(d):
+    return round((d["tickets"]/d["seats"])*100,2) if d["seats"] else 0
 
+def _workbook_path(filename):
+    os.makedirs("reports", exist_ok=True)
     if "old_reports" in filename or "reports" in filename:
-        path = filename
-    else:
-        path = os.path.join(reports_dir, filename)
-    wb.save(path)
+        return filename
+    return os.path.join("reports", filename)
+
+def _write_show_wise(book, header, rows):
+    book.sheet("Show Wise", header, rows, split=True, side_file=True,
+               types=[SHOW_WISE_TYPES.get(h) for h in header])
+
+def generate_consolidated_excel(all_results, filename, show_rows=None, agg=None, extra_sheets=()):
+    """Generates an Excel workbook with summarized show collections.
+
+    Every sheet is streamed into a write-only workbook. `all_results` may hold
+    rollup rows carrying a "shows" count; the Show Wise sheet is then streamed
+    from `show_rows`. `agg` is aggregate_shows(all_results) when the caller
+    already has it; `extra_sheets` are (title, header, rows) appended last."""
+    print(f"📊 Generating Excel Report: {filename}...")
+    agg = agg or aggregate_shows(all_results)
+    book = StreamingWorkbook(_workbook_path(filename), EXCEL_SHOW_SHEET_ROWS, EXCEL_SIDE_FILE)
+
+    book.sheet("State Wise",
+               ["State","Cities","Theatres","Shows","Total Seats","Booked Seats","Total Gross","Booked Gross","Occ %"],
+               ([d["state"],d["cities"],d["venues"],d["shows"],d["seats"],d["tickets"],d["total_gross"],d["gross"],_occ(d)]
+                for d in agg["states"]))
+    book.sheet("City Wise",
+               ["State","City","Theatres","Shows","Total Seats","Booked Seats","Total Gross","Booked Gross","Occ %"],
+               ([d["state"],d["city"],d["venues"],d["shows"],d["seats"],d["tickets"],d["total_gross"],d["gross"],_occ(d)]
+                for d in agg["cities"]))
+    book.sheet("Theatre Wise",
+               ["Source","State","City","Venue","Shows","Total Seats","Booked Seats","Total Gross","Booked Gross","Occ %"],
+               ([d["source"],d["state"],d["city"],d["venue"],d["shows"],
+                 d["seats"],d["tickets"],d["total_gross"],d["gross"],_occ(d)] for d in agg["theatres"]))
+    _write_show_wise(book,
+                     ["Source","State","City","Venue","Time","SID","Total Seats","Booked Seats","Total Gross",
+                      "Booked Gross","Occ %","Status"],
+                     ([r["source"],r["state"],r["city"],r["venue"],
+                       r["normalized_show_time"],r["sid"],
+                       r["total_tickets"],r["booked_tickets"],
+                       r["total_gross"],r["booked_gross"],r["occupancy"],
+                       "Final" if r.get("is_final") else "Live"]
+                      for r in (all_results if show_rows is None else show_rows)))
+
+    totals = agg["totals"]
+    book.sheet("Summary", ["Metric","Value"],
+               [["States",totals["states"]],["Cities",totals["cities"]],["Shows",totals["shows"]],
+                ["Final Shows",totals["final_shows"]],
+                ["Booked Gross",totals["gross"]],["Occupancy %",_occ(totals)],
+                ["Generated At",datetime.now().strftime("%Y-%m-%d %H:%M:%S")]])
+    for title, header, rows in extra_sheets:
+        book.sheet(title, header, rows)
+    book.save()
+
+
+
+def generate_city_excel(all_results, filename, agg=None, extra_sheets=()):
+    """Generates an Excel workbook with city-wise show collections, streamed like generate_consolidated_excel."""
+    print(f"📊 Generating Excel Report: {filename}...")
+    agg = agg or aggregate_shows(all_results)
+    book = StreamingWorkbook(_workbook_path(filename), EXCEL_SHOW_SHEET_ROWS, EXCEL_SIDE_FILE)
+
+    book.sheet("City Wise",
+               ["State","City","Theatres","Shows","Total Seats","Booked Seats","Total Gross","Booked Gross","Occ %"],
+               ([d["state"],d["city"],d["venues"],d["shows"],d["seats"],d["tickets"],d["total_gross"],d["gross"],_occ(d)]
+                for d in agg["cities"]))
+    book.sheet("Theatre Wise",
+               ["Source","City","Venue","Shows","Total Seats","Booked Seats","Total Gross","Booked Gross","Occ %"],
+               ([d["source"],d["city"],d["venue"],d["shows"],d["seats"],d["tickets"],d["total_gross"],d["gross"],_occ(d)]
+                for d in agg["theatres"]))
+    _write_show_wise(book,
+                     ["Source","City","Venue","Time","SID","Total Seats","Booked Seats","Total Gross","Booked Gross",
+                      "Occ %","Status"],
+                     ([r["source"],r["city"],r["venue"],
+                       r["normalized_show_time"],r["sid"],
+                       r["total_tickets"],r["booked_tickets"],
+                       r["total_gross"],r["booked_gross"],r["occupancy"],
+                       "Final" if r.get("is_final") else "Live"] for r in all_results))
+
+    totals = agg["totals"]
+    book.sheet("Summary", ["Metric","Value"],
+               [["Total Cities",totals["cities"]],["Total Theatres",len(agg["theatres"])],
+                ["Total Shows",totals["shows"]],
+                ["Final Shows",totals["final_shows"]],["Booked Gross",totals["gross"]],
+                ["Occupancy %",_occ(totals)],["Generated At",datetime.now().strftime("%Y-%m-%d %H:%M:%S")]])
+    for title, header, rows in extra_sheets:
+        book.sheet(title, header, rows)
+    book.save()
+
+def generate_city_html_report(all_results, output_path, movie_name, show_date, trend=None, agg=None):
+    """Adapts the city HTML generator to the states generators' signature."""
+    generate_hybrid_city_html_report(all_results, DISTRICT_URL_TEMPLATE.format(city="city"), output_path,
+                                     movie_name=movie_name, show_date=show_date, trend=trend, agg=agg)
+
+# report_type -> (excel, image, html) generators
+REPORT_GENERATORS = {
+    "States": (generate_consolidated_excel, generate_premium_states_image_report, generate_hybrid_states_html_report),
+    "Cities": (generate_city_excel,         generate_premium_city_image_report,   generate_city_html_report),
+}
 
 
 def get_report_base_name(movie_name, show_date, report_type):
@@ -962,7 +1780,7 @@ def get_report_base_name(movie_name, show_date, report_type):
     return f"{slug}_{date_str}_{report_type}Report"
 
 def load_previous_report_data(base_name, reports_dir="reports"):
-    """Loads past show data to merge newly extracted shows."""
+    """Loads a report set's show data from a pre-store `_data.json` file (see migrate_legacy_report_data)."""
     path = os.path.join(reports_dir, f"{base_name}_data.json")
     if os.path.exists(path):
         try:
@@ -973,53 +1791,358 @@ def load_previous_report_data(base_name, reports_dir="reports"):
             pass
     return None
 
-def save_report_data(final_data, base_name, reports_dir="reports"):
-    """Saves the final merged show data into a JSON file."""
-    path = os.path.join(reports_dir, f"{base_name}_data.json")
-    serializable = []
-    for show in final_data:
-        s = {}
-        for k, v in show.items():
-            s[k] = list(v) if isinstance(v, set) else v
-        serializable.append(s)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(serializable, f, ensure_ascii=False, indent=2)
-
-def merge_with_previous_data(new_data, old_data):
-    """Combines current scraping session data with previously cached show collections."""
-    if not old_data:
-        return new_data
-
-    new_sids = set()
-    for show in new_data:
-        if show.get('bms_sid'): new_sids.add(show['bms_sid'])
-        if show.get('district_sid'): new_sids.add(show['district_sid'])
-
-    merged = list(new_data)
-    preserved = 0
-    for show in old_data:
-        old_show_sids = {s for s in (show.get('bms_sid'), show.get('district_sid')) if s}
-        if not old_show_sids and show.get('sid'):
-            old_show_sids = {show['sid']}
-        if old_show_sids & new_sids:
-            continue
-        merged.append(show)
-        preserved += 1
-
+def all_india_store_key(base_name):
+    """Store key of the all-India report set, kept apart from the configured-states set of the same name."""
+    return f"{base_name}:all-india"
+
+def migrate_legacy_report_data(reports_dir="reports"):
+    """Imports `_data.json` / `_data/` files of earlier runs into SHOW_STORE (once per report set)."""
+    movie_name = extract_movie_name_from_url(DISTRICT_URL_TEMPLATE.format(city="city"))
+    for report_type in REPORT_GENERATORS:
+        base_name = get_report_base_name(movie_name, SHOW_DATE, report_type)
+        sources = [(base_name, lambda: load_previous_report_data(base_name, reports_dir) or [])]
+        if report_type == "States":
+            data_dir = os.path.join(reports_dir, f"{base_name}_data")
+            sources.append((all_india_store_key(base_name), lambda: read_jsonl_dir(data_dir)))
+        for key, load in sources:
+            if SHOW_STORE.count(key):
+                continue
+            stats = SHOW_STORE.upsert(key, load(), movie_name, SHOW_DATE)
+            if stats["inserted"]:
+                print(f"🗄️  Imported {stats['inserted']} shows of {key} into {SHOW_STORE_PATH}")
+
+def log_store_stats(stats):
+    print(f"   🗄️  Show store: {stats['inserted']} new, {stats['updated']} changed, "
+          f"{stats['unchanged']} unchanged, {stats['replaced']} superseded")
+
+def store_run_data(key, final_data, movie_name):
+    """
+    Upserts a run's merged shows into SHOW_STORE and returns the report data:
+    these shows plus every stored show they did not replace.
+    """
+    log_store_stats(SHOW_STORE.upsert(key, final_data, movie_name, SHOW_DATE))
+    records = list(SHOW_STORE.records(key))
+    preserved = len(records) - len(final_data)
     if preserved:
         print(f"   📌 Preserved {preserved} shows from previous run")
+    return records
 
-    return merged
+def archive_run_records(records, report, run_ts, chunk=None):
+    """Appends a run's tracked shows to the Parquet archive. Returns False if it can't be written."""
+    if not ARCHIVE_RUNS:
+        return False
+    movie_name = extract_movie_name_from_url(DISTRICT_URL_TEMPLATE.format(city="city"))
+    try:
+        append_run(ARCHIVE_DIR, records, movie_name.replace(" ", "_"), SHOW_DATE, run_ts, report, chunk)
+    except ImportError:
+        print("⚠️  pyarrow not installed — run archive skipped (pip install pyarrow)")
+        return False
+    return True
+
+def record_booking_series(final_data, run_at=None):
+    """Adds this run's observed shows to BOOKING_SERIES (only shows whose numbers moved are written)."""
+    movie_name = extract_movie_name_from_url(DISTRICT_URL_TEMPLATE.format(city="city"))
+    run_at = run_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    stats = BOOKING_SERIES.record(movie_name, SHOW_DATE, run_at, final_data)
+    print(f"   📈 Booking series: {stats['changed']} shows moved, {stats['new']} new, {stats['unchanged']} unchanged")
+
+def booking_trend(report_type=None):
+    """Cumulative booked tickets / gross per run for a report set's scope (all shows without one)."""
+    movie_name = extract_movie_name_from_url(DISTRICT_URL_TEMPLATE.format(city="city"))
+    if report_type == "Cities":
+        return BOOKING_SERIES.trend(movie_name, SHOW_DATE, cities=INPUT_CITY_LIST)
+    if report_type == "States":
+        return BOOKING_SERIES.trend(movie_name, SHOW_DATE, states=INPUT_STATE_LIST)
+    return BOOKING_SERIES.trend(movie_name, SHOW_DATE)
+
+def load_previous_run_records():
+    """Returns the stored show records for this movie and date, each show once across all report sets."""
+    movie_name = extract_movie_name_from_url(DISTRICT_URL_TEMPLATE.format(city="city"))
+    return list(SHOW_STORE.scope_records(movie_name, SHOW_DATE))
+
+def load_frozen_sids():
+    """Returns the SIDs of previously recorded shows that are past their start (plus grace)."""
+    movie_name = extract_movie_name_from_url(DISTRICT_URL_TEMPLATE.format(city="city"))
+    cutoff = (datetime.now() - timedelta(minutes=FREEZE_GRACE_MINS)).strftime("%Y-%m-%d %H:%M")
+    frozen = SHOW_STORE.sids_started_before(movie_name, SHOW_DATE, cutoff)
+    if frozen:
+        print(f"🔒 {len(frozen)} recorded session(s) already started — frozen to their last values")
+    return frozen
 
 def archive_previous_reports(base_name, reports_dir="reports", old_reports_dir="old_reports"):
-    """Moves older report files into an old_reports directory to avoid overwriting them."""
+    """Moves older report files into an old_reports directory to avoid overwriting them.
+    Returns the archive timestamp used in the moved file names."""
     os.makedirs(old_reports_dir, exist_ok=True)
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    for ext in ['.xlsx', '.png', '.html', '_data.json']:
+    for ext in ['.xlsx', '.png', '.webp', '.html', '_data.json', '_data']:
         src = os.path.join(reports_dir, f"{base_name}{ext}")
         if os.path.exists(src):
             dest = os.path.join(old_reports_dir, f"{base_name}_{ts}{ext}")
             shutil.move(src, dest)
+    return ts
+
+
+def report_fingerprint(report_type, tracked, snapshot, missing):
+    """Content key of a report set: its two datasets (or their DatasetHash) plus the rest of what shapes its files."""
+    return fingerprint(report_type, tracked if isinstance(tracked, DatasetHash) else DatasetHash(tracked),
+                       snapshot if isinstance(snapshot, DatasetHash) else DatasetHash(snapshot),
+                       [_missing_line(m) for m in missing], IMAGE_FORMAT, EXCEL_SHOW_SHEET_ROWS, EXCEL_SIDE_FILE)
+
+def reports_unchanged(base_name, key):
+    """True when the report set's last reports were built from the same inputs and are still in place."""
+    if not SKIP_UNCHANGED_REPORTS or REPORT_FINGERPRINTS.get(base_name) != key:
+        return False
+    files = [f"reports/{base_name}.xlsx", IMAGE_ENCODER.path_for(f"reports/{base_name}.png"),
+             f"reports/{base_name}.html"]
+    if not all(os.path.exists(f) for f in files):
+        return False
+    print(f"♻️  {base_name}: data unchanged since the last run — keeping the current reports "
+          f"(no render, archive copy or email)")
+    return True
+
+def new_report_stage(label):
+    return ReportStage(REPORT_WORKERS, REPORT_TIMINGS_PATH, label)
+
+def run_report_stage(stage):
+    """Builds every queued report artifact (and sends queued emails); images are on disk when it returns."""
+    try:
+        return stage.run()
+    finally:
+        IMAGE_ENCODER.wait()
+
+def stage_report_set(stage, label, report_type, data, path_base, movie_name, show_date, agg, trend=None,
+                     extra_sheets=(), show_rows=None):
+    """
+    Queues the Excel, PNG and HTML reports of one dataset on `stage`.
+    Returns (task names, file paths). The PNG and HTML generators get only
+    `agg`, so the records are sent to a worker once; an Excel workbook
+    streamed from `show_rows` (an iterator) is written in this process.
+    """
+    generate_excel, generate_image, generate_html = REPORT_GENERATORS[report_type]
+    excel_kwargs = {"agg": agg, "extra_sheets": extra_sheets}
+    if show_rows is not None:
+        excel_kwargs["show_rows"] = show_rows
+    tasks = [
+        stage.add(f"{label} xlsx", generate_excel, data, f"{path_base}.xlsx", local=show_rows is not None,
+                  **excel_kwargs),
+        stage.add(f"{label} png", generate_image, (), f"{path_base}.png", movie_name=movie_name,
+                  show_date=show_date, agg=agg, encoder=IMAGE_ENCODER),
+        stage.add(f"{label} html", generate_html, (), f"{path_base}.html", movie_name=movie_name,
+                  show_date=show_date, trend=trend, agg=agg),
+    ]
+    files = [f"{path_base}.xlsx", IMAGE_ENCODER.path_for(f"{path_base}.png"), f"{path_base}.html"]
+    return tasks, files
+
+def publish_reports(final_data, report_type="States", send_email=True, stage=None):
+    """
+    Merges with the previous run, archives old reports, writes the new set and emails it.
+    With `stage`, the reports and email are only queued on it for the caller to run.
+    """
+    movie_name = extract_movie_name_from_url(DISTRICT_URL_TEMPLATE.format(city="city"))
+    show_date_fmt = datetime.strptime(SHOW_DATE, "%Y-%m-%d").strftime("%d %b %Y")
+    base_name = get_report_base_name(movie_name, SHOW_DATE, report_type)
+    is_show_day = SHOW_DATE == datetime.now().strftime("%Y-%m-%d")
+    current_run_data = list(final_data)
+
+    had_previous = SHOW_STORE.count(base_name) > 0
+    for show in current_run_data:
+        show['is_final'] = is_show_final(show.get('normalized_show_time'))
+    final_data = store_run_data(base_name, current_run_data, movie_name)
+    for show in final_data:
+        show['is_final'] = is_show_final(show.get('normalized_show_time'))
+
+    missing = missing_in_scope(report_type)
+    key = report_fingerprint(report_type, final_data, current_run_data, missing)
+    if reports_unchanged(base_name, key):
+        return base_name
+
+    archive_previous_reports(base_name)
+    own_stage = stage is None
+    if own_stage:
+        stage = new_report_stage(report_type)
+
+    # Aggregated reports (each dataset is aggregated once and shared by all three generators)
+    tracked_tasks, aggregated_files = stage_report_set(
+        stage, report_type, report_type, final_data, f"reports/{base_name}", movie_name, show_date_fmt,
+        aggregate_shows(final_data), trend=booking_trend(report_type),
+        extra_sheets=[missing_sheet(missing)] if missing else ())
+
+    # Snapshot reports
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    snapshot_name = f"{base_name}_{ts}"
+    os.makedirs("old_reports", exist_ok=True)
+    snapshot_tasks, snapshot_files = stage_report_set(
+        stage, f"{report_type} snapshot", report_type, current_run_data, f"old_reports/{snapshot_name}",
+        movie_name, show_date_fmt, aggregate_shows(current_run_data))
+    stage.add(f"{report_type} archive", archive_run_records, final_data, report_type, ts, local=True)
+    stage.add(f"{report_type} fingerprint", REPORT_FINGERPRINTS.record, base_name, key,
+              after=tracked_tasks + snapshot_tasks, local=True)
+
+    if send_email:
+        stage.add(f"{report_type} email", email_report_set, report_type, movie_name, show_date_fmt,
+                  aggregated_files, snapshot_files, tracked=is_show_day and had_previous, missing=missing,
+                  after=tracked_tasks + snapshot_tasks, local=True)
+    if own_stage:
+        run_report_stage(stage)
+    return base_name
+
+def missing_in_scope(report_type):
+    """Cities from MISSING_CITIES that belong to a report set's states."""
+    if report_type == "Cities":
+        states = {s for s, _ in INPUT_CITY_LIST}
+    else:
+        states = set(INPUT_STATE_LIST)
+    return [m for m in MISSING_CITIES if m["state"] in states]
+
+def _missing_line(m):
+    what = "whole city" if m["whole_city"] else f"{m['shows']} shows"
+    return f"[{m['platform']}] {m['state']} / {m['city']} — {what} ({', '.join(m['reasons'])})"
+
+def missing_sheet(missing):
+    """The "Missing" workbook sheet: cities still missing after the retry pass, as (title, header, rows)."""
+    return ("Missing", ["Platform","State","City","Missing","Reasons"],
+            [[m["platform"], m["state"], m["city"],
+              "Whole city" if m["whole_city"] else f"{m['shows']} shows", ", ".join(m["reasons"])] for m in missing])
+
+def email_report_set(report_type, movie_name, show_date_fmt, aggregated_files, snapshot_files, tracked,
+                     missing=None):
+    """Emails a report set — both the tracked and current-snapshot files once shows have been tracked."""
+    IMAGE_ENCODER.wait()  # images queued for background encoding must be on disk before they are attached
+    missing_lines = [_missing_line(m) for m in missing or []]
+    if tracked:
+        send_collection_report(
+            report_type=report_type.lower(), movie_name=movie_name, show_date=show_date_fmt,
+            subject_label="Tracked Gross + Advance Sales",
+            attachment_paths=aggregated_files + snapshot_files,
+            sections=[
+                {"label": "A. Tracked Gross + Advance Sales", "note": "Cumulative gross.", "files": aggregated_files},
+                {"label": "B. Advance Sales (Remaining)", "note": "Current snapshot.", "files": snapshot_files},
+            ],
+            missing=missing_lines,
+        )
+    else:
+        send_collection_report(
+            report_type=report_type.lower(), movie_name=movie_name, show_date=show_date_fmt,
+            subject_label="Advance Sales", attachment_paths=aggregated_files, missing=missing_lines,
+        )
+
+def publish_all_india(spill, send_email=True):
+    """
+    publish_reports for the all-India run: merges the spilled records one state
+    at a time and builds the reports from rollups, so no step holds every show.
+    Merged shows are upserted into SHOW_STORE state by state and streamed back.
+    """
+    movie_name = extract_movie_name_from_url(DISTRICT_URL_TEMPLATE.format(city="city"))
+    show_date_fmt = datetime.strptime(SHOW_DATE, "%Y-%m-%d").strftime("%d %b %Y")
+    base_name = get_report_base_name(movie_name, SHOW_DATE, "States")
+    store_key = all_india_store_key(base_name)
+    is_show_day = SHOW_DATE == datetime.now().strftime("%Y-%m-%d")
+
+    had_previous = SHOW_STORE.count(store_key) > 0
+
+    run_rollup, run_hash = ShowRollup(), DatasetHash()
+    run_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for state in spill.states():
+        print(f"\n🗺️  [All-India] {state}")
+        current = merge_data(list(spill.read("district", state)), list(spill.read("bms", state)))
+        for show in current:
+            show['is_final'] = is_show_final(show.get('normalized_show_time'))
+            run_rollup.add(show)
+            run_hash.add(show)
+        log_store_stats(SHOW_STORE.upsert(store_key, current, movie_name, SHOW_DATE))
+        record_booking_series(current, run_at)
+        spill.write("merged", state, current)
+
+    def stored_shows():
+        for show in SHOW_STORE.records(store_key):
+            show['is_final'] = is_show_final(show.get('normalized_show_time'))
+            yield show
+
+    rollup, stored_hash = ShowRollup(), DatasetHash()
+    for show in stored_shows():
+        rollup.add(show)
+        stored_hash.add(show)
+
+    key = report_fingerprint("AllIndia", stored_hash, run_hash, MISSING_CITIES)
+    if reports_unchanged(base_name, key):
+        return base_name
+    archive_previous_reports(base_name)
+
+    aggregated, snapshot = rollup.records(), run_rollup.records()
+    stage = new_report_stage("All-India")
+    tracked_tasks, aggregated_files = stage_report_set(
+        stage, "States", "States", aggregated, f"reports/{base_name}", movie_name, show_date_fmt,
+        aggregate_shows(aggregated), trend=booking_trend(), show_rows=stored_shows(),
+        extra_sheets=[missing_sheet(MISSING_CITIES)] if MISSING_CITIES else ())
+
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    snapshot_name = f"{base_name}_{ts}"
+    snapshot_tasks, snapshot_files = stage_report_set(
+        stage, "States snapshot", "States", snapshot, f"old_reports/{snapshot_name}", movie_name, show_date_fmt,
+        aggregate_shows(snapshot), show_rows=spill.read_all("merged"))
+
+    def archive_states():
+        # One archive file per state, so the archive step holds no more than one state either
+        for state in SHOW_STORE.states(store_key):
+            if not archive_run_records(SHOW_STORE.records(store_key, state), "AllIndia", ts, chunk=state):
+                break
+    stage.add("States archive", archive_states, local=True)
+    stage.add("States fingerprint", REPORT_FINGERPRINTS.record, base_name, key,
+              after=tracked_tasks + snapshot_tasks, local=True)
+
+    if send_email:
+        stage.add("States email", email_report_set, "States", movie_name, show_date_fmt,
+                  aggregated_files, snapshot_files, tracked=is_show_day and had_previous, missing=MISSING_CITIES,
+                  after=tracked_tasks + snapshot_tasks, local=True)
+    run_report_stage(stage)
+    return base_name
+
+def estimate_sheet(result):
+    """The "Estimate (95% CI)" workbook sheet of a sample run, as (title, header, rows)."""
+    rows = []
+    for scope, r in [("All", result)] + list(result["states"].items()):
+        g, t, o = r["booked_gross"], r["booked_tickets"], r["occupancy"]
+        rows.append([scope, r["shows"], r["sampled"], r["low_sample_strata"],
+                     round(g["estimate"]), round(g["low"]), round(g["high"]), g["margin_pct"],
+                     round(t["estimate"]), round(t["low"]), round(t["high"]),
+                     round(o["estimate"], 2), round(o["low"], 2), round(o["high"], 2)])
+    return ("Estimate (95% CI)",
+            ["Scope","Shows","Sampled","Low-sample Strata","Booked Gross","Gross Low","Gross High","± %",
+             "Booked Tickets","Tickets Low","Tickets High","Occ %","Occ Low","Occ High"], rows)
+
+def publish_estimate(final_data, result):
+    """Writes the sample-run report set and its confidence intervals (the tracked reports are untouched)."""
+    movie_name = extract_movie_name_from_url(DISTRICT_URL_TEMPLATE.format(city="city"))
+    show_date_fmt = datetime.strptime(SHOW_DATE, "%Y-%m-%d").strftime("%d %b %Y")
+    base_name = get_report_base_name(movie_name, SHOW_DATE, "Estimate")
+    label = f"{show_date_fmt} · Estimate ±{result['booked_gross']['margin_pct']}%"
+    os.makedirs("reports", exist_ok=True)
+
+    stage = new_report_stage("Estimate")
+    stage_report_set(stage, "Estimate", "States", final_data, f"reports/{base_name}", movie_name, label,
+                     aggregate_shows(final_data), extra_sheets=[estimate_sheet(result)])
+    with open(f"reports/{base_name}_ci.json", 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    run_report_stage(stage)
+    return base_name
+
+def publish_all_reports(final_data, send_email=True):
+    """
+    Produces the state report set and, if INPUT_CITY_LIST is set, the city report set from one merged dataset.
+    Both sets share one report stage, so each set's email goes out as soon as its own files are written.
+    """
+    base_names = []
+    record_booking_series(final_data)
+    stage = new_report_stage("Reports")
+    state_data = [r for r in final_data if r["state"] in INPUT_STATE_LIST]
+    if state_data:
+        base_names.append(publish_reports(state_data, "States", send_email, stage=stage))
+    city_scope = set(INPUT_CITY_LIST)
+    city_data = [r for r in final_data if (r["state"], r["city"]) in city_scope]
+    if city_data:
+        base_names.append(publish_reports(city_data, "Cities", send_email, stage=stage))
+    run_report_stage(stage)
+    return base_names
 
 
 # =============================================================================
@@ -1027,6 +2150,19 @@ def archive_previous_reports(base_name, reports_dir="reports", old_reports_dir="
 # =============================================================================
 
 if __name__ == "__main__":
+    RUN_MODE = sys.argv[1] if len(sys.argv) > 1 else "local"
+    SHOW_STORE = ShowStore(SHOW_STORE_PATH)
+    migrate_legacy_report_data()
+    FROZEN_SIDS = load_frozen_sids()
+
+    if RUN_MODE == "worker":
+        run_queue_worker(WorkQueue(QUEUE_PATH), sys.argv[2:] or None)
+        CITY_TIMINGS.save()
+        exit(0)
+
+    BOOKING_SERIES = BookingSeries(SERIES_PATH)
+    IMAGE_ENCODER = ImageEncoder(IMAGE_FORMAT, IMAGE_EFFORT, workers=IMAGE_ENCODE_WORKERS)
+
     if not os.path.exists(DISTRICT_CONFIG_PATH) or not os.path.exists(BMS_CONFIG_PATH):
         print("❌ Config files missing. Exiting.")
         exit(1)
@@ -1036,76 +2172,94 @@ if __name__ == "__main__":
     with open(BMS_CONFIG_PATH, 'r', encoding='utf-8') as f:
         bms_config = json.load(f)
 
-    district_cities = [(s, c) for s in INPUT_STATE_LIST for c in district_config.get(s, [])]
-    bms_cities = [(s, c['name'], c['slug']) for s in INPUT_STATE_LIST for c in bms_config.get(s, [])]
+    if RUN_MODE == "all-india":
+        district_cities = [(s, c) for s, cities in district_config.items() for c in cities]
+        bms_cities = [(s, c['name'], c['slug']) for s, cities in bms_config.items() for c in cities]
+    else:
+        district_cities = select_cities(district_config, "district")
+        bms_cities = [(s, c['name'], c['slug']) for s, c in select_cities(bms_config, "bms")]
 
     with _global_bms_sids_lock: _global_bms_sids.clear()
     with _global_district_sids_lock: _global_district_sids.clear()
 
     print(f"🎬 Initializing run: {len(bms_cities)} BMS Cities, {len(district_cities)} District Cities")
 
+    if RUN_MODE == "track":
+        load_venue_mapping()
+        ShowTracker(district_cities, bms_cities).run()
+        exit(0)
+
+    if RUN_MODE == "sample":
+        load_venue_mapping()
+        ShowSampler(district_cities, bms_cities).run()
+        exit(0)
+
+    if RUN_DEADLINE:
+        district_cities, bms_cities = apply_run_deadline(district_cities, bms_cities)
+
+    RECORD_FAILURES = True
     start_time = time.monotonic()
 
-    with ThreadPoolExecutor(max_workers=2) as platform_pool:
-        bms_future  = platform_pool.submit(run_bms, bms_cities)
-        dist_future = platform_pool.submit(run_district, district_cities)
-        all_bms_data  = bms_future.result()
-        all_dist_data = dist_future.result()
+    if RUN_MODE == "coordinator":
+        all_bms_data, all_dist_data = run_coordinator(WorkQueue(QUEUE_PATH), district_cities, bms_cities)
+    elif RUN_MODE == "all-india":
+        # No fetch plan here — it would keep every District listing in memory
+        spill = ShowSpill(SPILL_DIR)
+        spill.reset()
+        with ThreadPoolExecutor(max_workers=2) as platform_pool:
+            bms_future  = platform_pool.submit(run_bms, bms_cities, spill.write)
+            dist_future = platform_pool.submit(run_district, district_cities, None, spill.write)
+            bms_future.result(); dist_future.result()
+        CITY_TIMINGS.save()
+        retried_dist, retried_bms = [], []
+        MISSING_CITIES = run_retry_pass(retried_dist, retried_bms)
+        for platform, recovered in (("district", retried_dist), ("bms", retried_bms)):
+            by_state = defaultdict(list)
+            for r in recovered:
+                by_state[r['state']].append(r)
+            for state, records in by_state.items():
+                spill.write(platform, state, records)
+        load_venue_mapping()
+        base_name = publish_all_india(spill)
+        print(f"\n🏁 Complete in {(time.monotonic() - start_time)/60:.1f} minutes. Output: {base_name}")
+        exit(0)
+    else:
+        # District listings are one cheap page per city — load them first so BMS
+        # can skip seat layouts for shows District will fetch anyway.
+        dist_listings = None
+        if CROSS_PLATFORM_PLAN:
+            load_venue_mapping()
+            dist_listings = list_district_cities(district_cities)
+            FETCH_PLAN = build_fetch_plan(dist_listings)
+
+        with ThreadPoolExecutor(max_workers=2) as platform_pool:
+            bms_future  = platform_pool.submit(run_bms, bms_cities)
+            dist_future = platform_pool.submit(run_district, district_cities, dist_listings)
+            all_bms_data  = bms_future.result()
+            all_dist_data = dist_future.result()
+
+        if FETCH_PLAN is not None:
+            for r in all_dist_data:
+                bms_sid = FETCH_PLAN.bms_sid_for(r['sid'])
+                if bms_sid:
+                    r['planned_bms_sid'] = bms_sid
+
+    MISSING_CITIES = run_retry_pass(all_dist_data, all_bms_data)
 
     elapsed = time.monotonic() - start_time
     print(f"\n📋 Platforms finished in {elapsed/60:.1f} minutes.")
     print(f"   BMS: {len(all_bms_data)} shows | District: {len(all_dist_data)} shows")
+    CITY_TIMINGS.save()
+    if _deferred_cities:
+        print(f"   ⏭️  {len(_deferred_cities)} cities deferred to meet the {RUN_DEADLINE} deadline")
 
     load_venue_mapping()
     final_data = merge_data(all_dist_data, all_bms_data)
 
     if final_data:
-        movie_name = extract_movie_name_from_url(DISTRICT_URL_TEMPLATE.format(city="city"))
-        show_date_fmt = datetime.strptime(SHOW_DATE, "%Y-%m-%d").strftime("%d %b %Y")
-        base_name = get_report_base_name(movie_name, SHOW_DATE, "States")
-        is_show_day = SHOW_DATE == datetime.now().strftime("%Y-%m-%d")
-        current_run_data = list(final_data)
-
-        old_data = load_previous_report_data(base_name)
-        if old_data:
-            final_data = merge_with_previous_data(final_data, old_data)
-
-        archive_previous_reports(base_name)
-
-        # Generate aggregated reports
-        generate_consolidated_excel(final_data, f"{base_name}.xlsx")
-        generate_premium_states_image_report(final_data, f"reports/{base_name}.png", movie_name=movie_name, show_date=show_date_fmt)
-        generate_hybrid_states_html_report(final_data, f"reports/{base_name}.html", movie_name=movie_name, show_date=show_date_fmt)
-        save_report_data(final_data, base_name)
-
-        # Generate snapshot reports
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        snapshot_name = f"{base_name}_{ts}"
-        os.makedirs("old_reports", exist_ok=True)
-        generate_consolidated_excel(current_run_data, f"old_reports/{snapshot_name}.xlsx")
-        generate_premium_states_image_report(current_run_data, f"old_reports/{snapshot_name}.png", movie_name=movie_name, show_date=show_date_fmt)
-        generate_hybrid_states_html_report(current_run_data, f"old_reports/{snapshot_name}.html", movie_name=movie_name, show_date=show_date_fmt)
-
-        aggregated_files = [f"reports/{base_name}.xlsx", f"reports/{base_name}.png", f"reports/{base_name}.html"]
-        snapshot_files = [f"old_reports/{snapshot_name}.xlsx", f"old_reports/{snapshot_name}.png", f"old_reports/{snapshot_name}.html"]
-
-        if is_show_day and old_data:
-            send_collection_report(
-                report_type="states", movie_name=movie_name, show_date=show_date_fmt,
-                subject_label="Tracked Gross + Advance Sales",
-                attachment_paths=aggregated_files + snapshot_files,
-                sections=[
-                    {"label": "A. Tracked Gross + Advance Sales", "note": "Cumulative gross.", "files": aggregated_files},
-                    {"label": "B. Advance Sales (Remaining)", "note": "Current snapshot.", "files": snapshot_files},
-                ]
-            )
-        else:
-            send_collection_report(
-                report_type="states", movie_name=movie_name, show_date=show_date_fmt,
-                subject_label="Advance Sales", attachment_paths=aggregated_files
-            )
+        base_names = publish_all_reports(final_data)
 
         total_elapsed = time.monotonic() - start_time
-        print(f"\n🏁 Complete in {total_elapsed/60:.1f} minutes. Output: {base_name}")
+        print(f"\n🏁 Complete in {total_elapsed/60:.1f} minutes. Output: {', '.join(base_names)}")
     else:
         print("❌ No data found.")
@@ -0,0 +1,244 @@
+"""
+Booking Velocity Series
+───────────────────────
+Per-show booking history across runs, stored as deltas: every run records
+how many tickets and how much gross each show gained since the last run
+that saw it. Shows whose numbers did not move write nothing, so a day of
+half-hourly runs costs little more than the shows that actually sold.
+
+Cumulative values at any run are running sums of the deltas, which makes
+booking pace (tickets / gross per hour) per show, venue, city or state a
+single grouped query instead of reloading every archived report.
+
+Usage:
+    from utils.bookingSeries import BookingSeries
+
+    series = BookingSeries("reports/booking_series.db")
+    series.record(movie_name, "2026-05-07", "2026-05-07 18:30:00", final_data)
+
+    series.trend(movie_name, "2026-05-07", states=["Telangana"])        # [(run_at, tickets, gross), ...]
+    series.pace(movie_name, "2026-05-07", level="city", hours=2)         # {(state, city): {...}, ...}
+"""
+
+import os
+import sqlite3
+from collections import defaultdict
+from contextlib import closing
+from datetime import datetime
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    movie     TEXT NOT NULL,
+    show_date TEXT NOT NULL,
+    run_at    TEXT NOT NULL,
+    UNIQUE (movie, show_date, run_at)
+);
+CREATE TABLE IF NOT EXISTS series (
+    id                   INTEGER PRIMARY KEY AUTOINCREMENT,
+    movie                TEXT    NOT NULL,
+    show_date            TEXT    NOT NULL,
+    state                TEXT,
+    city                 TEXT,
+    venue                TEXT,
+    normalized_show_time TEXT,
+    last_tickets         INTEGER NOT NULL DEFAULT 0,
+    last_gross           INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_series_scope ON series (movie, show_date, state, city, venue);
+CREATE TABLE IF NOT EXISTS series_sids (
+    movie     TEXT    NOT NULL,
+    show_date TEXT    NOT NULL,
+    sid       TEXT    NOT NULL,
+    series_id INTEGER NOT NULL,
+    PRIMARY KEY (movie, show_date, sid)
+);
+CREATE TABLE IF NOT EXISTS deltas (
+    series_id INTEGER NOT NULL,
+    run_id    INTEGER NOT NULL,
+    tickets   INTEGER NOT NULL,
+    gross     INTEGER NOT NULL,
+    PRIMARY KEY (series_id, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_deltas_run ON deltas (run_id);
+"""
+
+LEVELS = {
+    "state": ("state",),
+    "city":  ("state", "city"),
+    "venue": ("state", "city", "venue"),
+    "show":  ("state", "city", "venue", "normalized_show_time", "id"),
+}
+
+
+def _sids(show):
+    return {str(s) for s in (show.get("bms_sid"), show.get("district_sid"), show.get("sid")) if s}
+
+
+class BookingSeries:
+    """Delta-encoded booked tickets / gross per show and run, in a single SQLite file."""
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ── Writes ──────────────────────────────────────────────────────────────
+    def record(self, movie, show_date, run_at, shows):
+        """
+        Records one run's observed shows. Estimated (sampled) shows are
+        skipped. Returns counts of new series, changed shows and unchanged shows.
+        """
+        stats = {"new": 0, "changed": 0, "unchanged": 0}
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR IGNORE INTO runs (movie, show_date, run_at) VALUES (?, ?, ?)",
+                         (movie, show_date, run_at))
+            run_id = conn.execute("SELECT id FROM runs WHERE movie = ? AND show_date = ? AND run_at = ?",
+                                  (movie, show_date, run_at)).fetchone()["id"]
+
+            index = {r["sid"]: r["series_id"] for r in conn.execute(
+                "SELECT sid, series_id FROM series_sids WHERE movie = ? AND show_date = ?", (movie, show_date))}
+            last = {r["id"]: (r["last_tickets"], r["last_gross"]) for r in conn.execute(
+                "SELECT id, last_tickets, last_gross FROM series WHERE movie = ? AND show_date = ?",
+                (movie, show_date))}
+            seen = set()
+
+            for show in shows:
+                if show.get("is_estimated"):
+                    continue
+                sids = _sids(show)
+                series_id = next((index[s] for s in sids if s in index), None)
+                if series_id in seen:
+                    continue        # the same show reported twice in one run
+                tickets, gross = int(show.get("booked_tickets", 0)), int(show.get("booked_gross", 0))
+
+                if series_id is None:
+                    series_id = conn.execute(
+                        "INSERT INTO series (movie, show_date, state, city, venue, normalized_show_time) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (movie, show_date, show.get("state"), show.get("city"), show.get("venue"),
+                         show.get("normalized_show_time")),
+                    ).lastrowid
+                    prev = (0, 0)
+                    stats["new"] += 1
+                else:
+                    prev = last[series_id]
+                    stats["changed" if (tickets, gross) != prev else "unchanged"] += 1
+                seen.add(series_id)
+
+                new_sids = [s for s in sids if s not in index]
+                if new_sids:
+                    conn.executemany("INSERT OR REPLACE INTO series_sids (movie, show_date, sid, series_id) "
+                                     "VALUES (?, ?, ?, ?)", [(movie, show_date, s, series_id) for s in new_sids])
+                    index.update((s, series_id) for s in new_sids)
+
+                if (tickets, gross) != prev:
+                    conn.execute(
+                        "INSERT INTO deltas (series_id, run_id, tickets, gross) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (series_id, run_id) DO UPDATE SET "
+                        "tickets = tickets + excluded.tickets, gross = gross + excluded.gross",
+                        (series_id, run_id, tickets - prev[0], gross - prev[1]),
+                    )
+                    conn.execute("UPDATE series SET last_tickets = ?, last_gross = ? WHERE id = ?",
+                                 (tickets, gross, series_id))
+                    last[series_id] = (tickets, gross)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return stats
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+    @staticmethod
+    def _scope(states=None, cities=None):
+        where, params = "", []
+        if states is not None:
+            where += " AND s.state IN (%s)" % ",".join("?" * len(states))
+            params.extend(states)
+        if cities is not None:
+            where += " AND (s.state || '|' || s.city) IN (%s)" % ",".join("?" * len(cities))
+            params.extend(f"{st}|{c}" for st, c in cities)
+        return where, params
+
+    def history(self, movie, show_date, level="state", states=None, cities=None):
+        """
+        Cumulative booked tickets and gross per group at every run where the
+        group changed: {group: [(run_at, tickets, gross), ...]}, keyed by the
+        `level` columns.
+        """
+        cols = LEVELS[level]
+        where, params = self._scope(states, cities)
+        query = (
+            f"SELECT r.run_at, {', '.join('s.' + c for c in cols)}, SUM(d.tickets) AS tickets, SUM(d.gross) AS gross "
+            "FROM deltas d JOIN series s ON s.id = d.series_id JOIN runs r ON r.id = d.run_id "
+            f"WHERE s.movie = ? AND s.show_date = ?{where} "
+            f"GROUP BY r.run_at, {', '.join('s.' + c for c in cols)} ORDER BY r.run_at"
+        )
+        out, totals = defaultdict(list), defaultdict(lambda: [0, 0])
+        with closing(self._connect()) as conn:
+            for row in conn.execute(query, [movie, show_date, *params]):
+                key = tuple(row[c] for c in cols)
+                key = key[0] if len(key) == 1 else key
+                totals[key][0] += row["tickets"]
+                totals[key][1] += row["gross"]
+                out[key].append((row["run_at"], *totals[key]))
+        return dict(out)
+
+    def runs(self, movie, show_date):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT run_at FROM runs WHERE movie = ? AND show_date = ? ORDER BY run_at",
+                                (movie, show_date)).fetchall()
+        return [r["run_at"] for r in rows]
+
+    def trend(self, movie, show_date, states=None, cities=None):
+        """Cumulative booked tickets and gross at every run, for the report's trend chart."""
+        totals = {}
+        for points in self.history(movie, show_date, "state", states, cities).values():
+            prev = (0, 0)
+            for run_at, tickets, gross in points:
+                t, g = totals.get(run_at, (0, 0))
+                totals[run_at] = (t + tickets - prev[0], g + gross - prev[1])
+                prev = (tickets, gross)
+        points, tickets, gross = [], 0, 0
+        for run_at in self.runs(movie, show_date):
+            dt, dg = totals.get(run_at, (0, 0))
+            tickets, gross = tickets + dt, gross + dg
+            points.append((run_at, tickets, gross))
+        return points
+
+    def pace(self, movie, show_date, level="city", hours=1.0, states=None, cities=None):
+        """
+        Booking pace per group over the runs of the last `hours` (up to the
+        latest run): tickets and gross gained per hour, with the current totals.
+        """
+        runs = self.runs(movie, show_date)
+        if len(runs) < 2:
+            return {}
+        parse = lambda ts: datetime.strptime(ts, "%Y-%m-%d %H:%M:%S")
+        end = parse(runs[-1])
+        # Latest run at least `hours` before the last one (the first run if the history is shorter)
+        base_run = next((r for r in reversed(runs) if (end - parse(r)).total_seconds() >= hours * 3600), runs[0])
+        span = (end - parse(base_run)).total_seconds() / 3600
+
+        result = {}
+        for key, points in self.history(movie, show_date, level, states, cities).items():
+            base = next((p for p in reversed(points) if p[0] <= base_run), (base_run, 0, 0))
+            result[key] = {
+                "tickets": points[-1][1], "gross": points[-1][2],
+                "tickets_per_hour": (points[-1][1] - base[1]) / span,
+                "gross_per_hour":   (points[-1][2] - base[2]) / span,
+            }
+        return result
@@ -0,0 +1,186 @@
+"""
+Email Attachment Packaging
+──────────────────────────
+Turns the report files of one email into what is actually sent. On show
+day a report email carries the tracked and snapshot Excel, PNG and HTML
+files; an all-India set of them gets close to Gmail's 25 MB limit (which
+counts the base64-encoded size, a third more than the files) and takes a
+long time to upload.
+
+package_attachments(...):
+
+    • drops repeated files — the same path twice, or two files with the
+      same content — noting which kept file stands in for each;
+    • re-encodes truecolour PNG images as palette PNGs (see
+      utils/imageEncode.py), keeping the original when that isn't smaller;
+    • puts the HTML and Excel reports (and any other file) into one zip,
+      deflating the HTML and storing the already-compressed workbooks;
+    • fits the email into `budget` bytes, images first: what doesn't fit is
+      copied to `share_dir` (a local or network share) and linked in the
+      body, or listed as not attached when there is no share.
+
+Usage:
+    from utils.emailAttachments import package_attachments
+
+    package = package_attachments(files, work_dir, budget=18_000_000, share_dir="/mnt/share/reports")
+    package.attachments              # paths to attach
+    package.where["reports/Movie_07May_StatesReport.html"]   # "Movie_07May_StatesReport.zip"
+"""
+
+import hashlib
+import os
+import shutil
+import zipfile
+from dataclasses import dataclass, field
+
+from PIL import Image
+
+from utils.imageEncode import ImageEncoder
+
+
+# =============================================================================
+# ── CONFIGURATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+DEFAULT_BUDGET   = 18 * 1024 * 1024    # raw bytes; base64 takes this to ~24 MB, under Gmail's 25 MB
+IMAGE_EXTENSIONS = {".png", ".webp", ".jpg", ".jpeg"}
+STORED_IN_ZIP    = {".xlsx", ".zip", ".parquet", ".png", ".webp", ".jpg", ".jpeg"}   # already compressed
+
+PALETTE_ENCODER = ImageEncoder("png-palette")
+
+
+# =============================================================================
+# ── PACKAGING ─────────────────────────────────────────────────────────────────
+# =============================================================================
+
+@dataclass
+class Package:
+    """What an email sends: files to attach, plus where each original file ended up."""
+    attachments: list = field(default_factory=list)
+    where: dict = field(default_factory=dict)      # original path -> name of the attachment holding it
+    shared: dict = field(default_factory=dict)     # original path -> copy in the share folder
+    skipped: list = field(default_factory=list)    # originals neither attached nor shared
+    same_as: dict = field(default_factory=dict)    # dropped duplicate -> original kept in its place
+
+    @property
+    def size(self):
+        return sum(os.path.getsize(p) for p in self.attachments)
+
+
+def _digest(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def unique_files(paths):
+    """
+    Existing files of `paths` in order, without repeated paths or repeated
+    content, and a {dropped path: kept path} map of the duplicates.
+    """
+    seen_paths, seen_content, files, same_as = {}, {}, [], {}
+    for path in paths:
+        if not os.path.isfile(path):
+            continue
+        real = os.path.realpath(path)
+        if real in seen_paths:
+            if path != seen_paths[real]:
+                same_as[path] = seen_paths[real]
+            continue
+        digest = _digest(path)
+        seen_paths[real] = seen_content.get(digest, path)
+        if digest in seen_content:
+            same_as[path] = seen_content[digest]
+            continue
+        seen_content[digest] = path
+        files.append(path)
+    return files, same_as
+
+
+def recompress_image(path, work_dir):
+    """A palette-PNG copy of a truecolour PNG in work_dir when that is smaller, else `path`."""
+    if os.path.splitext(path)[1].lower() != ".png":
+        return path
+    with Image.open(path) as img:
+        if img.mode == "P":
+            return path
+        img.load()
+        out = PALETTE_ENCODER.save(img.convert("RGB"), os.path.join(work_dir, os.path.basename(path)))
+    if os.path.getsize(out) < os.path.getsize(path):
+        return out
+    os.remove(out)
+    return path
+
+
+def zip_files(paths, zip_path):
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for path in paths:
+            stored = os.path.splitext(path)[1].lower() in STORED_IN_ZIP
+            zf.write(path, os.path.basename(path),
+                     compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED, compresslevel=6)
+    return zip_path
+
+
+def _share(path, share_dir):
+    os.makedirs(share_dir, exist_ok=True)
+    target = os.path.join(share_dir, os.path.basename(path))
+    shutil.copyfile(path, target)
+    return target
+
+
+def package_attachments(paths, work_dir, budget=DEFAULT_BUDGET, share_dir=None, zip_name=None):
+    """
+    Packages `paths` for one email, writing recompressed images and the zip
+    into work_dir. Images are attached first, then the zip of everything
+    else; a part that would take the email over `budget` bytes is copied to
+    share_dir and linked instead (or skipped without a share); the zip
+    leaves out its largest files until it fits.
+    """
+    package = Package()
+    files, package.same_as = unique_files(paths)
+    images = [p for p in files if os.path.splitext(p)[1].lower() in IMAGE_EXTENSIONS]
+    others = [p for p in files if p not in images]
+    used = 0
+
+    def leave_out(original):
+        if share_dir:
+            package.shared[original] = _share(original, share_dir)
+        else:
+            package.skipped.append(original)
+
+    for path in images:
+        candidate = recompress_image(path, work_dir)
+        if used + os.path.getsize(candidate) <= budget:
+            used += os.path.getsize(candidate)
+            package.attachments.append(candidate)
+            package.where[path] = os.path.basename(candidate)
+        else:
+            leave_out(path)
+
+    if others:
+        name = zip_name or os.path.splitext(os.path.basename(others[0]))[0] + ".zip"
+        zip_path = os.path.join(work_dir, name)
+        # Leave out the largest files until the rest zips within the remaining budget
+        zipped = sorted(others, key=os.path.getsize)
+        while zipped:
+            zip_files(zipped, zip_path)
+            if used + os.path.getsize(zip_path) <= budget:
+                break
+            leave_out(zipped.pop())
+        if zipped:
+            used += os.path.getsize(zip_path)
+            package.attachments.append(zip_path)
+            for path in zipped:
+                package.where[path] = name
+
+    # A duplicate went wherever the file kept in its place went
+    for dup, kept in package.same_as.items():
+        if kept in package.where:
+            package.where[dup] = package.where[kept]
+        elif kept in package.shared:
+            package.shared[dup] = package.shared[kept]
+        else:
+            package.skipped.append(dup)
+    return package
@@ -0,0 +1,206 @@
+"""
+Email Outbox
+────────────
+Report emails queued on disk, so a run doesn't wait on SMTP (or lose the
+email when Gmail is slow or down). Each message is a folder under the
+outbox holding copies of its attachments and a message.json, written last
+so a half-written message is never picked up:
+
+    reports/outbox/
+        20260507_213015_1a2b3c4d/      message.json + attachments
+        failed/                        messages given up on
+        sender.lock                    held by the running background sender
+
+One background sender (see `python -m utils.sendReportEmail --outbox`)
+delivers the queue. The lock file holds the sender's PID and is touched by
+a heartbeat thread while it runs — also in the middle of a long upload —
+and a lock that hasn't been touched for LOCK_STALE_SECS is taken over. A
+sender only ever touches or removes a lock holding its own PID. A failed
+delivery stays queued with its attempt count and is retried after an
+exponential backoff, up to MAX_ATTEMPTS.
+
+Usage:
+    from utils.emailOutbox import Outbox
+
+    outbox = Outbox("reports/outbox")
+    outbox.enqueue(subject, body, recipients, attachments)
+    for message in outbox.due():
+        ...
+        outbox.sent(message)           # or outbox.retry(message, error)
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+# =============================================================================
+# ── CONFIGURATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+MAX_ATTEMPTS    = 8        # deliveries tried before a message is moved to failed/
+BACKOFF_BASE    = 30       # seconds before the first retry, doubling per attempt
+BACKOFF_MAX     = 15 * 60  # longest wait between attempts
+LOCK_STALE_SECS = 120      # a sender lock not touched for this long is abandoned
+HEARTBEAT_SECS  = 20       # how often the running sender touches its lock
+TAKEOVER_SETTLE = 1        # seconds a stale-lock takeover waits before checking it won
+
+MESSAGE_FILE = "message.json"
+
+
+# =============================================================================
+# ── OUTBOX ────────────────────────────────────────────────────────────────────
+# =============================================================================
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def backoff(attempts):
+    """Seconds to wait after the `attempts`-th failed delivery."""
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+class Outbox:
+    """Folder-per-message queue of outgoing report emails."""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.lock_path = os.path.join(self.path, "sender.lock")
+
+    # ── Queue ─────────────────────────────────────────────────────────────
+
+    def enqueue(self, subject, body, recipients, attachments):
+        """Copies the attachments into a new message folder and queues it; returns the folder."""
+        name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        folder = os.path.join(self.path, name)
+        os.makedirs(folder)
+        files = []
+        for path in attachments:
+            shutil.copyfile(path, os.path.join(folder, os.path.basename(path)))
+            files.append(os.path.basename(path))
+        _write_json(os.path.join(folder, MESSAGE_FILE), {
+            "subject": subject, "body": body, "recipients": list(recipients), "attachments": files,
+            "queued": time.time(), "attempts": 0, "next_attempt": 0, "last_error": None,
+        })
+        return folder
+
+    def pending(self):
+        """Queued messages, oldest first, as dicts with their "folder"."""
+        messages = []
+        if not os.path.isdir(self.path):
+            return messages
+        for name in sorted(os.listdir(self.path)):
+            meta = os.path.join(self.path, name, MESSAGE_FILE)
+            if name == "failed" or not os.path.isfile(meta):
+                continue
+            try:
+                with open(meta, "r", encoding="utf-8") as f:
+                    message = json.load(f)
+            except Exception:
+                continue
+            message["folder"] = os.path.join(self.path, name)
+            messages.append(message)
+        return messages
+
+    def due(self, now=None):
+        now = time.time() if now is None else now
+        return [m for m in self.pending() if m["next_attempt"] <= now]
+
+    def attachment_paths(self, message):
+        return [os.path.join(message["folder"], f) for f in message["attachments"]]
+
+    def sent(self, message):
+        shutil.rmtree(message["folder"], ignore_errors=True)
+
+    def retry(self, message, error):
+        """Records a failed delivery; returns False once the message is given up and moved to failed/."""
+        message["attempts"] += 1
+        message["last_error"] = str(error)
+        if message["attempts"] >= MAX_ATTEMPTS:
+            self.fail(message, error)
+            return False
+        message["next_attempt"] = time.time() + backoff(message["attempts"])
+        self._save(message)
+        return True
+
+    def fail(self, message, error):
+        message["last_error"] = str(error)
+        self._save(message)
+        failed = os.path.join(self.path, "failed")
+        os.makedirs(failed, exist_ok=True)
+        shutil.move(message["folder"], os.path.join(failed, os.path.basename(message["folder"])))
+
+    def _save(self, message):
+        _write_json(os.path.join(message["folder"], MESSAGE_FILE),
+                    {k: v for k, v in message.items() if k != "folder"})
+
+    # ── Sender lock ───────────────────────────────────────────────────────
+
+    def sender_running(self):
+        try:
+            return time.time() - os.path.getmtime(self.lock_path) < LOCK_STALE_SECS
+        except OSError:
+            return False
+
+    def _owner(self):
+        try:
+            with open(self.lock_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return None
+
+    def holds_lock(self):
+        return self._owner() == os.getpid()
+
+    def acquire(self):
+        """Takes the sender lock (or a stale one); False when another sender holds it."""
+        os.makedirs(self.path, exist_ok=True)
+        try:
+            fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if self.sender_running():
+                return False
+            # Its sender died or hung: replace the lock atomically, then check no other taker won
+            tmp = f"{self.lock_path}.{os.getpid()}"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(str(os.getpid()))
+            os.replace(tmp, self.lock_path)
+            time.sleep(TAKEOVER_SETTLE)
+            return self.holds_lock()
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return True
+
+    def touch(self):
+        """Marks the lock as alive; False when this process no longer holds it."""
+        if not self.holds_lock():
+            return False
+        os.utime(self.lock_path)
+        return True
+
+    def heartbeat(self):
+        """Touches the lock every HEARTBEAT_SECS from a daemon thread; set the returned event to stop."""
+        stop = threading.Event()
+
+        def _beat():
+            while not stop.wait(HEARTBEAT_SECS):
+                if not self.touch():
+                    return
+        threading.Thread(target=_beat, name="outbox-heartbeat", daemon=True).start()
+        return stop
+
+    def release(self):
+        if not self.holds_lock():
+            return  # taken over — the lock belongs to another sender now
+        try:
+            os.remove(self.lock_path)
+        except OSError:
+            pass
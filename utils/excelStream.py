@@ -0,0 +1,151 @@
+"""
+Streaming Workbook
+──────────────────
+Writes report workbooks through openpyxl's write-only mode: every row is
+serialised into the sheet's XML as it is appended, so memory stays flat no
+matter how many shows the Show Wise sheet holds (a normal Workbook keeps a
+cell object per value until save). Sheets are written one after another
+and rows may come from any iterable — a generator over the show store or
+the spill directory is never materialised.
+
+A sheet written with split=True continues on "<title> (2)", "<title> (3)",
+... once it reaches max_sheet_rows; any sheet continues that way at Excel's
+row limit rather than producing a file Excel refuses to open. With
+side_file="csv" or "parquet" the same rows are also written to
+<workbook>_<title>.csv / .parquet in the same pass, for runs too large to
+open comfortably in Excel. Parquet side files need pyarrow.
+
+Usage:
+    from utils.excelStream import StreamingWorkbook
+
+    book = StreamingWorkbook("reports/Movie_07MayStatesReport.xlsx", max_sheet_rows=250_000, side_file="csv")
+    book.sheet("State Wise", ["State", "Shows"], state_rows)
+    book.sheet("Show Wise", SHOW_HEADER, show_rows, split=True, side_file=True, types=SHOW_TYPES)
+    book.save()
+"""
+
+import csv
+import os
+import re
+
+from openpyxl import Workbook
+
+
+# =============================================================================
+# ── CONFIGURATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+EXCEL_MAX_ROWS     = 1_048_576     # per sheet, header included
+PARQUET_BATCH_ROWS = 50_000        # rows per Parquet row group
+
+
+# =============================================================================
+# ── SIDE FILES ────────────────────────────────────────────────────────────────
+# =============================================================================
+
+class _CsvSide:
+    def __init__(self, path, header, types):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(header)
+
+    def append(self, row):
+        self._writer.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetSide:
+    """Buffers PARQUET_BATCH_ROWS rows at a time into one row group of a fixed schema."""
+
+    def __init__(self, path, header, types):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([(name, getattr(pa, t or "string")()) for name, t in
+                                  zip(header, types or [None] * len(header))])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._rows = []
+
+    def append(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        pa, columns = self._pa, list(zip(*self._rows))
+        arrays = []
+        for field, values in zip(self._schema, columns):
+            if pa.types.is_string(field.type):
+                values = [None if v is None else str(v) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+        self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+SIDE_FILES = {"csv": _CsvSide, "parquet": _ParquetSide}
+
+
+# =============================================================================
+# ── WORKBOOK ──────────────────────────────────────────────────────────────────
+# =============================================================================
+
+class StreamingWorkbook:
+    """A write-only workbook written sheet by sheet, with optional sheet splitting and side files."""
+
+    def __init__(self, path, max_sheet_rows=None, side_file=None):
+        if side_file is not None and side_file not in SIDE_FILES:
+            raise ValueError(f"side_file must be one of {sorted(SIDE_FILES)}, got {side_file!r}")
+        self.path = path
+        self.max_sheet_rows = min(max_sheet_rows or EXCEL_MAX_ROWS - 1, EXCEL_MAX_ROWS - 1)
+        self.side_file = side_file
+        self.side_paths = []
+        self._wb = Workbook(write_only=True)
+
+    def _side_path(self, title):
+        slug = re.sub(r"[^0-9A-Za-z]+", "_", title).strip("_")
+        return f"{os.path.splitext(self.path)[0]}_{slug}.{self.side_file}"
+
+    def sheet(self, title, header, rows, split=False, side_file=False, types=None):
+        """
+        Appends a sheet and streams `rows` into it; returns the number of rows.
+        `types` (pyarrow type names per column, e.g. "int64", "float64") fixes
+        the Parquet side-file schema — columns without one are stored as text.
+        """
+        side = None
+        if side_file and self.side_file:
+            path = self._side_path(title)
+            side = SIDE_FILES[self.side_file](path, header, types)
+            self.side_paths.append(path)
+
+        ws = self._wb.create_sheet(title=title)
+        ws.append(header)
+        limit = self.max_sheet_rows if split else EXCEL_MAX_ROWS - 1
+        count, part, in_sheet = 0, 1, 0
+        try:
+            for row in rows:
+                if in_sheet >= limit:
+                    part += 1
+                    ws = self._wb.create_sheet(title=f"{title} ({part})")
+                    ws.append(header)
+                    in_sheet = 0
+                ws.append(row)
+                if side is not None:
+                    side.append(row)
+                count += 1
+                in_sheet += 1
+        finally:
+            if side is not None:
+                side.close()
+        return count
+
+    def save(self):
+        self._wb.save(self.path)
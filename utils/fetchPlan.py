@@ -0,0 +1,92 @@
+"""
+Cross-Platform Fetch Plan
+─────────────────────────
+Pairs BMS shows with District sessions at the same physical venue and time
+before any seat layout is fetched, so each paired show is fetched once —
+from District (plain HTTP) instead of through a BMS browser XHR.
+
+Venues are paired through utils/venue_mapping.json (BMS VenueCode → District
+cinema_id). A BMS show is only skipped when the pairing is unambiguous:
+
+    • its venue is mapped to a District cinema,
+    • that cinema lists exactly one session at the same IST show time,
+    • the District session has a cinema id (so its seat layout can be fetched),
+    • no other BMS show has already claimed that session.
+
+Anything else still goes through BMS and is matched by merge_data as before.
+
+Usage:
+    from utils.fetchPlan import FetchPlan
+
+    plan = FetchPlan(venue_map)
+    plan.add_district_session(cinema_id, "2026-05-07 19:30", district_sid)
+    if plan.claim(venue_code, "2026-05-07 19:30", bms_sid):
+        ...skip the BMS seat layout...
+    plan.bms_sid_for(district_sid)
+"""
+
+import threading
+from collections import defaultdict
+
+
+class FetchPlan:
+    """Thread-safe pairing of BMS shows with District sessions."""
+
+    def __init__(self, venue_map):
+        self.venue_map = venue_map                 # BMS VenueCode -> District cinema_id
+        self._slots    = defaultdict(set)          # (cinema_id, normalized_time) -> {district sid}
+        self._pairs    = {}                        # district sid -> bms sid
+        self._released = set()                     # district sids withdrawn (city deferred)
+        self._lock     = threading.Lock()
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def add_district_session(self, cinema_id, normalized_time, sid):
+        """Registers a District session whose seat layout will be fetched."""
+        if not cinema_id or not sid:
+            return
+        with self._lock:
+            self._slots[(str(cinema_id), normalized_time)].add(str(sid))
+
+    def claim(self, venue_code, normalized_time, bms_sid):
+        """
+        Pairs a BMS show with its District session if the pairing is unambiguous.
+
+        Returns True when the BMS seat layout does not need to be fetched.
+        """
+        cinema_id = self.venue_map.get(venue_code)
+        if cinema_id is None:
+            return False
+        with self._lock:
+            sids = self._slots.get((str(cinema_id), normalized_time))
+            if not sids or len(sids) != 1:
+                return False
+            dist_sid = next(iter(sids))
+            if dist_sid in self._pairs or dist_sid in self._released:
+                return False
+            self._pairs[dist_sid] = str(bms_sid)
+        return True
+
+    def release(self, district_sids):
+        """
+        Withdraws District sessions that won't be fetched after all (their city
+        is deferred), so no BMS show is paired with them. Returns False, and
+        withdraws nothing, when one is already paired — its BMS copy was
+        skipped, so the District city has to run.
+        """
+        sids = {str(s) for s in district_sids}
+        with self._lock:
+            if not sids.isdisjoint(self._pairs):
+                return False
+            self._released |= sids
+        return True
+
+    def bms_sid_for(self, district_sid):
+        """Returns the BMS session paired with a District session, or None."""
+        return self._pairs.get(str(district_sid))
+
+    def claimed_bms_sids(self):
+        """BMS sessions paired so far — their District copies stand in for them."""
+        with self._lock:
+            return set(self._pairs.values())
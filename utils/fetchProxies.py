@@ -7,6 +7,12 @@ both BMS and District endpoints, and saves the working ones to a JSON file.
 Run daily/weekly:  python utils/fetchProxies.py
 
 Output:  utils/working_proxies.json
+
+While testing, each result is appended as one line to
+utils/proxy_results.jsonl instead of rewriting the whole JSON per proxy; the
+log is folded into working_proxies.json at the end of the run. An
+interrupted run replays the log on the next start, so it resumes without
+retesting anything.
 """
 
 import json
@@ -25,6 +31,7 @@ PROXY_TEST_TIMEOUT   = 10      # seconds per proxy test
 MAX_TEST_WORKERS     = 50      # parallel proxy testers
 MAX_ACCEPTABLE_MS    = 5000    # discard proxies slower than this (ms)
 OUTPUT_PATH          = os.path.join(os.path.dirname(os.path.abspath(__file__)), "working_proxies.json")
+RESULTS_LOG_PATH     = os.path.join(os.path.dirname(os.path.abspath(__file__)), "proxy_results.jsonl")
 
 # BMS test: lightweight POST that returns a small JSON (invalid SID = fast error, proves connectivity)
 BMS_TEST_URL     = "https://services-in.bookmyshow.com/doTrans.aspx"
@@ -220,60 +227,86 @@ def test_single_proxy(proxy_str):
     return None
 
 
-_file_lock = threading.Lock()
+class ProxyResults:
+    """Tested and working proxies: the compacted output JSON plus an append-only log of tests since.
 
+    record() appends one line per tested proxy (O(1), one short lock), and
+    the resume-skip check is a set lookup; compact() writes the output JSON
+    once and drops the log.
+    """
 
-def _read_output_file():
+    def __init__(self, output_path=OUTPUT_PATH, log_path=RESULTS_LOG_PATH):
+        self.output_path = output_path
+        self.log_path    = log_path
+        self.tested      = set()
+        self.working     = {}      # proxy -> result dict
+        self._lock       = threading.Lock()
+        self._log        = None
+
+        data = _read_output_file(output_path)
+        self.tested.update(data.get("tested", []))
+        for p in data.get("proxies", []):
+            self.working[p["proxy"]] = p
+
+        if os.path.exists(log_path):
+            with open(log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # line cut short by an interrupted run
+                    self.tested.add(entry["proxy"])
+                    if entry.get("result"):
+                        self.working[entry["proxy"]] = entry["result"]
+
+    def __contains__(self, proxy_str):
+        return proxy_str in self.tested
+
+    def record(self, proxy_str, result=None):
+        """Mark a proxy as tested and optionally save it as working (thread-safe)."""
+        line = json.dumps({"proxy": proxy_str, "result": result}, ensure_ascii=False) + "\n"
+        with self._lock:
+            if proxy_str in self.tested:
+                return  # already recorded
+            self.tested.add(proxy_str)
+            if result:
+                self.working[proxy_str] = result
+            if self._log is None:
+                self._log = open(self.log_path, "a", encoding="utf-8")
+            self._log.write(line)
+            self._log.flush()
+
+    def compact(self, working=None):
+        """Write the output JSON (working proxies sorted by speed + tested list) and drop the log."""
+        with self._lock:
+            if working is None:
+                working = sorted(self.working.values(), key=lambda x: x["avg_ms"])
+            save_results(working, sorted(self.tested), self.output_path)
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+
+
+def _read_output_file(path=OUTPUT_PATH):
     """Read the output JSON. Returns dict with proxies list and tested set."""
-    if os.path.exists(OUTPUT_PATH):
+    if os.path.exists(path):
         try:
-            with open(OUTPUT_PATH, "r", encoding="utf-8") as f:
+            with open(path, "r", encoding="utf-8") as f:
                 return json.load(f)
         except (json.JSONDecodeError, Exception):
             pass
     return {"generated_at": "", "total_working": 0, "total_tested": 0, "tested": [], "proxies": []}
 
 
-def _write_output_file(data):
-    """Write data dict to the output JSON."""
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-
-def _save_proxy_result(proxy_str, result=None):
-    """Mark a proxy as tested and optionally save it as working (thread-safe)."""
-    with _file_lock:
-        data = _read_output_file()
-        tested_set = set(data.get("tested", []))
-
-        if proxy_str in tested_set:
-            return  # already recorded
-
-        tested_set.add(proxy_str)
-        data["tested"] = list(tested_set)
-        data["total_tested"] = len(tested_set)
-
-        if result:
-            existing = {p["proxy"] for p in data["proxies"]}
-            if result["proxy"] not in existing:
-                data["proxies"].append(result)
-                data["total_working"] = len(data["proxies"])
-
-        data["generated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        _write_output_file(data)
-
-
-def test_all_proxies(proxy_set):
+def test_all_proxies(proxy_set, results=None):
     """Test all proxies in parallel and return the working ones."""
     total_before_skip = len(proxy_set)
 
-    # Load already-tested proxies from previous run to skip them
-    already_tested = set()
-    if os.path.exists(OUTPUT_PATH):
-        data = _read_output_file()
-        already_tested = set(data.get("tested", []))
-
-    to_test = proxy_set - already_tested
+    # Skip proxies already tested by a previous (possibly interrupted) run
+    results = results if results is not None else ProxyResults()
+    to_test = {p for p in proxy_set if p not in results}
     skipped = total_before_skip - len(to_test)
 
     if skipped > 0:
@@ -283,8 +316,7 @@ def test_all_proxies(proxy_set):
     if total == 0:
         print("\n✅ All proxies already tested. Nothing to do.")
         # Return previously found working proxies
-        data = _read_output_file()
-        return data.get("proxies", [])
+        return sorted(results.working.values(), key=lambda x: x["avg_ms"])
 
     print(f"\n🔍 Testing {total} proxies ({MAX_TEST_WORKERS} parallel workers, {PROXY_TEST_TIMEOUT}s timeout)...\n")
 
@@ -293,15 +325,13 @@ def test_all_proxies(proxy_set):
     start     = time.monotonic()
 
     # Pre-load working proxies from a partial previous run
-    if os.path.exists(OUTPUT_PATH):
-        data = _read_output_file()
-        working = list(data.get("proxies", []))
-        if working:
-            print(f"   📂 Carrying forward {len(working)} working proxies from previous run")
+    working = list(results.working.values())
+    if working:
+        print(f"   📂 Carrying forward {len(working)} working proxies from previous run")
 
     def _test(proxy_str):
         result = test_single_proxy(proxy_str)
-        _save_proxy_result(proxy_str, result)  # mark tested + save if working
+        results.record(proxy_str, result)  # mark tested + save if working
         completed[0] += 1
         c = completed[0]
         if c % 200 == 0 or c == total:
@@ -333,7 +363,7 @@ def test_all_proxies(proxy_set):
 
 # ── OUTPUT ───────────────────────────────────────────────────────────────────
 
-def save_results(working, tested_list=None):
+def save_results(working, tested_list=None, path=OUTPUT_PATH):
     """Final save — re-sort by speed, preserve tested list."""
     output = {
         "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -342,9 +372,11 @@ def save_results(working, tested_list=None):
         "tested": tested_list or [],
         "proxies": working,  # already sorted by avg_ms
     }
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(output, f, indent=2, ensure_ascii=False)
-    print(f"\n💾 Saved {len(working)} working proxies (sorted by speed) to: {OUTPUT_PATH}")
+    os.replace(tmp, path)
+    print(f"\n💾 Saved {len(working)} working proxies (sorted by speed) to: {path}")
 
 
 def load_existing_proxies():
@@ -383,13 +415,12 @@ if __name__ == "__main__":
         sys.exit(1)
 
     # 3. Test all proxies (resumes from last offset if interrupted)
-    working = test_all_proxies(all_proxies)
+    results = ProxyResults()
+    working = test_all_proxies(all_proxies, results)
 
-    # 4. Final save — re-sort by speed, keep tested list
+    # 4. Final save — fold the results log into the JSON, re-sorted by speed
+    results.compact(working)
     if working:
-        data = _read_output_file()
-        tested_list = data.get("tested", [])
-        save_results(working, tested_list)
         both_count  = sum(1 for p in working if p["works_with"] == "both")
         bms_only    = sum(1 for p in working if p["works_with"] == "bms_only")
         dist_only   = sum(1 for p in working if p["works_with"] == "district_only")
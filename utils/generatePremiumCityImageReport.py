@@ -4,9 +4,13 @@ Same UI/styling as the States report — city-level data only.
 Output: 1280px wide
 """
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from datetime import datetime
-import os
+
+from utils.imageEncode import ImageEncoder
+from utils.imageLayout import MeasureDraw, text_bbox
+from utils.renderAssets import apply_watermark as _apply_watermark, font, vertical_gradient
+from utils.reportAggregates import aggregate_shows
 
 # ── CANVAS WIDTH ─────────────────────────────────────────────────────────────
 W   = 1280
@@ -18,6 +22,14 @@ WATERMARK_TEXT    = "CINEPULSEBO"
 WATERMARK_OPACITY = 90
 WATERMARK_ANGLE   = 35
 
+# ── ENCODING (callers may pass their own ImageEncoder) ───────────────────────
+PNG_ENCODER = ImageEncoder("png")
+
+# ── HERO GRADIENT ────────────────────────────────────────────────────────────
+HERO_GRADIENT_H = 280
+HERO_TOP        = (11, 10, 15)
+HERO_BOTTOM     = (16, 12, 33)
+
 # ── COLOURS ──────────────────────────────────────────────────────────────────
 BG       = (11,  10,  15)
 SURFACE  = (20,  20,  30)
@@ -34,61 +46,8 @@ YELLOW   = (240, 200,   0)
 RED_OCC  = (220,  40,  60)
 
 # ── FONTS ────────────────────────────────────────────────────────────────────
-import sys, platform
-
-def _find_font(bold=False):
-    candidates_bold = [
-        r"C:\Windows\Fonts\NotoSans-Bold.ttf",
-        r"C:\Windows\Fonts\NotoSans_Condensed-Bold.ttf",
-        r"C:\Windows\Fonts\seguisb.ttf",
-        r"C:\Windows\Fonts\segoeui.ttf",
-        r"C:\Windows\Fonts\Arial.ttf",
-        "/Library/Fonts/NotoSans-Bold.ttf",
-        "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
-        "/System/Library/Fonts/Helvetica.ttc",
-        "/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf",
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
-        "/usr/share/fonts/truetype/freefont/FreeSansBold.ttf",
-        "/usr/share/fonts/truetype/google-fonts/Poppins-Bold.ttf",
-    ]
-    candidates_reg = [
-        r"C:\Windows\Fonts\NotoSans-Regular.ttf",
-        r"C:\Windows\Fonts\NotoSans_Condensed-Regular.ttf",
-        r"C:\Windows\Fonts\segoeui.ttf",
-        r"C:\Windows\Fonts\Arial.ttf",
-        "/Library/Fonts/NotoSans-Regular.ttf",
-        "/System/Library/Fonts/Supplemental/Arial.ttf",
-        "/System/Library/Fonts/Helvetica.ttc",
-        "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-        "/usr/share/fonts/truetype/freefont/FreeSans.ttf",
-        "/usr/share/fonts/truetype/google-fonts/Poppins-Regular.ttf",
-    ]
-    candidates = candidates_bold if bold else candidates_reg
-    for path in candidates:
-        if os.path.exists(path):
-            return path
-    try:
-        import matplotlib.font_manager as fm
-        fp = fm.findfont(fm.FontProperties(family="DejaVu Sans", weight="bold" if bold else "regular"))
-        if fp and os.path.exists(fp):
-            return fp
-    except Exception:
-        pass
-    raise FileNotFoundError(
-        "Could not find a suitable font with ₹ support.\n"
-        "Please install Noto Sans: https://fonts.google.com/noto/specimen/Noto+Sans\n"
-        "and place NotoSans-Regular.ttf / NotoSans-Bold.ttf in C:\\Windows\\Fonts\\"
-    )
-
-_BOLD_PATH = _find_font(bold=True)
-_REG_PATH  = _find_font(bold=False)
-
 def _f(size, bold=False):
-    path = _BOLD_PATH if bold else _REG_PATH
-    return ImageFont.truetype(path, size)
+    return font(size, bold)
 
 F_EYEBROW  = _f(25)
 F_HERO     = _f(85, bold=True)
@@ -112,11 +71,11 @@ F_FOOTER   = _f(25)
 
 # ── HELPERS ───────────────────────────────────────────────────────────────────
 def tw(draw, text, font, stroke=0):
-    bb = draw.textbbox((0, 0), text, font=font, stroke_width=stroke)
+    bb = text_bbox(text, font, stroke)
     return bb[2] - bb[0]
 
 def th_font(draw, font, stroke=0):
-    bb = draw.textbbox((0, 0), "Ag", font=font, stroke_width=stroke)
+    bb = text_bbox("Ag", font, stroke)
     return bb[3] - bb[1]
 
 def draw_text_c(draw, cx, y, text, font, color, stroke=0):
@@ -145,47 +104,20 @@ def occ_col(o):
     return RED_OCC
 
 # ── AGGREGATE ─────────────────────────────────────────────────────────────────
-def aggregate(all_results):
-    city_stats = {}
-    for r in all_results:
-        city  = r.get("city", "Unknown")
-        venue = r["venue"]
-        g = r["booked_gross"]; t = r["booked_tickets"]; s = r["total_tickets"]
-
-        if city not in city_stats:
-            city_stats[city] = {"city": city, "gross":0,"tickets":0,"seats":0,"shows":0,"venues":set()}
-        cs = city_stats[city]
-        cs["gross"]+=g; cs["tickets"]+=t; cs["seats"]+=s; cs["shows"]+=1; cs["venues"].add(venue)
-
+def aggregate(all_results, agg=None):
+    """City rows by gross, from aggregate_shows() output (computed here if not given)."""
+    agg = agg or aggregate_shows(all_results)
     out = []
-    for v in city_stats.values():
-        occ = round((v["tickets"]/v["seats"])*100, 1) if v["seats"] else 0
-        row = {k:(len(vv) if isinstance(vv, set) else vv) for k, vv in v.items()}
-        row["occupancy"] = occ
+    for v in agg["cities"]:
+        row = {k: v[k] for k in ("city", "gross", "tickets", "seats", "shows", "venues")}
+        row["occupancy"] = round((v["tickets"]/v["seats"])*100, 1) if v["seats"] else 0
         out.append(row)
     out.sort(key=lambda x: x["gross"], reverse=True)
     return out
 
 # ── WATERMARK ─────────────────────────────────────────────────────────────────
 def apply_watermark(img):
-    wfont = _f(80, bold=True)
-    tmp = Image.new("RGBA", (1,1))
-    td  = ImageDraw.Draw(tmp)
-    bb  = td.textbbox((0,0), WATERMARK_TEXT, font=wfont)
-    tw_, th_ = bb[2]-bb[0]+4, bb[3]-bb[1]+4
-    tile_w, tile_h = tw_+120, th_+100
-    tile = Image.new("RGBA", (tile_w, tile_h), (0,0,0,0))
-    td2  = ImageDraw.Draw(tile)
-    td2.text(((tile_w-tw_)//2, (tile_h-th_)//2), WATERMARK_TEXT,
-             font=wfont, fill=(255,255,255, WATERMARK_OPACITY))
-    rotated = tile.rotate(WATERMARK_ANGLE, expand=True)
-    rw, rh  = rotated.size
-    W_, H_  = img.size
-    overlay = Image.new("RGBA", (W_, H_), (0,0,0,0))
-    for yy in range(-rh, H_+rh, rh):
-        for xx in range(-rw, W_+rw, rw):
-            overlay.paste(rotated, (xx, yy), rotated)
-    return Image.alpha_composite(img.convert("RGBA"), overlay).convert("RGB")
+    return _apply_watermark(img, WATERMARK_TEXT, WATERMARK_OPACITY, WATERMARK_ANGLE, _f(80, bold=True))
 
 # ── TABLE ─────────────────────────────────────────────────────────────────────
 def draw_table(draw, y, headers, rows, col_widths, alignments, col_x_start):
@@ -272,27 +204,30 @@ def draw_table(draw, y, headers, rows, col_widths, alignments, col_x_start):
 # ── MAIN GENERATOR ────────────────────────────────────────────────────────────
 def generate_premium_city_image_report(all_results, output_path,
                                         movie_name="Movie Collection",
-                                        show_date=None):
+                                        show_date=None, agg=None, encoder=None):
     if show_date is None:
         show_date = datetime.now().strftime("%d %b %Y")
 
     TOP_ROWS  = 20   # show more cities since no state table
-    city_list = aggregate(all_results)
+    agg       = agg or aggregate_shows(all_results)
+    city_list = aggregate(all_results, agg)
+    totals, bms, dist = agg["totals"], agg["sources"]["bms"], agg["sources"]["district"]
 
-    total_gross   = sum(r["booked_gross"]   for r in all_results)
-    total_tickets = sum(r["booked_tickets"] for r in all_results)
-    total_seats   = sum(r["total_tickets"]  for r in all_results)
+    total_gross   = totals["gross"]
+    total_tickets = totals["tickets"]
+    total_seats   = totals["seats"]
     total_occ     = round((total_tickets/total_seats)*100, 1) if total_seats else 0
     num_cities    = len(city_list)
-    num_venues    = len(set(r["venue"] for r in all_results))
-    num_shows     = len(all_results)
+    num_venues    = totals["venues"]
+    num_shows     = totals["shows"]
+    num_final     = totals["final_shows"]
 
-    src_gross_bms    = sum(r["booked_gross"]   for r in all_results if r.get("source")=="bms")
-    src_gross_dist   = sum(r["booked_gross"]   for r in all_results if r.get("source")=="district")
-    src_tickets_bms  = sum(r["booked_tickets"] for r in all_results if r.get("source")=="bms")
-    src_tickets_dist = sum(r["booked_tickets"] for r in all_results if r.get("source")=="district")
-    src_shows_bms    = sum(1 for r in all_results if r.get("source")=="bms")
-    src_shows_dist   = sum(1 for r in all_results if r.get("source")=="district")
+    src_gross_bms    = bms["gross"]
+    src_gross_dist   = dist["gross"]
+    src_tickets_bms  = bms["tickets"]
+    src_tickets_dist = dist["tickets"]
+    src_shows_bms    = bms["shows"]
+    src_shows_dist   = dist["shows"]
 
     # ── TABLE COLUMN DEFINITIONS ─────────────────────────────────────────────
     TW     = W - PAD * 2   # 1280 - 112 = 1168px
@@ -302,16 +237,12 @@ def generate_premium_city_image_report(all_results, output_path,
     col_headers = ["#", "CITY",  "VENS", "SHOWS", "TICKETS", "OCCUPANCY", "GROSS"]
     col_aligns  = ["C", "L",    "R",    "R",      "R",       "L",          "R"]
 
-    def render(canvas_h):
-        img  = Image.new("RGB", (W, canvas_h), BG)
-        draw = ImageDraw.Draw(img)
+    def render(draw):
+        """Lays the report out on `draw` (a MeasureDraw when only measuring) and returns its height."""
         y    = 0
 
         # ── HERO ─────────────────────────────────────────────────────────────
-        hero_h_approx = 280
-        for gy in range(hero_h_approx):
-            t = gy / hero_h_approx
-            draw.line([(0, gy), (W, gy)], fill=(int(11+t*5), int(10+t*2), int(15+t*18)))
+        # (the hero gradient is pasted onto the canvas before drawing)
 
         draw.text((PAD, 18), "CITY-WISE BOX OFFICE REPORT", font=F_EYEBROW, fill=ACCENT)
 
@@ -338,6 +269,8 @@ def generate_premium_city_image_report(all_results, output_path,
         PILL_H = 40
         PILL_R = 7
         pill_items = [show_date, f"{num_cities} Cities", f"{num_venues} Theatres", f"{num_shows} Shows"]
+        if num_final:
+            pill_items.append(f"{num_final} Final")
         mx = PAD
         for label in pill_items:
             pw = tw(draw, label, F_PILL_LBL) + 28
@@ -441,15 +374,15 @@ def generate_premium_city_image_report(all_results, output_path,
         draw_text_c(draw, W//2, y+50, f2, F_FOOTER, MUTED)
         y += FOOT_H
 
-        return img, y
+        return y
 
-    _, est_h = render(9000)
-    img, _   = render(est_h + 10)
-    img = img.crop((0, 0, W, est_h + 10))
+    est_h = render(MeasureDraw())
+    img   = Image.new("RGB", (W, est_h + 10), BG)
+    img.paste(vertical_gradient(W, HERO_GRADIENT_H, HERO_TOP, HERO_BOTTOM))
+    render(ImageDraw.Draw(img))
     if WATERMARK_ENABLED:
         img = apply_watermark(img)
-    os.makedirs(os.path.dirname(output_path) if os.path.dirname(output_path) else ".", exist_ok=True)
-    img.save(output_path, "PNG", optimize=True)
+    output_path = (encoder or PNG_ENCODER).save(img, output_path)
     print(f"✅ Saved: {output_path}  ({W}×{est_h+10}px)")
     return output_path
 
@@ -0,0 +1,239 @@
+"""
+HTML Report Building Blocks
+───────────────────────────
+Shared pieces of the state and city HTML reports.
+
+    • PageTemplate — the page markup is parsed once, at import, into its
+      literal chunks and {{ name }} fields; render() only joins the chunks
+      with the values. CSS and JS braces need no escaping, unlike the
+      f-string the pages used to be.
+    • data tables — ranking tables are no longer emitted as one static <tr>
+      per row (string-concatenated, then hidden past row 50 with CSS).
+      The rows are embedded once as compact JSON — one array per row, gzip +
+      base64 when the payload is large — and the browser renders them:
+      scrolling tables draw only the rows in view plus a margin, every
+      header sorts its column, and tables with a filter box narrow to the
+      rows whose names match.
+
+Column kinds: "rank", "strong" and "name" (text), "num" (plain number),
+"int" (grouped thousands), "ratio" ([sold, total]), "occ" (occupancy % with
+bar) and "gross" (₹ Cr / L / K). Text columns are what the filter matches.
+
+Usage:
+    from utils.htmlReport import PageTemplate, data_table, data_script
+
+    PAGE = PageTemplate("<h1>{{ title }}</h1>{{ venues }}{{ script }}")
+    columns = [("#", "rank"), ("Theatre", "name"), ("Gross", "gross")]
+    PAGE.render(title="Report",
+                venues=data_table("venueTable", columns, scroll=True, filter_label="theatres"),
+                script=data_script({"venueTable": (columns, [[1, "AMB Cinemas", 1250000]])}))
+"""
+
+import base64
+import gzip
+import json
+import re
+
+
+# =============================================================================
+# ── CONFIGURATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+GZIP_OVER_BYTES = 200_000     # embedded table JSON larger than this is gzipped (browser DecompressionStream)
+SCROLL_HEIGHT   = 720         # px; scrolling tables show this much and render rows as they come into view
+
+NUMERIC_KINDS = {"num", "int", "ratio", "occ", "gross"}
+SORT_ASC      = {"rank", "strong", "name"}   # first click sorts these ascending, numbers descending
+
+
+# =============================================================================
+# ── TEMPLATE ──────────────────────────────────────────────────────────────────
+# =============================================================================
+
+_FIELD = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class PageTemplate:
+    """Markup with {{ name }} fields, split once so rendering is a single join."""
+
+    def __init__(self, text):
+        parts = _FIELD.split(text)
+        self._chunks = parts[0::2]
+        self.fields = parts[1::2]
+
+    def render(self, **values):
+        out = [self._chunks[0]]
+        for name, chunk in zip(self.fields, self._chunks[1:]):
+            out.append(str(values[name]))
+            out.append(chunk)
+        return "".join(out)
+
+
+# =============================================================================
+# ── DATA TABLES ───────────────────────────────────────────────────────────────
+# =============================================================================
+
+TABLE_CSS = f"""
+        .table-tools {{ display: flex; align-items: center; gap: 12px; margin-bottom: 12px; }}
+        .table-filter {{
+            flex: 0 1 320px;
+            padding: 8px 12px;
+            background: var(--surface);
+            color: var(--text);
+            border: 1px solid var(--border);
+            border-radius: 6px;
+            font: inherit;
+            font-size: 13px;
+        }}
+        .table-filter:focus {{ outline: none; border-color: var(--accent); }}
+        .table-count {{ font-size: 12px; color: var(--muted); }}
+        .table-wrap.scroll {{ max-height: {SCROLL_HEIGHT}px; overflow-y: auto; }}
+        .table-wrap.scroll thead th {{ position: sticky; top: 0; z-index: 1; }}
+        thead th.num {{ text-align: right; }}
+        thead th.sortable {{ cursor: pointer; user-select: none; }}
+        thead th.sortable:hover {{ color: var(--text); }}
+        thead th.asc::after {{ content: " ▲"; color: var(--accent); }}
+        thead th.desc::after {{ content: " ▼"; color: var(--accent); }}
+        tbody tr.spacer {{ border: 0; }}
+        tbody tr.spacer:hover {{ background: none; }}
+        .table-wrap.scroll td {{ white-space: nowrap; }}"""
+
+TABLE_JS = """
+(() => {
+    const OVERSCAN = 10;
+    const esc = s => String(s).replace(/[&<>"]/g, c => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[c]));
+    const grp = n => Number(n).toLocaleString("en-US");
+    const cur = v => v >= 1e7 ? "₹" + (v / 1e7).toFixed(2) + " Cr" : v >= 1e5 ? "₹" + (v / 1e5).toFixed(2) + " L"
+                   : v >= 1e3 ? "₹" + (v / 1e3).toFixed(1) + " K" : "₹" + v.toFixed(0);
+    const occColor = o => o >= 60 ? "#00c853" : o >= 50 ? "#ff6d00" : o >= 30 ? "#ffd600" : "#ff1744";
+    const CELL = {
+        rank:   v => `<td class="rank">${v}</td>`,
+        strong: v => `<td><strong>${esc(v)}</strong></td>`,
+        name:   v => `<td><div class="theatre-name">${esc(v)}</div></td>`,
+        num:    v => `<td class="num">${v}</td>`,
+        int:    v => `<td class="num">${grp(v)}</td>`,
+        ratio:  v => `<td class="num">${grp(v[0])}/${grp(v[1])}</td>`,
+        occ:    v => { const c = occColor(v); return `<td class="num"><div class="occ-bar-wrap"><div class="occ-bar" ` +
+                       `style="width:${v}%;background:${c}"></div><span style="color:${c}">${v.toFixed(1)}%</span></div></td>`; },
+        gross:  v => `<td class="num gross-cell">${cur(v)}</td>`,
+    };
+    const spacer = h => `<tr class="spacer" style="height:${h}px"></tr>`;
+
+    class DataTable {
+        constructor(id, spec) {
+            this.kinds = spec.columns;
+            this.rows = spec.rows;
+            this.wrap = document.getElementById(id);
+            this.body = this.wrap.querySelector("tbody");
+            this.heads = Array.from(this.wrap.querySelectorAll("thead th"));
+            this.scroll = this.wrap.classList.contains("scroll");
+            this.count = document.querySelector(`[data-count="${id}"]`);
+            this.view = this.rows.map((_, i) => i);
+            this.rowH = 0;
+            const text = this.kinds.map((k, i) => k === "strong" || k === "name" ? i : -1).filter(i => i >= 0);
+            this.text = this.rows.map(r => text.map(i => r[i]).join(" ").toLowerCase());
+            this.heads.forEach((th, col) => th.addEventListener("click", () => this.sortBy(col)));
+            const input = document.querySelector(`[data-filter="${id}"]`);
+            if (input) input.addEventListener("input", () => this.filter(input.value));
+            if (this.scroll) this.wrap.addEventListener("scroll", () => this.schedule(), {passive: true});
+            this.render();
+        }
+        schedule() {
+            if (this.pending) return;
+            this.pending = true;
+            requestAnimationFrame(() => { this.pending = false; this.render(); });
+        }
+        render() {
+            const n = this.view.length;
+            let first = 0, last = n;
+            const rowH = this.rowH || 46;
+            if (this.scroll) {
+                const top = this.wrap.scrollTop, height = Math.max(this.wrap.clientHeight, __HEIGHT__);
+                first = Math.max(0, Math.floor(top / rowH) - OVERSCAN);
+                last = Math.min(n, Math.ceil((top + height) / rowH) + OVERSCAN);
+            }
+            const html = [first ? spacer(first * rowH) : ""];
+            for (let i = first; i < last; i++) {
+                const row = this.rows[this.view[i]];
+                html.push("<tr>" + row.map((v, c) => CELL[this.kinds[c]](v)).join("") + "</tr>");
+            }
+            if (last < n) html.push(spacer((n - last) * rowH));
+            this.body.innerHTML = html.join("");
+            if (this.count) this.count.textContent = n === this.rows.length ? `${n} rows` : `${n} of ${this.rows.length} rows`;
+            if (this.scroll && !this.rowH && last > first) {
+                // Spacer heights assume every row is as tall as the first one drawn
+                this.rowH = this.body.querySelector("tr:not(.spacer)").getBoundingClientRect().height || rowH;
+                if (this.rowH !== rowH) this.render();
+            }
+        }
+        order() {
+            if (this.col === undefined) return;
+            const col = this.col, dir = this.dir, rows = this.rows;
+            const key = this.kinds[col] === "ratio" ? i => rows[i][col][0] : i => rows[i][col];
+            this.view.sort((a, b) => { const x = key(a), y = key(b); return (x < y ? -dir : x > y ? dir : 0) || a - b; });
+        }
+        sortBy(col) {
+            this.dir = this.col === col ? -this.dir : (__ASC__.includes(this.kinds[col]) ? 1 : -1);
+            this.col = col;
+            this.heads.forEach((th, i) => {
+                th.classList.toggle("asc", i === col && this.dir > 0);
+                th.classList.toggle("desc", i === col && this.dir < 0);
+            });
+            this.order();
+            this.wrap.scrollTop = 0;
+            this.render();
+        }
+        filter(query) {
+            const q = query.trim().toLowerCase();
+            this.view = [];
+            this.text.forEach((t, i) => { if (!q || t.includes(q)) this.view.push(i); });
+            this.order();
+            this.wrap.scrollTop = 0;
+            this.render();
+        }
+    }
+
+    const el = document.getElementById("report-data");
+    const load = el.dataset.encoding === "gzip"
+        ? new Response(new Blob([Uint8Array.from(atob(el.textContent), c => c.charCodeAt(0))]).stream()
+              .pipeThrough(new DecompressionStream("gzip"))).json()
+        : Promise.resolve(JSON.parse(el.textContent));
+    load.then(data => { for (const id in data.tables) new DataTable(id, data.tables[id]); });
+})();
+""".replace("__HEIGHT__", str(SCROLL_HEIGHT)).replace("__ASC__", json.dumps(sorted(SORT_ASC)))
+
+
+def data_table(table_id, columns, scroll=False, filter_label=None):
+    """
+    Markup for a table whose rows come from data_script(). With scroll=True
+    the table scrolls within SCROLL_HEIGHT and only renders visible rows;
+    filter_label adds a filter box ("Filter <label>…") and a row count.
+    """
+    heads = "".join(
+        f'<th class="sortable{" num" if kind in NUMERIC_KINDS else ""}">{label}</th>' for label, kind in columns
+    )
+    tools = ""
+    if filter_label:
+        tools = (f'<div class="table-tools"><input type="search" class="table-filter" data-filter="{table_id}" '
+                 f'placeholder="Filter {filter_label}…"><span class="table-count" data-count="{table_id}"></span></div>')
+    return (f'{tools}<div class="table-wrap{" scroll" if scroll else ""}" id="{table_id}">'
+            f'<table><thead><tr>{heads}</tr></thead><tbody></tbody></table></div>')
+
+
+def data_script(tables):
+    """
+    The embedded row data ({table_id: (columns, rows)}) plus the script that
+    renders it; rows are lists in column order. Goes at the end of <body>.
+    """
+    payload = json.dumps(
+        {"tables": {tid: {"columns": [kind for _, kind in columns], "rows": rows}
+                    for tid, (columns, rows) in tables.items()}},
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    if len(payload) > GZIP_OVER_BYTES:
+        data = base64.b64encode(gzip.compress(payload.encode("utf-8"), 6)).decode("ascii")
+        data_tag = f'<script type="application/json" id="report-data" data-encoding="gzip">{data}</script>'
+    else:
+        data = payload.replace("</", "<\\/")
+        data_tag = f'<script type="application/json" id="report-data">{data}</script>'
+    return f"{data_tag}\n<script>{TABLE_JS}</script>"
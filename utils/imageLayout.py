@@ -0,0 +1,52 @@
+"""
+Image Report Layout
+───────────────────
+Measure-then-draw support for the premium PNG generators. Their render
+functions lay a report out top to bottom and only know its height at the
+end, so they used to draw everything on an oversized 1280×9000 canvas just
+to find the height, then draw it all again on a canvas of the right size.
+
+Now the same render function runs twice against different draw targets:
+
+    1. a MeasureDraw, which answers text-metric queries and ignores every
+       drawing call — the layout pass costs positions and metrics, no pixels;
+    2. an ImageDraw on a canvas of exactly the measured height.
+
+Text metrics are cached per (text, font, stroke), so the header labels,
+pills, table cells and the table's truncation loop measure each string
+once per process instead of once per pass and report.
+
+Usage:
+    from utils.imageLayout import MeasureDraw, text_bbox
+
+    height = render(MeasureDraw())              # layout pass
+    img = Image.new("RGB", (W, height), BG)
+    render(ImageDraw.Draw(img))                 # single drawing pass
+"""
+
+from functools import lru_cache
+
+from PIL import Image, ImageDraw
+
+
+# Metrics come from an RGB draw, the mode every report canvas uses
+_METRICS = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+
+@lru_cache(maxsize=16384)
+def text_bbox(text, font, stroke=0):
+    """draw.textbbox((0, 0), text, font, stroke_width=stroke) on an RGB canvas, cached."""
+    return _METRICS.textbbox((0, 0), text, font=font, stroke_width=stroke)
+
+
+class MeasureDraw:
+    """Stands in for ImageDraw during the layout pass: real text metrics, nothing rasterised."""
+
+    def textbbox(self, xy, text, font=None, stroke_width=0, **kwargs):
+        x0, y0, x1, y1 = text_bbox(text, font, stroke_width)
+        return (x0 + xy[0], y0 + xy[1], x1 + xy[0], y1 + xy[1])
+
+    def _skip(self, *args, **kwargs):
+        pass
+
+    text = line = rectangle = rounded_rectangle = ellipse = polygon = _skip
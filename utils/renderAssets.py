@@ -0,0 +1,159 @@
+"""
+Render Assets
+─────────────
+Process-level cache of the costly pieces every image report rebuilt on its
+own: the report fonts, the hero gradient and the watermark overlay. The
+first report of a run prepares them and every later report (aggregate and
+snapshot, states and cities) reuses them.
+
+    • fonts — the font file is located once per weight (probing the
+      platform paths, then matplotlib's font manager) and each
+      (size, weight) is loaded once, shared by both generators;
+    • gradients — a vertical gradient is rendered once per size and colours
+      and pasted onto the canvas instead of drawn one line per pixel row;
+    • watermark — the rotated text tile is rendered once, and the tiled
+      overlay is built once per width and only grown when a taller report
+      needs it; shorter reports use a crop of it (the tiling starts at the
+      top, so the crop is exactly the overlay a shorter canvas would get).
+
+Cached images are shared: callers paste or composite them, never draw on them.
+
+Usage:
+    from utils.renderAssets import font, vertical_gradient, apply_watermark
+
+    F_HERO = font(85, bold=True)
+    img.paste(vertical_gradient(1280, 280, (11, 10, 15), (16, 12, 33)))
+    img = apply_watermark(img, "CINEPULSEBO", opacity=90, angle=35, font=font(80, bold=True))
+"""
+
+import os
+import threading
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+# =============================================================================
+# ── FONTS ─────────────────────────────────────────────────────────────────────
+# =============================================================================
+
+FONT_CANDIDATES = {
+    True: [
+        r"C:\Windows\Fonts\NotoSans-Bold.ttf",
+        r"C:\Windows\Fonts\NotoSans_Condensed-Bold.ttf",
+        r"C:\Windows\Fonts\seguisb.ttf",
+        r"C:\Windows\Fonts\segoeui.ttf",
+        r"C:\Windows\Fonts\Arial.ttf",
+        "/Library/Fonts/NotoSans-Bold.ttf",
+        "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+        "/System/Library/Fonts/Helvetica.ttc",
+        "/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+        "/usr/share/fonts/truetype/freefont/FreeSansBold.ttf",
+        "/usr/share/fonts/truetype/google-fonts/Poppins-Bold.ttf",
+    ],
+    False: [
+        r"C:\Windows\Fonts\NotoSans-Regular.ttf",
+        r"C:\Windows\Fonts\NotoSans_Condensed-Regular.ttf",
+        r"C:\Windows\Fonts\segoeui.ttf",
+        r"C:\Windows\Fonts\Arial.ttf",
+        "/Library/Fonts/NotoSans-Regular.ttf",
+        "/System/Library/Fonts/Supplemental/Arial.ttf",
+        "/System/Library/Fonts/Helvetica.ttc",
+        "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+        "/usr/share/fonts/truetype/freefont/FreeSans.ttf",
+        "/usr/share/fonts/truetype/google-fonts/Poppins-Regular.ttf",
+    ],
+}
+
+
+@lru_cache(maxsize=None)
+def font_path(bold=False):
+    """First available font file with ₹ support for the weight."""
+    for path in FONT_CANDIDATES[bold]:
+        if os.path.exists(path):
+            return path
+    try:
+        import matplotlib.font_manager as fm
+        fp = fm.findfont(fm.FontProperties(family="DejaVu Sans", weight="bold" if bold else "regular"))
+        if fp and os.path.exists(fp):
+            return fp
+    except Exception:
+        pass
+    raise FileNotFoundError(
+        "Could not find a suitable font with ₹ support.\n"
+        "Please install Noto Sans: https://fonts.google.com/noto/specimen/Noto+Sans\n"
+        "and place NotoSans-Regular.ttf / NotoSans-Bold.ttf in C:\\Windows\\Fonts\\"
+    )
+
+
+@lru_cache(maxsize=None)
+def font(size, bold=False):
+    return ImageFont.truetype(font_path(bold), size)
+
+
+# =============================================================================
+# ── GRADIENTS ─────────────────────────────────────────────────────────────────
+# =============================================================================
+
+@lru_cache(maxsize=32)
+def vertical_gradient(width, height, top, bottom):
+    """RGB strip shading from `top` (first row) towards `bottom`, one colour per row."""
+    img = Image.new("RGB", (width, height))
+    draw = ImageDraw.Draw(img)
+    for gy in range(height):
+        t = gy / height
+        draw.line([(0, gy), (width, gy)], fill=tuple(int(a + t*(b - a)) for a, b in zip(top, bottom)))
+    return img
+
+
+# =============================================================================
+# ── WATERMARK ─────────────────────────────────────────────────────────────────
+# =============================================================================
+
+OVERLAY_STEP = 1024      # overlays grow in steps of this many rows
+
+_overlays = {}
+_overlay_lock = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def _watermark_tile(text, opacity, angle, wfont):
+    tmp = Image.new("RGBA", (1,1))
+    td  = ImageDraw.Draw(tmp)
+    bb  = td.textbbox((0,0), text, font=wfont)
+    tw_, th_ = bb[2]-bb[0]+4, bb[3]-bb[1]+4
+    tile_w, tile_h = tw_+120, th_+100
+    tile = Image.new("RGBA", (tile_w, tile_h), (0,0,0,0))
+    td2  = ImageDraw.Draw(tile)
+    td2.text(((tile_w-tw_)//2, (tile_h-th_)//2), text,
+             font=wfont, fill=(255,255,255, opacity))
+    return tile.rotate(angle, expand=True)
+
+
+def _build_overlay(rotated, width, height):
+    rw, rh  = rotated.size
+    overlay = Image.new("RGBA", (width, height), (0,0,0,0))
+    for yy in range(-rh, height+rh, rh):
+        for xx in range(-rw, width+rw, rw):
+            overlay.paste(rotated, (xx, yy), rotated)
+    return overlay
+
+
+def watermark_overlay(width, height, text, opacity, angle, wfont):
+    """The tiled watermark for a width × height canvas (a crop of the cached overlay)."""
+    key = (width, text, opacity, angle, wfont)
+    with _overlay_lock:
+        overlay = _overlays.get(key)
+        if overlay is None or overlay.height < height:
+            rows = -(-height // OVERLAY_STEP) * OVERLAY_STEP
+            overlay = _overlays[key] = _build_overlay(_watermark_tile(text, opacity, angle, wfont), width, rows)
+    return overlay if overlay.height == height else overlay.crop((0, 0, width, height))
+
+
+def apply_watermark(img, text, opacity, angle, font):
+    overlay = watermark_overlay(img.width, img.height, text, opacity, angle, font)
+    return Image.alpha_composite(img.convert("RGBA"), overlay).convert("RGB")
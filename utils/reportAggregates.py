@@ -0,0 +1,88 @@
+"""
+Report Aggregates
+─────────────────
+State / city / venue / theatre / source rollups and run totals of a show
+set, computed once and shared by every report generator. Each generator
+used to walk the records itself (the Excel workbook, the PNG and the HTML
+page each building their own state, city and venue maps plus a separate
+sum() per platform), so a report set cost three full passes per dataset.
+
+Here the records are read once into a DataFrame and grouped once at the
+finest grain (state, city, venue, source); every coarser rollup is then a
+groupby of that small frame, so report time grows with the records only
+once and with the number of venues after that. Records may carry a
+"shows" count (ShowRollup rows), which weights the show totals.
+
+Rows keep the order in which their key first appears in the records;
+generators sort and round occupancy themselves.
+
+Usage:
+    from utils.reportAggregates import aggregate_shows
+
+    agg = aggregate_shows(final_data)
+    agg["states"]      # [{"state", "cities", "venues", "shows", "final_shows", "seats", "tickets",
+                       #   "total_gross", "gross", "district_shows", "bms_shows"}, ...]
+    agg["cities"]      # keyed (state, city), with "venues"
+    agg["venues"]      # keyed (state, city, venue), with "district_shows" / "bms_shows"
+    agg["theatres"]    # keyed (source, state, city, venue)
+    agg["sources"]     # {"bms": {...}, "district": {...}}
+    agg["totals"]      # {"states", "cities", "venues", "shows", "final_shows", "seats", "tickets", ...}
+"""
+
+import pandas as pd
+
+
+# =============================================================================
+# ── CONFIGURATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+SOURCES = ("district", "bms")
+KEYS    = ["state", "city", "venue", "source"]
+SUMS    = ["shows", "final_shows", "seats", "tickets", "total_gross", "gross"]
+EMPTY   = dict.fromkeys(SUMS, 0)
+
+
+# =============================================================================
+# ── AGGREGATION ───────────────────────────────────────────────────────────────
+# =============================================================================
+
+def _row(r):
+    shows = r.get("shows", 1)
+    return (r.get("state", "Unknown"), r.get("city", "Unknown"), r["venue"], r.get("source"),
+            shows, shows if r.get("is_final") else 0,
+            r["total_tickets"], r["booked_tickets"], r["total_gross"], r["booked_gross"])
+
+def _rows(frame):
+    return frame.reset_index().to_dict("records")
+
+def aggregate_shows(records):
+    """Every rollup the report generators draw from, in one pass over `records`."""
+    df = pd.DataFrame.from_records((_row(r) for r in records), columns=KEYS + SUMS)
+    if df.empty:
+        return {"states": [], "cities": [], "venues": [], "theatres": [],
+                "sources": {s: dict(EMPTY) for s in SOURCES},
+                "totals": {"states": 0, "cities": 0, "venues": 0, **EMPTY}}
+
+    # The only pass over the records; everything below works on one row per venue and source
+    base = df.groupby(KEYS, sort=False, dropna=False)[SUMS].sum().reset_index()
+    for source in SOURCES:
+        base[f"{source}_shows"] = base["shows"].where(base["source"] == source, 0)
+    sums = SUMS + [f"{s}_shows" for s in SOURCES]
+
+    states = base.groupby("state", sort=False).agg(
+        cities=("city", "nunique"), venues=("venue", "nunique"), **{c: (c, "sum") for c in sums})
+    cities = base.groupby(["state", "city"], sort=False).agg(
+        venues=("venue", "nunique"), **{c: (c, "sum") for c in SUMS})
+    venues = base.groupby(["state", "city", "venue"], sort=False)[sums].sum()
+    sources = base.groupby("source", sort=False)[SUMS].sum().to_dict("index")
+
+    totals = {c: base[c].sum().item() for c in SUMS}
+    totals.update(states=len(states), cities=len(cities), venues=base["venue"].nunique())
+    return {
+        "states":   _rows(states),
+        "cities":   _rows(cities),
+        "venues":   _rows(venues),
+        "theatres": base[["source", "state", "city", "venue"] + SUMS].to_dict("records"),
+        "sources":  {s: sources.get(s, dict(EMPTY)) for s in SOURCES},
+        "totals":   totals,
+    }
@@ -0,0 +1,107 @@
+"""
+Report Fingerprints
+───────────────────
+Stable content hashes of report inputs, so a rerun that finds the same
+data (a late-night rerun, a show day where every show is already frozen)
+keeps the reports it already has instead of archiving and regenerating
+them and emailing the same files again.
+
+A DatasetHash is order-independent: every show is digested on its own,
+from the fields that reach a report, and the digests are summed. The same
+shows in any order — merged in a different city order, streamed back from
+the show store — give the same hash, records can be added one at a time
+while they stream past, and no step sorts or holds the dataset.
+
+fingerprint(...) combines dataset hashes with anything else that shapes
+the output (missing cities, output settings) into one key per report set;
+ReportFingerprints keeps the last key of every report set on disk.
+
+Usage:
+    from utils.reportFingerprint import DatasetHash, ReportFingerprints, fingerprint
+
+    key = fingerprint(DatasetHash(final_data), DatasetHash(current_run_data), missing, IMAGE_FORMAT)
+    if FINGERPRINTS.get(base_name) == key:
+        ...                                   # nothing changed — keep the existing reports
+    FINGERPRINTS.record(base_name, key)       # once the new reports are written
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+
+# =============================================================================
+# ── CONFIGURATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+# Every field of a show that appears in a report ("shows" weights rollup rows)
+FIELDS = ("source", "sid", "state", "city", "venue", "normalized_show_time", "total_tickets", "booked_tickets",
+          "total_gross", "booked_gross", "occupancy", "is_final", "shows")
+
+_MOD = 1 << 128
+
+
+# =============================================================================
+# ── HASHING ───────────────────────────────────────────────────────────────────
+# =============================================================================
+
+class DatasetHash:
+    """Order-independent hash of show records: the sum of per-record digests, plus the count."""
+
+    def __init__(self, records=()):
+        self.total = 0
+        self.count = 0
+        self.update(records)
+
+    def add(self, record):
+        row = repr(tuple(record.get(f) for f in FIELDS)).encode("utf-8")
+        self.total = (self.total + int.from_bytes(hashlib.blake2b(row, digest_size=16).digest(), "big")) % _MOD
+        self.count += 1
+
+    def update(self, records):
+        for record in records:
+            self.add(record)
+
+    def hexdigest(self):
+        return f"{self.count}:{self.total:032x}"
+
+
+def fingerprint(*parts):
+    """One key for a report set from dataset hashes and any other JSON-able inputs."""
+    canonical = json.dumps([p.hexdigest() if isinstance(p, DatasetHash) else p for p in parts],
+                           ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# =============================================================================
+# ── STORE ─────────────────────────────────────────────────────────────────────
+# =============================================================================
+
+class ReportFingerprints:
+    """Last fingerprint of every report set, in a JSON file next to the reports."""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except Exception:
+                pass
+
+    def get(self, report):
+        return self.data.get(report)
+
+    def record(self, report, key):
+        """Stores a report set's fingerprint once its reports are written."""
+        with self._lock:
+            self.data[report] = key
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
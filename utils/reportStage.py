@@ -0,0 +1,163 @@
+"""
+Report Stage
+────────────
+Runs the report artifacts of a run as a small dependency graph instead of
+one after another. The Excel, PNG and HTML reports of the tracked and the
+snapshot datasets are independent and CPU-bound, so they go to a process
+pool; tasks that need this process (a streamed show iterator, the show
+store, SMTP) run on threads here. A task starts as soon as everything it
+waits on has finished — an email is sent once its own attachments exist,
+while another report set may still be rendering.
+
+Every task is timed where it runs. run() prints the timings and, given a
+path, appends them as one JSON line per stage so slow artifacts show up
+across runs.
+
+A failed task is reported and its dependents are skipped (no email with a
+missing attachment); the rest of the stage still runs and run() re-raises
+the first error at the end. workers=0 runs every task inline, in order.
+
+Usage:
+    from utils.reportStage import ReportStage
+
+    stage = ReportStage(workers=4, timings_path="reports/report_timings.jsonl")
+    xlsx = stage.add("States xlsx", generate_excel, data, "Movie.xlsx", agg=agg)
+    png  = stage.add("States png", generate_image, (), "reports/Movie.png", agg=agg)
+    stage.add("States email", send_email, files, after=[xlsx, png], local=True)
+    results = stage.run()            # {task name: return value}
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+
+
+# =============================================================================
+# ── CONFIGURATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+LOCAL_WORKERS = 4      # threads for tasks that must run in this process
+
+
+# =============================================================================
+# ── STAGE ─────────────────────────────────────────────────────────────────────
+# =============================================================================
+
+def _timed(fn, args, kwargs):
+    """Runs a task and returns (result, seconds) — executed in the worker."""
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+class ReportStage:
+    """Report tasks with dependencies, run on a process pool plus local threads."""
+
+    def __init__(self, workers=None, timings_path=None, label=None):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.timings_path = timings_path
+        self.label = label
+        self.tasks = {}          # name -> (fn, args, kwargs, after, local)
+        self.timings = {}        # name -> seconds
+        self._lock = threading.Lock()
+
+    def add(self, name, fn, *args, after=(), local=False, **kwargs):
+        """
+        Queues fn(*args, **kwargs) as task `name` once every task in `after`
+        has finished. Arguments of process tasks must pickle; local=True runs
+        the task on a thread in this process. Returns the name.
+        """
+        with self._lock:
+            if name in self.tasks:
+                raise ValueError(f"duplicate report task {name!r}")
+            missing = [a for a in after if a not in self.tasks]
+            if missing:
+                raise ValueError(f"{name!r} waits on unknown task(s) {missing}")
+            self.tasks[name] = (fn, args, kwargs, tuple(after), local)
+        return name
+
+    def run(self):
+        """Runs every queued task and returns {name: result}; re-raises the first failure."""
+        with self._lock:
+            tasks, self.tasks = self.tasks, {}
+        if not tasks:
+            return {}
+        t0 = time.perf_counter()
+        if self.workers:
+            results, errors = self._run_pools(tasks)
+        else:
+            results, errors = self._run_inline(tasks)
+        wall = time.perf_counter() - t0
+        self._report(tasks, wall)
+        if errors:
+            raise errors[0]
+        return results
+
+    def _run_inline(self, tasks):
+        results, errors, failed = {}, [], set()
+        for name, (fn, args, kwargs, after, _) in tasks.items():
+            if failed.intersection(after):
+                failed.add(name)
+                print(f"   ⏭️  {name}: skipped (a dependency failed)")
+                continue
+            try:
+                results[name], self.timings[name] = _timed(fn, args, kwargs)
+            except Exception as e:
+                failed.add(name)
+                errors.append(e)
+                print(f"   ❌ {name}: {e}")
+        return results, errors
+
+    def _run_pools(self, tasks):
+        results, errors = {}, []
+        done, failed, running = set(), set(), {}
+        remote = sum(1 for t in tasks.values() if not t[4])
+        procs = ProcessPoolExecutor(max_workers=min(self.workers, remote)) if remote else None
+        threads = ThreadPoolExecutor(max_workers=LOCAL_WORKERS, thread_name_prefix="report")
+        try:
+            pending = dict(tasks)
+            while pending or running:
+                for name, (fn, args, kwargs, after, local) in list(pending.items()):
+                    if failed.intersection(after):
+                        del pending[name]
+                        failed.add(name)
+                        print(f"   ⏭️  {name}: skipped (a dependency failed)")
+                    elif done.issuperset(after):
+                        del pending[name]
+                        pool = threads if local else procs
+                        running[pool.submit(_timed, fn, args, kwargs)] = name
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        results[name], self.timings[name] = future.result()
+                        done.add(name)
+                    except Exception as e:
+                        failed.add(name)
+                        errors.append(e)
+                        print(f"   ❌ {name}: {e}")
+        finally:
+            threads.shutdown()
+            if procs is not None:
+                procs.shutdown()
+        return results, errors
+
+    def _report(self, tasks, wall):
+        ran = {n: s for n, s in self.timings.items() if n in tasks}
+        work = sum(ran.values())
+        where = f"{self.workers} worker(s)" if self.workers else "inline"
+        print(f"\n⏱️  Report stage: {wall:.1f}s wall, {work:.1f}s of work ({where})")
+        for name, secs in sorted(ran.items(), key=lambda kv: -kv[1]):
+            print(f"   {secs:7.2f}s  {name}")
+        if self.timings_path:
+            os.makedirs(os.path.dirname(self.timings_path) or ".", exist_ok=True)
+            entry = {"at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "label": self.label,
+                     "workers": self.workers, "wall": round(wall, 3),
+                     "tasks": {n: round(s, 3) for n, s in ran.items()}}
+            with open(self.timings_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
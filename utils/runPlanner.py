@@ -0,0 +1,162 @@
+"""
+Deadline-Aware Run Planner
+──────────────────────────
+Estimates how long a scrape will take from the per-city timings of earlier
+runs and the District rate limit, then picks worker counts and the city
+order so the report is out by a deadline. If the deadline can't be met,
+the lowest-value cities (by historical gross) are deferred up front.
+
+Timings are recorded by every run into reports/city_timings.json, so the
+estimates improve as the tracker is used.
+
+Usage:
+    from utils.runPlanner import CityTimings, plan_run
+
+    timings = CityTimings("reports/city_timings.json")
+    timings.record("bms", "Telangana", "Hyderabad", secs=312.4, shows=220, gross=1_850_000)
+    timings.save()
+
+    plan = plan_run({"district": [(state, city, item), ...], "bms": [...]},
+                    timings, budget_secs=45 * 60, district_rate=5,
+                    max_workers={"district": 24, "bms": 6})
+"""
+
+import heapq
+import json
+import os
+import statistics
+import threading
+
+
+# =============================================================================
+# ── CONFIGURATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+DEFAULT_CITY_SECS = {"district": 6, "bms": 150}   # used until a platform has any history
+EWMA_ALPHA        = 0.5                           # weight of the latest run in a city's timing
+SAFETY_FACTOR     = 1.15                          # estimates are padded by this much
+
+
+# =============================================================================
+# ── TIMING HISTORY ────────────────────────────────────────────────────────────
+# =============================================================================
+
+class CityTimings:
+    """Per-(platform, state, city) run time, show count and gross from earlier runs."""
+
+    def __init__(self, path):
+        self.path  = path
+        self.data  = {"district": {}, "bms": {}}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.data.update(json.load(f))
+            except Exception:
+                pass
+
+    @staticmethod
+    def _key(state, city):
+        return f"{state}|{city}"
+
+    def record(self, platform, state, city, secs, shows=0, gross=0):
+        """Folds one city's run into its history (cities with no shows keep their gross)."""
+        with self._lock:
+            entries = self.data.setdefault(platform, {})
+            prev = entries.get(self._key(state, city))
+            if prev:
+                secs = EWMA_ALPHA * secs + (1 - EWMA_ALPHA) * prev["secs"]
+                gross = gross or prev.get("gross", 0)
+            entries[self._key(state, city)] = {
+                "secs": round(secs, 2), "shows": shows, "gross": gross,
+                "runs": (prev or {}).get("runs", 0) + 1,
+            }
+
+    def _default(self, platform):
+        known = [e["secs"] for e in self.data.get(platform, {}).values()]
+        return statistics.median(known) if known else DEFAULT_CITY_SECS.get(platform, 60)
+
+    def estimate(self, platform, state, city):
+        """Expected seconds to scrape a city on `platform`."""
+        entry = self.data.get(platform, {}).get(self._key(state, city))
+        return entry["secs"] if entry else self._default(platform)
+
+    def shows(self, platform, state, city):
+        entry = self.data.get(platform, {}).get(self._key(state, city))
+        return entry["shows"] if entry else 0
+
+    def value(self, state, city):
+        """Historical gross of a city across both platforms (its priority)."""
+        return sum(self.data.get(p, {}).get(self._key(state, city), {}).get("gross", 0)
+                   for p in ("district", "bms"))
+
+    def save(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+
+
+# =============================================================================
+# ── ESTIMATION ────────────────────────────────────────────────────────────────
+# =============================================================================
+
+def makespan(durations, workers):
+    """Finish time of `durations` run in order on `workers` parallel workers."""
+    if not durations:
+        return 0.0
+    finish = [0.0] * max(1, workers)
+    for d in durations:
+        heapq.heapreplace(finish, finish[0] + d)
+    return max(finish)
+
+def estimate_platform(platform, cities, timings, workers, district_rate=None):
+    """Estimated seconds for one platform to scrape `cities` [(state, city, item)] in order."""
+    durations = [timings.estimate(platform, s, c) for s, c, _ in cities]
+    est = makespan(durations, workers)
+    if platform == "district" and district_rate:
+        # Every city page plus one seat-layout request per show share one rate limiter
+        requests = sum(1 + timings.shows(platform, s, c) for s, c, _ in cities)
+        est = max(est, requests / district_rate)
+    return est * SAFETY_FACTOR
+
+
+# =============================================================================
+# ── PLANNING ──────────────────────────────────────────────────────────────────
+# =============================================================================
+
+def plan_run(cities, timings, budget_secs, district_rate, max_workers):
+    """
+    Sizes workers and orders cities so both platforms finish within `budget_secs`.
+
+    `cities` maps platform -> [(state, city, item)]. Returns a dict with, per
+    platform, the ordered cities to run and the worker count, plus the cities
+    deferred to meet the budget, the estimate and whether it is feasible.
+    """
+    plan = {"cities": {}, "workers": {}, "estimate": {}, "deferred": [], "budget_secs": budget_secs}
+
+    for platform, items in cities.items():
+        ordered = sorted(items, key=lambda x: timings.value(x[0], x[1]), reverse=True)
+        limit = max_workers[platform]
+
+        def _est(subset, w):
+            return estimate_platform(platform, subset, timings, w, district_rate)
+
+        # Fewest workers that meet the budget — more browsers/requests than needed only invite rate limits
+        workers = next((w for w in range(1, limit + 1) if _est(ordered, w) <= budget_secs), limit)
+
+        # Still too slow at full width: drop the lowest-value cities until it fits
+        while ordered and _est(ordered, workers) > budget_secs:
+            state, city, _ = ordered.pop()
+            plan["deferred"].append((platform, state, city))
+
+        plan["cities"][platform]   = [item for _, _, item in ordered]
+        plan["workers"][platform]  = workers
+        plan["estimate"][platform] = _est(ordered, workers)
+
+    full = {p: estimate_platform(p, items, timings, max_workers[p], district_rate)
+            for p, items in cities.items()}
+    plan["full_estimate_secs"] = max(full.values(), default=0)
+    plan["feasible"] = not plan["deferred"]
+    return plan
@@ -0,0 +1,199 @@
+"""
+Stratified Sample Estimator
+───────────────────────────
+Turns a small sample of seat layouts into a gross / tickets / occupancy
+estimate with 95% confidence intervals, for the quick preliminary run
+(`python reportStateCollections.py sample`).
+
+Shows are stratified by (state, city tier, price band). City tiers come from
+the gross of earlier runs — the show store's records for this movie and date
+(`SHOW_STORE.scope_records`, read by `load_previous_run_records`) — and the
+sample is allocated to strata in proportion to their historical gross, so the
+cities and price points that carry the collection are sampled most.
+
+Usage:
+    from utils.sampleEstimator import city_tiers, stratum_of, allocate, estimate
+
+    tiers  = city_tiers(previous_records)
+    h      = stratum_of(state, city, max_price, tiers)
+    n_h    = allocate(sizes, weights, n_total)
+    result = estimate(strata)      # strata: {h: {"N": int, "sample": [record, ...]}}
+"""
+
+import math
+import random
+from collections import defaultdict
+
+
+# =============================================================================
+# ── CONFIGURATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+PRICE_BANDS      = [150, 250, 400]     # ₹ upper bounds of bands 0..2; band 3 is everything above
+TIER_GROSS_SHARE = [0.5, 0.8]          # cities making up the top 50% of gross are tier 1, next 30% tier 2
+MIN_PER_STRATUM  = 2                   # needed for a variance estimate
+Z_95             = 1.96
+
+NUMERIC_FIELDS = ["total_tickets", "booked_tickets", "total_gross", "booked_gross"]
+
+
+# =============================================================================
+# ── STRATA ────────────────────────────────────────────────────────────────────
+# =============================================================================
+
+def price_band(price):
+    """Index of the price band a show's top ticket price falls in."""
+    for i, limit in enumerate(PRICE_BANDS):
+        if price <= limit:
+            return i
+    return len(PRICE_BANDS)
+
+def city_tiers(records):
+    """Ranks (state, city) by historical booked gross into tiers 1..3 (unknown cities are tier 3)."""
+    gross = defaultdict(float)
+    for r in records:
+        gross[(r.get("state"), r.get("city"))] += r.get("booked_gross", 0)
+    total = sum(gross.values())
+    tiers, running = {}, 0.0
+    for key, g in sorted(gross.items(), key=lambda kv: kv[1], reverse=True):
+        share = running / total if total else 1.0
+        tiers[key] = 1 + sum(share >= cut for cut in TIER_GROSS_SHARE)
+        running += g
+    return tiers
+
+def stratum_of(state, city, max_price, tiers):
+    """Stratum key of a show."""
+    return (state, tiers.get((state, city), len(TIER_GROSS_SHARE) + 1), price_band(max_price))
+
+def historical_weights(records, tiers):
+    """Booked gross per stratum in earlier runs (the sample allocation weights)."""
+    weights = defaultdict(float)
+    for r in records:
+        prices = [float(p) for p in (r.get("price_seat_map") or {}).keys()]
+        h = stratum_of(r.get("state"), r.get("city"), max(prices, default=0), tiers)
+        weights[h] += r.get("booked_gross", 0)
+    return weights
+
+
+# =============================================================================
+# ── ALLOCATION ────────────────────────────────────────────────────────────────
+# =============================================================================
+
+def allocate(sizes, weights, n_total):
+    """
+    Splits `n_total` sample slots across strata in proportion to `weights`
+    (falling back to stratum size where there is no history), with at least
+    MIN_PER_STRATUM per stratum and never more than the stratum holds.
+    """
+    w = {h: weights.get(h, 0) for h in sizes}
+    if not any(w.values()):
+        w = {h: float(n) for h, n in sizes.items()}
+    total_w = sum(w.values()) or 1.0
+    return {
+        h: min(n, max(MIN_PER_STRATUM, round(n_total * w[h] / total_w)))
+        for h, n in sizes.items()
+    }
+
+def draw_sample(units_by_stratum, allocation, seed=None):
+    """Simple random sample of `allocation[h]` units from every stratum."""
+    rng = random.Random(seed)
+    return {h: rng.sample(units, allocation.get(h, 0)) for h, units in units_by_stratum.items()}
+
+
+# =============================================================================
+# ── ESTIMATION ────────────────────────────────────────────────────────────────
+# =============================================================================
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+def _var(values):
+    if len(values) < 2:
+        return 0.0
+    m = _mean(values)
+    return sum((v - m) ** 2 for v in values) / (len(values) - 1)
+
+def stratum_means(sample, fallback=None):
+    """Mean of each numeric field over a stratum's sampled records."""
+    if not sample:
+        return dict(fallback or {f: 0.0 for f in NUMERIC_FIELDS})
+    return {f: _mean([r.get(f, 0) for r in sample]) for f in NUMERIC_FIELDS}
+
+def _ci(total, variance):
+    half = Z_95 * math.sqrt(max(variance, 0.0))
+    return {"estimate": total, "low": max(0.0, total - half), "high": total + half,
+            "margin_pct": round(half / total * 100, 2) if total else 0.0}
+
+def estimate(strata):
+    """
+    Stratified expansion estimate with 95% confidence intervals.
+
+    `strata` maps stratum key -> {"N": listed shows, "sample": [scraped records]}.
+    Returns overall and per-state booked gross, booked tickets and occupancy
+    (a ratio estimate of booked over total tickets), plus the sample size.
+
+    Fallback records (seat counts guessed, not scraped) are left out of the
+    sample. A stratum with fewer than MIN_PER_STRATUM sampled shows has no
+    variance of its own: it borrows the collapsed variance of its state's
+    sample (or the whole sample), with an unsampled stratum counted as one
+    draw, and is counted in "low_sample_strata".
+    """
+    fallbacks = sum(1 for s in strata.values() for r in s["sample"] if r.get("is_fallback"))
+    strata = {h: {"N": s["N"], "sample": [r for r in s["sample"] if not r.get("is_fallback")]}
+              for h, s in strata.items()}
+    pooled = [r for s in strata.values() for r in s["sample"]]
+    pooled_means = stratum_means(pooled)
+
+    def _low(h):
+        n = len(strata[h]["sample"])
+        return n < MIN_PER_STRATUM and n < strata[h]["N"]
+
+    def _summarise(keys):
+        gross = tickets = seats = 0.0
+        var_gross = var_tickets = 0.0
+        # Collapsed stratum: the state's sample when it is big enough, else the whole sample
+        collapsed = [r for h in keys for r in strata[h]["sample"]]
+        if len(collapsed) < MIN_PER_STRATUM:
+            collapsed = pooled
+        resid = []
+        for h in keys:
+            N, sample = strata[h]["N"], strata[h]["sample"]
+            n = len(sample)
+            means = stratum_means(sample, pooled_means)
+            gross   += N * means["booked_gross"]
+            tickets += N * means["booked_tickets"]
+            seats   += N * means["total_tickets"]
+            if not N:
+                continue
+            basis = collapsed if _low(h) else sample
+            fpc = 1 - n / N
+            var_gross   += N * N * fpc * _var([r.get("booked_gross", 0) for r in basis]) / max(n, 1)
+            var_tickets += N * N * fpc * _var([r.get("booked_tickets", 0) for r in basis]) / max(n, 1)
+            resid.append((N, max(n, 1), fpc, basis))
+        ratio = tickets / seats if seats else 0.0
+        var_ratio = 0.0
+        if seats:
+            for N, n, fpc, basis in resid:
+                d = [r.get("booked_tickets", 0) - ratio * r.get("total_tickets", 0) for r in basis]
+                var_ratio += N * N * fpc * _var(d) / n
+            var_ratio /= seats * seats
+        occ = _ci(ratio * 100, var_ratio * 100 * 100)
+        occ["high"] = min(occ["high"], 100.0)
+        return {
+            "booked_gross":      _ci(gross, var_gross),
+            "booked_tickets":    _ci(tickets, var_tickets),
+            "occupancy":         occ,
+            "shows":             sum(strata[h]["N"] for h in keys),
+            "sampled":           sum(len(strata[h]["sample"]) for h in keys),
+            "low_sample_strata": sum(1 for h in keys if _low(h)),
+        }
+
+    by_state = defaultdict(list)
+    for h in strata:
+        by_state[h[0]].append(h)
+
+    result = _summarise(list(strata))
+    result["states"] = {state: _summarise(keys) for state, keys in sorted(by_state.items())}
+    result["unsampled_strata"] = sum(1 for s in strata.values() if s["N"] and not s["sample"])
+    result["fallback_excluded"] = fallbacks
+    return result
@@ -4,6 +4,23 @@ Email Report Sender
 Sends generated report files (Excel, Image, HTML) to specified recipients
 using Gmail SMTP with App Password authentication.
 
+send_collection_report packages the files first (utils/emailAttachments.py):
+images are recompressed, HTML and Excel go into one zip, and whatever would
+take the email over REPORT_EMAIL_MAX_BYTES is copied to REPORT_SHARE_DIR
+and linked in the body instead. The message is streamed to the server —
+each attachment is read and base64-encoded a block at a time while it is
+sent — so no file, and no whole message, is held in memory.
+
+Emails are queued in an on-disk outbox (utils/emailOutbox.py) rather than
+sent while the run waits. send_report_email copies the message into
+REPORT_EMAIL_OUTBOX and starts a background sender if none is running; the
+run then carries on and can exit. The sender delivers every queued message
+over one authenticated connection (a States and a Cities email of the same
+run share it), retries failures with backoff, and exits once the outbox
+has stayed empty for SENDER_LINGER seconds. To deliver the queue by hand:
+
+    python -m utils.sendReportEmail --outbox [reports/outbox]
+
 Usage:
     from utils.sendReportEmail import send_report_email
 
@@ -24,21 +41,34 @@ Setup:
        - REPORT_EMAIL_PASSWORD : Gmail App Password (NOT your login password)
                                  Generate at: https://myaccount.google.com/apppasswords
        - REPORT_EMAIL_RECIPIENTS: Comma-separated recipient emails
+       - REPORT_EMAIL_MAX_BYTES : Attachment budget per email (optional)
+       - REPORT_SHARE_DIR       : Folder for reports over the budget (optional)
+       - REPORT_EMAIL_OUTBOX    : Outbox folder; empty sends inline (optional)
+       - REPORT_SMTP_SERVER / REPORT_SMTP_PORT / REPORT_SMTP_STARTTLS=0
+                                : Another SMTP server, e.g. a local test server
 
     2. Enable 2-Step Verification on your Google account first,
        then create an App Password for "Mail".
 """
 
 import os
+import sys
+import time
+import base64
 import smtplib
+import tempfile
 import mimetypes
-from email.mime.multipart import MIMEMultipart
+import subprocess
+from email import policy
 from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+from email.utils import formatdate, make_msgid
+from uuid import uuid4
 from datetime import datetime
 from dotenv import load_dotenv
 
+from utils.emailAttachments import DEFAULT_BUDGET, package_attachments
+from utils.emailOutbox import Outbox
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -47,8 +77,9 @@ load_dotenv()
 # =============================================================================
 
 EMAIL_CONFIG = {
-    "smtp_server":  "smtp.gmail.com",
-    "smtp_port":    587,
+    "smtp_server":  os.environ.get("REPORT_SMTP_SERVER", "smtp.gmail.com"),
+    "smtp_port":    int(os.environ.get("REPORT_SMTP_PORT") or 587),
+    "starttls":     os.environ.get("REPORT_SMTP_STARTTLS", "1") != "0",
     "sender_email": os.environ.get("REPORT_EMAIL_SENDER", ""),
     "sender_password": os.environ.get("REPORT_EMAIL_PASSWORD", ""),
     "recipients":   [
@@ -56,8 +87,121 @@ EMAIL_CONFIG = {
         for r in os.environ.get("REPORT_EMAIL_RECIPIENTS", "").split(",")
         if r.strip()
     ],
+    "attachment_budget": int(os.environ.get("REPORT_EMAIL_MAX_BYTES") or DEFAULT_BUDGET),
+    "share_dir":    os.environ.get("REPORT_SHARE_DIR", ""),
+    "outbox":       os.environ.get("REPORT_EMAIL_OUTBOX", os.path.join("reports", "outbox")),
 }
 
+READ_BLOCK      = 57 * 1024   # bytes per base64 block: a multiple of 57, so every block is whole 76-char lines
+SENDER_LINGER   = 60          # seconds the background sender waits for more messages before it exits
+SENDER_MAX_SECS = 3 * 3600    # the background sender stops after this; what is left waits for the next run
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# =============================================================================
+# ── STREAMED MESSAGE ──────────────────────────────────────────────────────────
+# =============================================================================
+
+def _headers(items):
+    """A CRLF header block, ending in the blank line, with non-ASCII values RFC 2047-encoded."""
+    folded = (policy.SMTP.header_factory(name, value).fold(policy=policy.SMTP) for name, value in items)
+    return ("".join(folded) + "\r\n").encode("ascii")
+
+
+def message_chunks(sender, to_addrs, subject, body, attachments):
+    """
+    The multipart message as CRLF-terminated byte chunks, one attachment
+    block at a time. Every part is base64, so no line starts with "." and
+    the chunks go to DATA without dot-stuffing.
+    """
+    boundary = f"=_report_{uuid4().hex}"
+    yield _headers([
+        ("From", sender), ("To", ", ".join(to_addrs)), ("Subject", subject),
+        ("Date", formatdate(localtime=True)), ("Message-ID", make_msgid()), ("MIME-Version", "1.0"),
+        ("Content-Type", f'multipart/mixed; boundary="{boundary}"'),
+    ])
+    yield f"--{boundary}\r\n".encode() + MIMEText(body, "plain", "utf-8").as_bytes(policy=policy.SMTP) + b"\r\n"
+
+    for filepath in attachments:
+        filename  = os.path.basename(filepath)
+        mime_type = mimetypes.guess_type(filepath)[0] or "application/octet-stream"
+        yield f"--{boundary}\r\n".encode() + _headers([
+            ("Content-Type", mime_type), ("Content-Transfer-Encoding", "base64"),
+            ("Content-Disposition", f'attachment; filename="{filename}"'),
+        ])
+        with open(filepath, "rb") as f:
+            for block in iter(lambda: f.read(READ_BLOCK), b""):
+                yield base64.encodebytes(block).replace(b"\n", b"\r\n")
+    yield f"--{boundary}--\r\n".encode()
+
+
+def send_streamed(smtp, sender, to_addrs, chunks):
+    """
+    smtp.sendmail() for a message given as chunks: the DATA body is written
+    as the chunks are produced instead of being built up as one string.
+    Returns the refused recipients, like sendmail().
+    """
+    smtp.ehlo_or_helo_if_needed()
+    code, resp = smtp.mail(sender)
+    if code != 250:
+        smtp._rset()
+        raise smtplib.SMTPSenderRefused(code, resp, sender)
+    refused = {}
+    for addr in to_addrs:
+        code, resp = smtp.rcpt(addr)
+        if code not in (250, 251):
+            refused[addr] = (code, resp)
+    if len(refused) == len(to_addrs):
+        smtp._rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+    smtp.putcmd("data")
+    code, resp = smtp.getreply()
+    if code != 354:
+        smtp._rset()
+        raise smtplib.SMTPDataError(code, resp)
+    try:
+        for chunk in chunks:
+            smtp.send(chunk)
+    except Exception:
+        smtp.close()    # the server is mid-DATA; the connection can't be used again
+        raise
+    smtp.send(b".\r\n")
+    code, resp = smtp.getreply()
+    if code != 250:
+        smtp._rset()
+        raise smtplib.SMTPDataError(code, resp)
+    return refused
+
+
+def open_smtp(server, port, sender, password, starttls=True):
+    """A connected, logged-in SMTP session."""
+    smtp = smtplib.SMTP(server, port, timeout=30)
+    try:
+        smtp.ehlo()
+        if starttls:
+            smtp.starttls()
+            smtp.ehlo()
+        smtp.login(sender, password)
+    except Exception:
+        smtp.close()
+        raise
+    return smtp
+
+
+def _alive(smtp):
+    try:
+        return smtp.noop()[0] == 250
+    except (smtplib.SMTPException, OSError):
+        return False
+
+
+def _close(smtp):
+    try:
+        smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        smtp.close()
+
 
 # =============================================================================
 # ── EMAIL SENDER ──────────────────────────────────────────────────────────────
@@ -95,10 +239,13 @@ def send_report_email(
     smtp_port : int, optional
         SMTP server port. Defaults to 587 (STARTTLS).
 
+    With an outbox configured (REPORT_EMAIL_OUTBOX) and no sender / server
+    overrides, the email is queued and delivered by the background sender.
+
     Returns
     -------
     bool
-        True if email sent successfully, False otherwise.
+        True if email sent (or queued) successfully, False otherwise.
     """
     sender   = sender_email   or EMAIL_CONFIG["sender_email"]
     password = sender_password or EMAIL_CONFIG["sender_password"]
@@ -119,47 +266,38 @@ def send_report_email(
         print("   or pass recipients list to send_report_email().")
         return False
 
-    # ── Build message ─────────────────────────────────────────────────────
-    msg = MIMEMultipart()
-    msg["From"]    = sender
-    msg["To"]      = ", ".join(to_addrs)
-    msg["Subject"] = subject
-
-    msg.attach(MIMEText(body, "plain"))
-
-    # ── Attach files ──────────────────────────────────────────────────────
-    attached_count = 0
+    # ── Check attachments ─────────────────────────────────────────────────
+    files = []
     for filepath in (attachments or []):
         if not os.path.isfile(filepath):
             print(f"   ⚠️  [Email] Attachment not found, skipping: {filepath}")
             continue
+        files.append(filepath)
 
-        filename  = os.path.basename(filepath)
-        mime_type = mimetypes.guess_type(filepath)[0] or "application/octet-stream"
-        main_type, sub_type = mime_type.split("/", 1)
-
-        with open(filepath, "rb") as f:
-            part = MIMEBase(main_type, sub_type)
-            part.set_payload(f.read())
-
-        encoders.encode_base64(part)
-        part.add_header("Content-Disposition", "attachment", filename=filename)
-        msg.attach(part)
-        attached_count += 1
-
-    if attached_count == 0 and attachments:
+    if not files and attachments:
         print("⚠️  [Email] No valid attachments found. Sending email anyway.")
 
-    # ── Send ──────────────────────────────────────────────────────────────
+    # ── Queue ─────────────────────────────────────────────────────────────
+    # Overrides stay inline: the background sender only knows EMAIL_CONFIG
+    if EMAIL_CONFIG["outbox"] and not (sender_email or sender_password or smtp_server or smtp_port):
+        try:
+            folder = Outbox(EMAIL_CONFIG["outbox"]).enqueue(subject, body, to_addrs, files)
+            start_sender(EMAIL_CONFIG["outbox"])
+            print(f"📤 [Email] Queued for {len(to_addrs)} recipient(s) with {len(files)} attachment(s): {folder}")
+            return True
+        except Exception as e:
+            print(f"⚠️  [Email] Could not queue ({e}) — sending now.")
+
+    # ── Send (streamed) ───────────────────────────────────────────────────
     try:
-        with smtplib.SMTP(server, port, timeout=30) as smtp:
-            smtp.ehlo()
-            smtp.starttls()
-            smtp.ehlo()
-            smtp.login(sender, password)
-            smtp.sendmail(sender, to_addrs, msg.as_string())
-
-        print(f"📧 [Email] Sent to {len(to_addrs)} recipient(s) with {attached_count} attachment(s).")
+        smtp = open_smtp(server, port, sender, password, EMAIL_CONFIG["starttls"])
+        try:
+            send_streamed(smtp, sender, to_addrs, message_chunks(sender, to_addrs, subject, body, files))
+        finally:
+            _close(smtp)
+
+        size_mb = sum(os.path.getsize(f) for f in files) / 1024 / 1024
+        print(f"📧 [Email] Sent to {len(to_addrs)} recipient(s) with {len(files)} attachment(s) ({size_mb:.1f} MB).")
         return True
 
     except smtplib.SMTPAuthenticationError:
@@ -172,10 +310,125 @@ def send_report_email(
         return False
 
 
+# =============================================================================
+# ── OUTBOX SENDER ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+def start_sender(outbox_path):
+    """Starts the background sender unless one is running; it is detached and outlives this process."""
+    outbox = Outbox(outbox_path)
+    if outbox.sender_running():
+        return
+    if os.name == "nt":
+        detach = {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        detach = {"start_new_session": True}
+    with open(os.path.join(outbox.path, "sender.log"), "a", encoding="utf-8") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "utils.sendReportEmail", "--outbox", outbox.path],
+            cwd=ROOT, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            env=dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONUNBUFFERED="1"), **detach,
+        )
+
+
+def deliver_outbox(outbox_path, linger=SENDER_LINGER, max_secs=SENDER_MAX_SECS):
+    """
+    The background sender: delivers queued messages over one reused SMTP
+    connection until the outbox has been empty for `linger` seconds.
+    Connection errors and 4xx replies are retried with backoff; messages the
+    server rejects outright (5xx) go to failed/. Returns the number sent.
+    """
+    outbox = Outbox(outbox_path)
+    if not outbox.acquire():
+        print("📤 [Outbox] Another sender is already running.")
+        return 0
+    cfg = EMAIL_CONFIG
+    smtp, sent, emptied = None, 0, False
+    started = idle_since = time.time()
+    heartbeat = outbox.heartbeat()      # keeps the lock fresh through long uploads
+    try:
+        while time.time() - started < max_secs:
+            if not outbox.touch():
+                print("⚠️  [Outbox] Sender lock was taken over — leaving the queue to the other sender.")
+                break
+            pending = outbox.pending()
+            if not pending:
+                if time.time() - idle_since >= linger:
+                    emptied = True
+                    break
+                time.sleep(1)
+                continue
+            idle_since = time.time()
+            due = [m for m in pending if m["next_attempt"] <= time.time()]
+            if not due:
+                time.sleep(min(5, max(0.1, min(m["next_attempt"] for m in pending) - time.time())))
+                continue
+
+            for message in due:
+                if not outbox.holds_lock():
+                    break
+                try:
+                    if smtp is not None and not _alive(smtp):
+                        smtp.close()
+                        smtp = None
+                    if smtp is None:
+                        smtp = open_smtp(cfg["smtp_server"], cfg["smtp_port"], cfg["sender_email"],
+                                         cfg["sender_password"], cfg["starttls"])
+                    files = outbox.attachment_paths(message)
+                    send_streamed(smtp, cfg["sender_email"], message["recipients"], message_chunks(
+                        cfg["sender_email"], message["recipients"], message["subject"], message["body"], files))
+                except smtplib.SMTPAuthenticationError as e:
+                    print(f"❌ [Outbox] Authentication failed ({e}); messages stay queued for the next run.")
+                    return sent
+                except Exception as e:
+                    if smtp is not None and getattr(smtp, "sock", None) is None:
+                        smtp = None     # closed mid-message by send_streamed
+                    code = getattr(e, "smtp_code", None)
+                    if isinstance(e, smtplib.SMTPRecipientsRefused) or (code and 500 <= code < 600):
+                        outbox.fail(message, e)
+                        print(f"❌ [Outbox] Rejected, moved to failed/: {message['subject']} ({e})")
+                    elif outbox.retry(message, e):
+                        wait = message["next_attempt"] - time.time()
+                        print(f"⚠️  [Outbox] {message['subject']}: {e} — retrying in {wait:.0f}s "
+                              f"(attempt {message['attempts']})")
+                    else:
+                        print(f"❌ [Outbox] Giving up after {message['attempts']} attempts: {message['subject']}")
+                    if code is None and smtp is not None:
+                        smtp.close()    # connection-level failure: reconnect for the next message
+                        smtp = None
+                    continue
+                outbox.sent(message)
+                sent += 1
+                print(f"📧 [Outbox] Sent to {len(message['recipients'])} recipient(s): {message['subject']}")
+    finally:
+        heartbeat.set()
+        if smtp is not None:
+            _close(smtp)
+        outbox.release()
+    # A message queued just as the lock was released would otherwise wait for the next run
+    if emptied and outbox.pending():
+        sent += deliver_outbox(outbox_path, linger, max_secs - (time.time() - started))
+    return sent
+
+
 # =============================================================================
 # ── CONVENIENCE WRAPPER ───────────────────────────────────────────────────────
 # =============================================================================
 
+def _file_line(path, package, indent):
+    """A body line for a report file, saying where it ended up in the package."""
+    name = os.path.basename(path)
+    if path in package.same_as:
+        return f"{indent}• {name}  (same as {os.path.basename(package.same_as[path])})"
+    if path in package.shared:
+        return f"{indent}• {name}  → {package.shared[path]}"
+    if path in package.skipped:
+        return f"{indent}• {name}  (not attached — over the size limit)"
+    if package.where.get(path, name) != name:
+        return f"{indent}• {name}  (in {package.where[path]})"
+    return f"{indent}• {name}"
+
+
 def send_collection_report(
     report_type,
     movie_name,
@@ -183,9 +436,12 @@ def send_collection_report(
     attachment_paths,
     subject_label=None,
     sections=None,
+    missing=None,
     recipients=None,
     sender_email=None,
     sender_password=None,
+    attachment_budget=None,
+    share_dir=None,
 ):
     """
     Convenience wrapper that builds a nice subject/body and sends the report.
@@ -208,12 +464,18 @@ def send_collection_report(
         If provided, attachment_paths is ignored for the body listing (but still used
         as the master attachment list). Typically pass all files via attachment_paths
         and use sections just for body formatting.
+    missing : list[str], optional
+        Cities still missing after the retry pass, listed in the body.
     recipients : list[str], optional
         Override default recipients.
     sender_email : str, optional
         Override default sender email.
     sender_password : str, optional
         Override default sender password.
+    attachment_budget : int, optional
+        Override the attachment size budget in bytes (REPORT_EMAIL_MAX_BYTES).
+    share_dir : str, optional
+        Override the folder over-budget reports are copied to (REPORT_SHARE_DIR).
     """
     scope   = "States" if report_type == "states" else "Cities"
     label   = subject_label or "Collection Report"
@@ -223,6 +485,18 @@ def send_collection_report(
     # Filter to only existing files
     valid_files = [f for f in attachment_paths if os.path.isfile(f)]
 
+    # Package: recompressed images, one zip for the rest, the size budget
+    work_dir = tempfile.TemporaryDirectory(prefix="report_email_")
+    package  = package_attachments(
+        valid_files, work_dir.name,
+        budget=attachment_budget or EMAIL_CONFIG["attachment_budget"],
+        share_dir=share_dir or EMAIL_CONFIG["share_dir"] or None,
+    )
+    for target in package.shared.values():
+        print(f"   🔗 [Email] Over the size budget, linked instead: {target}")
+    for path in package.skipped:
+        print(f"   ⚠️  [Email] Over the size budget, not attached: {path}")
+
     # Build body
     body_parts = [
         f"{movie_name} — {scope} Report",
@@ -234,25 +508,43 @@ def send_collection_report(
     if sections:
         for sec in sections:
             sec_files = [f for f in sec.get("files", []) if os.path.isfile(f)]
-            file_list = "\n".join(f"     • {os.path.basename(f)}" for f in sec_files)
+            file_list = "\n".join(_file_line(f, package, "     ") for f in sec_files)
             body_parts.append(f"  {sec['label']}")
             if sec.get("note"):
                 body_parts.append(f"  {sec['note']}")
             body_parts.append(f"{file_list}")
             body_parts.append("")
     else:
-        file_list = "\n".join(f"  • {os.path.basename(f)}" for f in valid_files)
+        file_list = "\n".join(_file_line(f, package, "  ") for f in valid_files)
         body_parts.append(f"Attached files:\n{file_list}")
         body_parts.append("")
 
+    if missing:
+        body_parts.append("Still missing after retry:")
+        body_parts.extend(f"  • {line}" for line in missing)
+        body_parts.append("")
+
     body_parts.append("This is an automated report.")
     body = "\n".join(body_parts)
 
-    return send_report_email(
-        subject=subject,
-        body=body,
-        recipients=recipients,
-        attachments=valid_files,
-        sender_email=sender_email,
-        sender_password=sender_password,
-    )
+    with work_dir:
+        return send_report_email(
+            subject=subject,
+            body=body,
+            recipients=recipients,
+            attachments=package.attachments,
+            sender_email=sender_email,
+            sender_password=sender_password,
+        )
+
+
+if __name__ == "__main__":
+    # python -m utils.sendReportEmail --outbox [path]   — deliver queued emails
+    args = sys.argv[1:]
+    if not args or args[0] != "--outbox":
+        print(__doc__)
+        sys.exit(1)
+    path = args[1] if len(args) > 1 else EMAIL_CONFIG["outbox"]
+    print(f"📤 [Outbox] Sender started {time.strftime('%Y-%m-%d %H:%M:%S')} — {path}")
+    count = deliver_outbox(path)
+    print(f"📤 [Outbox] Sender done — {count} message(s) sent.")
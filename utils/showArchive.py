@@ -0,0 +1,154 @@
+"""
+Run Archive
+───────────
+Appends every run's tracked show records to a Parquet dataset so cross-run
+questions ("how did Hyderabad's gross move through the day?") read a few
+columns from a few files instead of re-parsing every archived report.
+
+The dataset is partitioned by movie, show date and run timestamp:
+
+    old_reports/archive/movie=<Movie_Slug>/date=<YYYY-MM-DD>/run=<YYYYmmdd_HHMMSS>/<report>.parquet
+
+Nested fields (seat and price maps, signatures) are stored as JSON text;
+everything else keeps its scalar type. Writing needs pyarrow alongside pandas.
+
+Usage:
+    from utils.showArchive import append_run, load_runs, gross_progression
+
+    append_run("old_reports/archive", final_data, movie_name, "2026-05-07", "20260507_183000", "States")
+
+    df = load_runs("old_reports/archive", movie="Movie_Slug", since="2026-05-01", report="States")
+    gross_progression(df, level="city")     # one row per run, one column per (state, city)
+
+Run `python -m utils.showArchive <Movie_Slug> [YYYY-MM-DD] [state|city|venue]` to print a progression.
+"""
+
+import glob
+import json
+import os
+import time
+
+import pandas as pd
+
+
+# =============================================================================
+# ── CONFIGURATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+ID_COLUMNS = ["sid", "bms_sid", "district_sid", "cinema_id", "venue_code"]   # stored as text in every file
+LEVELS     = {"state": ["state"], "city": ["state", "city"], "venue": ["state", "city", "venue"]}
+
+
+# =============================================================================
+# ── WRITING ───────────────────────────────────────────────────────────────────
+# =============================================================================
+
+def _flatten(value):
+    if isinstance(value, set):
+        value = sorted(value)
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+def to_frame(records, report=None):
+    """Show records as a DataFrame with nested fields as JSON text."""
+    df = pd.DataFrame([{k: _flatten(v) for k, v in r.items()} for r in records])
+    for col in ID_COLUMNS:
+        if col in df:
+            df[col] = df[col].map(lambda v: None if v is None or v != v else str(v))
+    if report is not None:
+        df["report"] = report
+    return df
+
+def partition_dir(root, movie, show_date, run_ts):
+    return os.path.join(root, f"movie={movie}", f"date={show_date}", f"run={run_ts}")
+
+def append_run(root, records, movie, show_date, run_ts, report, chunk=None):
+    """
+    Writes one run's records of a report set as <partition>/<report>.parquet
+    (or <report>-<chunk>.parquet when a run is written in pieces) and returns
+    the path, or None if there were no records.
+    """
+    records = list(records)
+    if not records:
+        return None
+    directory = partition_dir(root, movie, show_date, run_ts)
+    os.makedirs(directory, exist_ok=True)
+    name = f"{report}-{chunk}" if chunk else report
+    path = os.path.join(directory, f"{name}.parquet")
+    to_frame(records, report).to_parquet(path, index=False)
+    return path
+
+
+# =============================================================================
+# ── QUERIES ───────────────────────────────────────────────────────────────────
+# =============================================================================
+
+def _partition_value(path, key):
+    for piece in path.split(os.sep):
+        if piece.startswith(f"{key}="):
+            return piece[len(key) + 1:]
+    return None
+
+def list_runs(root, movie=None, since=None, until=None):
+    """Parquet files of the matching partitions, oldest run first (filtered by path alone)."""
+    pattern = os.path.join(root, f"movie={movie or '*'}", "date=*", "run=*", "*.parquet")
+    files = []
+    for path in glob.glob(pattern):
+        show_date = _partition_value(path, "date")
+        if (since and show_date < since) or (until and show_date > until):
+            continue
+        files.append(path)
+    return sorted(files, key=lambda p: (_partition_value(p, "run"), p))
+
+def load_runs(root, movie=None, since=None, until=None, report=None, columns=None):
+    """
+    Loads archived runs into one DataFrame with movie, date, run and run_at
+    columns added from the partition path. `since`/`until` bound the show
+    date (YYYY-MM-DD), `report` keeps one report set (a show can be archived
+    by several), and `columns` limits what is read.
+    """
+    frames = []
+    for path in list_runs(root, movie, since, until):
+        if report is not None and os.path.basename(path)[:-len(".parquet")].split("-", 1)[0] != report:
+            continue
+        df = pd.read_parquet(path, columns=columns)
+        df["movie"] = _partition_value(path, "movie")
+        df["date"]  = _partition_value(path, "date")
+        df["run"]   = _partition_value(path, "run")
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    df["run_at"] = pd.to_datetime(df["run"], format="%Y%m%d_%H%M%S")
+    return df
+
+def gross_progression(df, level="city", value="booked_gross"):
+    """Total `value` per run (rows, by run time) and per state / city / venue (columns)."""
+    if df.empty:
+        return df
+    keys = LEVELS[level]
+    table = df.groupby(["date", "run_at", *keys])[value].sum().unstack(keys).fillna(0)
+    return table.sort_index()
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m utils.showArchive <Movie_Slug> [YYYY-MM-DD] [state|city|venue]
+    root = os.path.join("old_reports", "archive")
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    movie = args[0]
+    show_date = args[1] if len(args) > 1 else None
+    level = args[2] if len(args) > 2 else "state"
+
+    t0 = time.perf_counter()
+    df = load_runs(root, movie=movie, since=show_date, until=show_date, report="States",
+                   columns=["state", "city", "venue", "booked_gross"])
+    print(f"Loaded {len(df):,} show snapshots from {df['run'].nunique() if not df.empty else 0} runs "
+          f"in {time.perf_counter() - t0:.2f}s")
+    with pd.option_context("display.max_columns", 12, "display.width", 200):
+        print(gross_progression(df, level=level))
@@ -0,0 +1,265 @@
+"""
+Cross-Platform Show Matcher
+───────────────────────────
+Pairs BMS shows with District shows for merge_data using hash indexes
+instead of scanning every (state, show time) bucket for every BMS show.
+
+Matching rules are the same five tiers as before, tried in this order, and
+the first District candidate (in scrape order) that satisfies a tier wins:
+
+    1. same session id
+    2. same price/seat signature (±SEAT_TOLERANCE seats) at the mapped venue   — non-fallback BMS only
+    3. same per-category seat counts (±SEAT_TOLERANCE) at the mapped venue     — non-fallback BMS only
+    4. same set of ticket prices at the mapped venue
+    5. mapped venue only
+
+Every tier from 2 on requires the BMS venue to map to the candidate's
+cinema, so candidates are indexed by (state, time, cinema_id) and by
+(state, time, sid); a BMS show only ever looks at the handful of District
+shows at its own venue and time. Signatures are computed once per record
+and matched candidates are consumed in O(1).
+
+Usage:
+    from utils.showMatcher import match_shows
+
+    final_data = match_shows(all_dist_data, all_bms_data, venue_map)
+
+Run `python -m utils.showMatcher [venues] [--compare]` for a synthetic benchmark
+(6000 venues ≈ 108k shows by default).
+"""
+
+import random
+import time
+from collections import defaultdict
+
+
+SEAT_TOLERANCE = 5
+
+
+# =============================================================================
+# ── SIGNATURES ────────────────────────────────────────────────────────────────
+# =============================================================================
+
+class _Entry:
+    """A show record with its matching signatures precomputed."""
+
+    __slots__ = ("record", "price_sig", "seat_counts", "prices", "consumed")
+
+    def __init__(self, record):
+        self.record      = record
+        self.price_sig   = record.get("price_seat_signature", [])
+        self.seat_counts = sorted(record.get("seat_category_map", {}).values())
+        self.prices      = {p for p in record.get("price_seat_map", {}).keys() if p > 0}
+        self.consumed    = False
+
+def _price_sig_match(a, b):
+    return (a and b and len(a) == len(b)
+            and all(ap == bp and abs(a_s - b_s) <= SEAT_TOLERANCE for (ap, a_s), (bp, b_s) in zip(a, b)))
+
+def _seat_match(a, b):
+    return (a and b and len(a) == len(b)
+            and all(abs(x - y) <= SEAT_TOLERANCE for x, y in zip(a, b)))
+
+
+# =============================================================================
+# ── MATCHING ──────────────────────────────────────────────────────────────────
+# =============================================================================
+
+def _first(entries, predicate):
+    for e in entries:
+        if not e.consumed and predicate(e):
+            return e
+    return None
+
+def match_shows(all_dist_data, all_bms_data, venue_map, verbose=True):
+    """
+    Merges District and BMS shows. Matched District records take the BMS
+    numbers (unless the BMS record is a fallback) and both session ids.
+    Returns the merged list: BMS-order results first, then unmatched District shows.
+    """
+    buckets  = defaultdict(list)    # (state, time) -> entries, scrape order
+    by_sid   = defaultdict(list)    # (state, time, sid) -> entries
+    by_venue = defaultdict(list)    # (state, time, cinema_id) -> entries
+
+    for r in all_dist_data:
+        e = _Entry(r)
+        key = (r['state'], r['normalized_show_time'])
+        buckets[key].append(e)
+        by_sid[key + (r['sid'],)].append(e)
+        if r.get('cinema_id'):
+            by_venue[key + (r['cinema_id'],)].append(e)
+
+    final_data = []
+    for bms in all_bms_data:
+        key = (bms['state'], bms['normalized_show_time'])
+        b = _Entry(bms)
+        is_fallback = bms.get('is_fallback', False)
+
+        # 1. Exact Match: Session ID matching between BMS and District. Highest confidence.
+        match = _first(by_sid.get(key + (bms['sid'],), ()), lambda c: True)
+        if match and verbose:
+            print(f"   🔗 SID Match: {bms['sid']}")
+
+        mapped = venue_map.get(bms.get('venue_code', '')) if bms.get('venue_code') else None
+        at_venue = by_venue.get(key + (mapped,), ()) if mapped is not None else ()
+
+        if not match and not is_fallback:
+            # 2. Strong Deduplication: exact prices and seat counts per price, at the mapped venue.
+            match = _first(at_venue, lambda c: _price_sig_match(b.price_sig, c.price_sig))
+            if match and verbose:
+                print(f"   🔗 Price/Seat Sig + Venue Map: {bms['venue']} == {match.record['venue']}")
+
+        if not match and not is_fallback:
+            # 3. Moderate Deduplication: seat counts per category without price, at the mapped venue.
+            match = _first(at_venue, lambda c: _seat_match(b.seat_counts, c.seat_counts))
+            if match and verbose:
+                print(f"   🔗 Seat Sig + Venue Map: {bms['venue']} == {match.record['venue']}")
+
+        if not match:
+            # 4. Weak Deduplication: same ticket price points at the mapped venue.
+            match = _first(at_venue, lambda c: b.prices == c.prices)
+            if match and verbose:
+                print(f"   🔗 Venue Map + Price: {bms['venue']} == {match.record['venue']}")
+
+        if not match:
+            # 5. Venue-Only Deduplication: last resort, time and mapped venue.
+            match = _first(at_venue, lambda c: True)
+            if match and verbose:
+                print(f"   🔗 Venue Map Only: {bms['venue']} == {match.record['venue']}")
+
+        if match:
+            match.consumed = True
+            rec = match.record
+            # If BMS data is genuinely scraped (no fallbacks), it is the most accurate source of truth.
+            # If BMS used a fallback, District is preferred as it might have a better recent cache.
+            if not is_fallback:
+                rec.update({
+                    'total_tickets': bms['total_tickets'],
+                    'booked_tickets': bms['booked_tickets'],
+                    'total_gross': bms['total_gross'],
+                    'booked_gross': bms['booked_gross'],
+                    'occupancy': bms['occupancy'],
+                    'seat_category_map': bms['seat_category_map'],
+                    'price_seat_map': bms['price_seat_map'],
+                    'seat_signature': bms['seat_signature'],
+                })
+            rec['bms_sid'] = bms['sid']
+            rec['district_sid'] = rec['sid']
+            final_data.append(rec)
+        else:
+            bms['bms_sid'] = bms['sid']
+            bms['district_sid'] = None
+            final_data.append(bms)
+
+    for entries in buckets.values():
+        for e in entries:
+            if not e.consumed:
+                e.record['bms_sid'] = None
+                e.record['district_sid'] = e.record['sid']
+                final_data.append(e.record)
+
+    return final_data
+
+
+# =============================================================================
+# ── BENCHMARK ─────────────────────────────────────────────────────────────────
+# =============================================================================
+
+def _legacy_match(all_dist_data, all_bms_data, venue_map):
+    """The pre-index merge loop, kept for the benchmark's equivalence check."""
+    def same_venue(bms, dist):
+        code, cid = bms.get('venue_code', ''), dist.get('cinema_id', '')
+        if not code or not cid or venue_map.get(code) is None:
+            return 'unmapped'
+        return venue_map.get(code) == cid
+
+    final_data, district_index = [], defaultdict(list)
+    for r in all_dist_data:
+        district_index[(r['state'], r['normalized_show_time'])].append(r)
+    for bms in all_bms_data:
+        candidates = district_index.get((bms['state'], bms['normalized_show_time']), [])
+        match = next((c for c in candidates if c['sid'] == bms['sid']), None)
+        if not match and not bms.get('is_fallback', False):
+            match = next((c for c in candidates if _price_sig_match(bms.get('price_seat_signature', []),
+                          c.get('price_seat_signature', [])) and same_venue(bms, c) is True), None)
+        if not match and not bms.get('is_fallback', False):
+            b_seats = sorted(bms.get('seat_category_map', {}).values())
+            match = next((c for c in candidates if _seat_match(b_seats, sorted(c.get('seat_category_map', {}).values()))
+                          and same_venue(bms, c) is True), None)
+        if not match and candidates:
+            b_prices = {p for p in bms.get('price_seat_map', {}) if p > 0}
+            match = next((c for c in candidates if b_prices == {p for p in c.get('price_seat_map', {}) if p > 0}
+                          and same_venue(bms, c) is True), None)
+        if not match and candidates:
+            match = next((c for c in candidates if same_venue(bms, c) is True), None)
+        if match:
+            candidates.remove(match)
+            if not bms.get('is_fallback', False):
+                for k in ('total_tickets', 'booked_tickets', 'total_gross', 'booked_gross', 'occupancy',
+                          'seat_category_map', 'price_seat_map', 'seat_signature'):
+                    match[k] = bms[k]
+            match['bms_sid'], match['district_sid'] = bms['sid'], match['sid']
+            final_data.append(match)
+        else:
+            bms['bms_sid'], bms['district_sid'] = bms['sid'], None
+            final_data.append(bms)
+    for sub in district_index.values():
+        for show in sub:
+            show['bms_sid'], show['district_sid'] = None, show['sid']
+            final_data.append(show)
+    return final_data
+
+def synthetic_shows(n_venues=6000, shows_per_venue=10, states=("Maharashtra", "Karnataka"), seed=7):
+    """District and BMS show lists for `n_venues` venues, most venues listed on both platforms."""
+    rng = random.Random(seed)
+    times = [f"2026-05-07 {h:02d}:{m:02d}" for h in range(9, 23) for m in (0, 30)][:8]
+    dist, bms, venue_map = [], [], {}
+    sid = 0
+    for v in range(n_venues):
+        state = states[v % len(states)]
+        cid, code = f"C{v}", f"V{v}"
+        if rng.random() < 0.85:
+            venue_map[code] = cid
+        for s in range(shows_per_venue):
+            t = times[s % len(times)]
+            prices = sorted(rng.sample([120.0, 150.0, 200.0, 250.0, 350.0, 500.0], 2))
+            seats = {f"A{i}": rng.randint(50, 250) for i in range(2)}
+            psm = dict(zip(prices, seats.values()))
+            sid += 1
+            base = {"state": state, "city": f"City{v % 300}", "venue": f"Venue {v}",
+                    "normalized_show_time": t, "total_tickets": sum(seats.values()),
+                    "booked_tickets": rng.randint(0, 50), "total_gross": 0, "booked_gross": rng.randint(0, 9000),
+                    "occupancy": 0, "seat_category_map": seats, "price_seat_map": psm,
+                    "price_seat_signature": sorted(psm.items()), "seat_signature": ""}
+            if rng.random() < 0.9:
+                dist.append(dict(base, source="district", sid=f"D{sid}", cinema_id=cid))
+            if rng.random() < 0.9:
+                bms.append(dict(base, source="bms", sid=f"B{sid}", venue_code=code,
+                                is_fallback=rng.random() < 0.05,
+                                seat_category_map=dict(seats), price_seat_map=dict(psm)))
+    return dist, bms, venue_map
+
+
+if __name__ == "__main__":
+    import copy
+    import sys
+
+    # python -m utils.showMatcher [venues] [--compare]   (10 shows per venue; --compare also times the linear loop)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    dist, bms, venue_map = synthetic_shows(n_venues=int(args[0]) if args else 6000)
+    print(f"Synthetic run: {len(dist):,} District + {len(bms):,} BMS shows")
+
+    t0 = time.perf_counter()
+    indexed = match_shows(copy.deepcopy(dist), copy.deepcopy(bms), venue_map, verbose=False)
+    t_indexed = time.perf_counter() - t0
+    print(f"  indexed matcher : {t_indexed:7.2f}s → {len(indexed):,} shows")
+
+    if "--compare" in sys.argv:
+        t0 = time.perf_counter()
+        legacy = _legacy_match(copy.deepcopy(dist), copy.deepcopy(bms), venue_map)
+        t_legacy = time.perf_counter() - t0
+        print(f"  linear matcher  : {t_legacy:7.2f}s → {len(legacy):,} shows")
+
+        same = [(r['sid'], r['bms_sid'], r['district_sid'], r['booked_gross']) for r in indexed] == \
+               [(r['sid'], r['bms_sid'], r['district_sid'], r['booked_gross']) for r in legacy]
+        print(f"  identical output: {same} | speed-up ×{t_legacy / max(t_indexed, 1e-9):.1f}")
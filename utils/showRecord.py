@@ -0,0 +1,195 @@
+"""
+Compact Show Record
+───────────────────
+Slotted replacement for the ~20-key show dict built by the scrapers. A
+long run holds hundreds of thousands of shows, and as dicts each one
+carried its own key table, its own copies of the state/city/venue strings
+and two nested dicts for the seat and price maps.
+
+A ShowRecord keeps:
+    • scalar fields in __slots__ (no per-record key table),
+    • repeated strings (source, state, city, venue, ids, show times, seat
+      labels) interned, so every show of a venue shares one copy,
+    • seat_category_map / price_seat_map / price_seat_signature as tuples
+      of pairs, rebuilt as dict/list on access (also as attributes),
+    • seat_signature derived from the seat map instead of stored.
+
+It behaves as a mapping with the same keys as the old dict (r["sid"],
+r.get(...), r[...] = ..., update, pop, items), so the pipeline reads and
+writes it unchanged. The real dict shape is only produced at the edges —
+serialisation and storage — through to_dict() or items().
+
+Usage:
+    from utils.showRecord import ShowRecord
+
+    rec = ShowRecord.from_dict({"source": "district", "sid": "123", "seat_category_map": {...}, ...})
+    rec["bms_sid"] = "ET00123"
+    rec.to_dict()                     # the original dict shape
+"""
+
+import sys
+
+
+_MISSING = object()
+
+# Stored in slots, in the order the old dicts listed them
+SCALAR_FIELDS = (
+    "source", "sid", "state", "city", "venue", "cinema_id", "venue_code", "showTime", "normalized_show_time",
+    "total_tickets", "booked_tickets", "total_gross", "booked_gross", "occupancy", "is_fallback",
+    "bms_sid", "district_sid", "planned_bms_sid", "is_final", "is_estimated",
+)
+INTERNED_FIELDS = frozenset({
+    "source", "state", "city", "venue", "cinema_id", "venue_code", "showTime", "normalized_show_time",
+})
+# dict key -> tuple slot
+MAP_FIELDS = {
+    "seat_category_map":    "_seats",
+    "price_seat_map":       "_prices",
+    "price_seat_signature": "_signature",
+}
+_SCALARS  = frozenset(SCALAR_FIELDS)
+KEY_ORDER = SCALAR_FIELDS[:9] + tuple(MAP_FIELDS) + ("seat_signature",) + SCALAR_FIELDS[9:]
+_KEYS     = frozenset(KEY_ORDER)
+# dict key -> slot whose presence means the key is present
+_PRESENCE = {**{k: k for k in SCALAR_FIELDS}, **MAP_FIELDS, "seat_signature": "_seats"}
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class ShowRecord:
+    """A show record with the dict interface of the scraper output, at a fraction of its memory."""
+
+    __slots__ = SCALAR_FIELDS + tuple(MAP_FIELDS.values()) + ("_extra",)
+
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, show):
+        if isinstance(show, cls):
+            return show
+        rec = cls()
+        for key, value in show.items():
+            rec[key] = value
+        return rec
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def copy(self):
+        rec = ShowRecord()
+        rec.update(self.items())
+        return rec
+
+    # ── Dict-shaped views of the compact fields ─────────────────────────────
+    @property
+    def seat_category_map(self):
+        return dict(self._seats)
+
+    @property
+    def price_seat_map(self):
+        return dict(self._prices)
+
+    @property
+    def price_seat_signature(self):
+        return list(self._signature)
+
+    @property
+    def seat_signature(self):
+        return "|".join(str(c) for c in sorted(c for _, c in self._seats))
+
+    # ── Mapping interface ───────────────────────────────────────────────────
+    def __getitem__(self, key):
+        if key in _KEYS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        extra = getattr(self, "_extra", None)
+        if extra and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in _KEYS:
+            return getattr(self, key, default)
+        extra = getattr(self, "_extra", None)
+        return extra.get(key, default) if extra else default
+
+    def __setitem__(self, key, value):
+        if key in _SCALARS:
+            setattr(self, key, _intern(value) if key in INTERNED_FIELDS else value)
+        elif key in MAP_FIELDS:
+            if key == "price_seat_signature":
+                pairs = tuple((float(p), c) for p, c in value)
+            else:
+                pairs = tuple((_intern(k), v) for k, v in dict(value).items())
+            setattr(self, MAP_FIELDS[key], pairs)
+        elif key == "seat_signature":
+            pass    # derived from seat_category_map
+        else:
+            if getattr(self, "_extra", None) is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key in MAP_FIELDS:
+            delattr(self, MAP_FIELDS[key])
+        elif key in _SCALARS:
+            delattr(self, key)
+        elif key != "seat_signature":
+            del self._extra[key]
+
+    def __contains__(self, key):
+        slot = _PRESENCE.get(key)
+        if slot is not None:
+            return hasattr(self, slot)
+        extra = getattr(self, "_extra", None)
+        return bool(extra) and key in extra
+
+    def keys(self):
+        keys = [k for k in KEY_ORDER if hasattr(self, _PRESENCE[k])]
+        extra = getattr(self, "_extra", None)
+        return keys + list(extra) if extra else keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def update(self, other=(), **fields):
+        for key, value in (other.items() if hasattr(other, "items") else other):
+            self[key] = value
+        for key, value in fields.items():
+            self[key] = value
+
+    def pop(self, key, default=_MISSING):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        del self[key]
+        return value
+
+    def setdefault(self, key, default=None):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            self[key] = value = default
+        return value
+
+    def __repr__(self):
+        return f"ShowRecord({self.to_dict()!r})"
+
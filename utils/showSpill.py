@@ -0,0 +1,143 @@
+"""
+Show Spill Store
+────────────────
+Keeps scraped show records on disk instead of in RAM for the memory-bounded
+all-India run (`python reportStateCollections.py all-india`).
+
+Each finished city appends its records as JSON lines to
+<root>/<platform>/<state>.jsonl. The merge reads them back one state at a
+time, and the reports are built from a ShowRollup, which keeps one row per
+(state, city, venue, source, final) instead of one per show. Peak memory
+follows the largest state rather than the whole country.
+
+Usage:
+    from utils.showSpill import ShowSpill, ShowRollup
+
+    spill = ShowSpill("reports/spill")
+    spill.reset()
+    spill.write("bms", "Kerala", records)          # called as each city finishes
+
+    rollup = ShowRollup()
+    for state in spill.states():
+        dist = list(spill.read("district", state))
+        ...
+        for r in merged: rollup.add(r)
+    report_rows = rollup.records()                 # each row carries a "shows" count
+"""
+
+import json
+import os
+import shutil
+import threading
+
+from utils.workQueue import decode_show
+
+
+# =============================================================================
+# ── JSON LINES ────────────────────────────────────────────────────────────────
+# =============================================================================
+
+def _serialisable(show):
+    return {k: (list(v) if isinstance(v, set) else v) for k, v in show.items()}
+
+def write_jsonl(path, records, mode="w"):
+    """Writes (or appends) show records as one JSON object per line."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, mode, encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(_serialisable(r), ensure_ascii=False))
+            f.write("\n")
+
+def read_jsonl(path):
+    """Yields the show records of a JSON lines file (nothing if it does not exist)."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield decode_show(json.loads(line))
+
+def jsonl_states(directory):
+    """State names of the <state>.jsonl files in a directory."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-len(".jsonl")] for name in os.listdir(directory) if name.endswith(".jsonl"))
+
+def read_jsonl_dir(directory):
+    """Yields every record of every <state>.jsonl file in a directory, state by state."""
+    for state in jsonl_states(directory):
+        yield from read_jsonl(os.path.join(directory, f"{state}.jsonl"))
+
+
+# =============================================================================
+# ── SPILL ─────────────────────────────────────────────────────────────────────
+# =============================================================================
+
+class ShowSpill:
+    """Append-only per-(platform, state) record files."""
+
+    def __init__(self, root):
+        self.root  = root
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Removes the records of a previous run."""
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, platform, state):
+        return os.path.join(self.root, platform, f"{state}.jsonl")
+
+    def write(self, platform, state, records):
+        if not records:
+            return
+        with self._lock:
+            write_jsonl(self._path(platform, state), records, mode="a")
+
+    def states(self):
+        """Every state with records on any platform."""
+        found = set()
+        if os.path.isdir(self.root):
+            for platform in os.listdir(self.root):
+                found.update(jsonl_states(os.path.join(self.root, platform)))
+        return sorted(found)
+
+    def read(self, platform, state):
+        return read_jsonl(self._path(platform, state))
+
+    def read_all(self, platform):
+        return read_jsonl_dir(os.path.join(self.root, platform))
+
+
+# =============================================================================
+# ── ROLLUP ────────────────────────────────────────────────────────────────────
+# =============================================================================
+
+class ShowRollup:
+    """Streaming aggregate of show records by (state, city, venue, source, final)."""
+
+    SUMS = ("total_tickets", "booked_tickets", "total_gross", "booked_gross")
+
+    def __init__(self):
+        self.rows = {}
+
+    def add(self, r):
+        key = (r["state"], r["city"], r["venue"], r.get("source", "district"), bool(r.get("is_final")))
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = {
+                "state": key[0], "city": key[1], "venue": key[2], "source": key[3], "is_final": key[4],
+                "shows": 0, **{f: 0 for f in self.SUMS},
+            }
+        row["shows"] += 1
+        for f in self.SUMS:
+            row[f] += r.get(f, 0)
+
+    def records(self):
+        """Rollup rows in the show-record shape, each standing for `shows` shows."""
+        out = []
+        for row in self.rows.values():
+            occ = round(row["booked_tickets"] / row["total_tickets"] * 100, 2) if row["total_tickets"] else 0
+            out.append(dict(row, occupancy=min(100, occ)))
+        return out
@@ -0,0 +1,215 @@
+"""
+Show Store
+──────────
+SQLite store of the merged show records behind each report set, replacing
+the `{base_name}_data.json` file that every run used to read, merge and
+rewrite in full.
+
+Shows are keyed by their platform session ids (BMS and District). A run
+upserts its merged shows: a stored show sharing any session id with a new
+one is replaced by it, everything else is kept — the same rule the JSON
+merge used — and rows whose record did not change are not written again,
+so a run costs time in proportion to what changed rather than to the
+history. Rows are indexed on (movie, show_date, state, city, venue).
+
+Usage:
+    from utils.showStore import ShowStore
+
+    store = ShowStore("reports/shows.db")
+    stats = store.upsert(base_name, final_data, movie_name, "2026-05-07")
+    final_data = list(store.records(base_name))           # current + preserved shows
+    frozen = store.sids_started_before(movie_name, "2026-05-07", "2026-05-07 18:40")
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from utils.workQueue import decode_show
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shows (
+    id                   INTEGER PRIMARY KEY AUTOINCREMENT,
+    report               TEXT    NOT NULL,
+    movie                TEXT    NOT NULL,
+    show_date            TEXT    NOT NULL,
+    state                TEXT,
+    city                 TEXT,
+    venue                TEXT,
+    normalized_show_time TEXT,
+    record               TEXT    NOT NULL,
+    digest               TEXT    NOT NULL,
+    updated_at           REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_shows_scope  ON shows (movie, show_date, state, city, venue);
+CREATE INDEX IF NOT EXISTS idx_shows_report ON shows (report, state);
+CREATE TABLE IF NOT EXISTS show_sids (
+    report  TEXT    NOT NULL,
+    sid     TEXT    NOT NULL,
+    show_id INTEGER NOT NULL,
+    PRIMARY KEY (report, sid)
+);
+CREATE INDEX IF NOT EXISTS idx_show_sids_show ON show_sids (show_id);
+"""
+
+
+# =============================================================================
+# ── SERIALISATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+def show_sids(show):
+    """Session ids identifying a show: its BMS/District ids, or its own sid if it has neither."""
+    sids = {str(s) for s in (show.get("bms_sid"), show.get("district_sid")) if s}
+    if not sids and show.get("sid"):
+        sids = {str(show["sid"])}
+    return sids
+
+def _plain(value):
+    """json.dumps fallback: ShowRecords in their dict shape, sets as lists."""
+    return value.to_dict() if hasattr(value, "to_dict") else list(value)
+
+def _encode(show):
+    return json.dumps(show, ensure_ascii=False, sort_keys=True, default=_plain)
+
+
+# =============================================================================
+# ── STORE ─────────────────────────────────────────────────────────────────────
+# =============================================================================
+
+class ShowStore:
+    """Merged show records of every report set, in a single SQLite file."""
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ── Writes ──────────────────────────────────────────────────────────────
+    def upsert(self, report, shows, movie, show_date):
+        """
+        Stores a run's merged shows for `report`, replacing stored shows that
+        share a session id with them. Returns counts of inserted, updated,
+        unchanged and replaced (superseded) rows.
+        """
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0, "replaced": 0}
+        claimed = set()      # rows already taken (or deleted) by an earlier show of this batch
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # sid -> row and row -> digest for the whole report: small columns, one indexed scan
+            index, digests = {}, {}
+            for r in conn.execute("SELECT s.sid, s.show_id, h.digest FROM show_sids s "
+                                  "JOIN shows h ON h.id = s.show_id WHERE s.report = ?", (report,)):
+                index[r["sid"]] = r["show_id"]
+                digests[r["show_id"]] = r["digest"]
+
+            for show in shows:
+                sids = show_sids(show)
+                ids = {index[sid] for sid in sids if sid in index} - claimed
+                record = _encode(show)
+                digest = hashlib.blake2b(record.encode("utf-8"), digest_size=16).hexdigest()
+
+                keep = min(ids) if ids else None
+                for stale in ids - {keep}:
+                    conn.execute("DELETE FROM shows WHERE id = ?", (stale,))
+                    conn.execute("DELETE FROM show_sids WHERE show_id = ?", (stale,))
+                    stats["replaced"] += 1
+                    claimed.add(stale)
+                if keep is not None and digests.get(keep) == digest:
+                    # Same record, so the same session ids — nothing to write
+                    stats["unchanged"] += 1
+                    claimed.add(keep)
+                    continue
+
+                cols = (show.get("state"), show.get("city"), show.get("venue"),
+                        show.get("normalized_show_time") or None, record, digest, now)
+                if keep is None:
+                    keep = conn.execute(
+                        "INSERT INTO shows (report, movie, show_date, state, city, venue, normalized_show_time, "
+                        "record, digest, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (report, movie, show_date, *cols),
+                    ).lastrowid
+                    stats["inserted"] += 1
+                else:
+                    conn.execute(
+                        "UPDATE shows SET state = ?, city = ?, venue = ?, normalized_show_time = ?, record = ?, "
+                        "digest = ?, updated_at = ? WHERE id = ?",
+                        (*cols, keep),
+                    )
+                    conn.execute("DELETE FROM show_sids WHERE show_id = ?", (keep,))
+                    stats["updated"] += 1
+                claimed.add(keep)
+                digests[keep] = digest
+                for sid in sids:
+                    index[sid] = keep
+                conn.executemany(
+                    "INSERT OR REPLACE INTO show_sids (report, sid, show_id) VALUES (?, ?, ?)",
+                    [(report, sid, keep) for sid in sids],
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return stats
+
+    # ── Reads ───────────────────────────────────────────────────────────────
+    def count(self, report):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM shows WHERE report = ?", (report,)).fetchone()[0]
+
+    def states(self, report):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT DISTINCT state FROM shows WHERE report = ? ORDER BY state", (report,)).fetchall()
+        return [r["state"] for r in rows]
+
+    def records(self, report, state=None):
+        """Yields the stored shows of a report set (optionally one state), oldest first."""
+        query, params = "SELECT record FROM shows WHERE report = ?", [report]
+        if state is not None:
+            query += " AND state = ?"
+            params.append(state)
+        with closing(self._connect()) as conn:
+            for row in conn.execute(query + " ORDER BY id", params):
+                yield decode_show(json.loads(row["record"]))
+
+    def scope_records(self, movie, show_date):
+        """
+        Yields every stored show for a movie and date once, across all report
+        sets: a show kept by several sets (sharing a session id) comes from
+        the most recently written of them.
+        """
+        seen = set()
+        with closing(self._connect()) as conn:
+            for row in conn.execute("SELECT record FROM shows WHERE movie = ? AND show_date = ? "
+                                    "ORDER BY updated_at DESC, id DESC", (movie, show_date)):
+                show = decode_show(json.loads(row["record"]))
+                sids = show_sids(show)
+                if sids & seen:
+                    continue
+                seen |= sids
+                yield show
+
+    def sids_started_before(self, movie, show_date, cutoff):
+        """Session ids of stored shows whose normalized show time is at or before `cutoff`."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT s.sid FROM show_sids s JOIN shows h ON h.id = s.show_id "
+                "WHERE h.movie = ? AND h.show_date = ? AND h.normalized_show_time <= ?",
+                (movie, show_date, cutoff),
+            ).fetchall()
+        return {r["sid"] for r in rows}
@@ -0,0 +1,154 @@
+"""
+Showtime-Aware Refresh Scheduler
+────────────────────────────────
+Decides how often each show is re-scraped while the tracker runs
+continuously (`python reportStateCollections.py track`).
+
+Shows starting soon or filling fast are refreshed often; shows days away
+are refreshed rarely, and shows that have already started are dropped,
+since their bookings can no longer change meaningfully.
+
+Usage:
+    from utils.trackingScheduler import RefreshScheduler
+
+    sched = RefreshScheduler()
+    sched.add(key, "2026-05-07 19:30")          # due immediately
+    for key in sched.pop_due():
+        ... refresh ...
+        sched.reschedule(key, occupancy=record["occupancy"])
+"""
+
+import heapq
+import random
+import threading
+import time
+from datetime import datetime
+
+
+# =============================================================================
+# ── REFRESH POLICY ────────────────────────────────────────────────────────────
+# =============================================================================
+
+# (minutes until show starts, refresh interval in minutes) — first match wins
+REFRESH_TIERS = [
+    (60,       5),      # starting within the hour
+    (3 * 60,   10),
+    (12 * 60,  30),
+    (24 * 60,  60),
+    (None,     180),    # days away
+]
+HOT_OCCUPANCY     = 70      # % — shows this full are refreshed twice as often
+HOT_FILL_DELTA    = 10      # % points gained since the last refresh that mark a show as filling fast
+MIN_INTERVAL_MINS = 3
+JITTER            = 0.1     # ±10% so shows discovered together don't stay in lockstep
+
+
+def refresh_interval(show_time, now=None, occupancy=None, prev_occupancy=None):
+    """
+    Returns the refresh interval in seconds for a show, or None once it has started.
+
+    `show_time` is the record's normalized_show_time ("%Y-%m-%d %H:%M", IST).
+    """
+    now   = now or datetime.now()
+    start = datetime.strptime(show_time, "%Y-%m-%d %H:%M")
+    mins_left = (start - now).total_seconds() / 60
+    if mins_left <= 0:
+        return None
+
+    interval = REFRESH_TIERS[-1][1]
+    for limit, mins in REFRESH_TIERS:
+        if limit is None or mins_left <= limit:
+            interval = mins
+            break
+
+    hot = occupancy is not None and occupancy >= HOT_OCCUPANCY
+    if occupancy is not None and prev_occupancy is not None:
+        hot = hot or (occupancy - prev_occupancy) >= HOT_FILL_DELTA
+    if hot:
+        interval /= 2
+
+    interval *= random.uniform(1 - JITTER, 1 + JITTER)
+    # Never schedule past the start time
+    interval = min(interval, max(mins_left, MIN_INTERVAL_MINS))
+    return max(interval, MIN_INTERVAL_MINS) * 60
+
+
+# =============================================================================
+# ── SCHEDULER ─────────────────────────────────────────────────────────────────
+# =============================================================================
+
+class RefreshScheduler:
+    """Thread-safe min-heap of (due time, show key)."""
+
+    def __init__(self):
+        self._heap      = []
+        self._due       = {}    # key -> due timestamp (latest wins; stale heap entries are skipped)
+        self._show_time = {}
+        self._occupancy = {}
+        self._lock      = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._show_time)
+
+    def __contains__(self, key):
+        """True while `key` is tracked — scheduled or currently being refreshed."""
+        with self._lock:
+            return key in self._show_time
+
+    def add(self, key, show_time, due=None):
+        """Registers a show, due immediately unless `due` (epoch seconds) is given."""
+        with self._lock:
+            self._show_time[key] = show_time
+            self._push(key, due if due is not None else time.time())
+
+    def _push(self, key, due):
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, key))
+
+    def pop_due(self, now=None, limit=None):
+        """Removes and returns the keys whose refresh is due, most overdue first."""
+        now = now or time.time()
+        keys = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due, key = heapq.heappop(self._heap)
+                if self._due.get(key) != due:
+                    continue
+                del self._due[key]
+                keys.append(key)
+                if limit and len(keys) >= limit:
+                    break
+        return keys
+
+    def reschedule(self, key, occupancy=None, now=None):
+        """Schedules the next refresh of `key`; returns False once the show has started."""
+        with self._lock:
+            show_time = self._show_time.get(key)
+            if show_time is None:
+                return False
+            prev = self._occupancy.get(key)
+            if occupancy is not None:
+                self._occupancy[key] = occupancy
+            delay = refresh_interval(show_time, datetime.fromtimestamp(now) if now else None,
+                                     occupancy, prev)
+            if delay is None:
+                self._forget(key)
+                return False
+            self._push(key, (now or time.time()) + delay)
+            return True
+
+    def _forget(self, key):
+        self._due.pop(key, None)
+        self._show_time.pop(key, None)
+        self._occupancy.pop(key, None)
+
+    def next_due_in(self, now=None):
+        """Seconds until the next refresh is due (0 if overdue, None if nothing is scheduled)."""
+        now = now or time.time()
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - now)
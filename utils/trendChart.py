@@ -0,0 +1,90 @@
+"""
+Booking Trend Chart
+───────────────────
+Inline SVG chart of cumulative booked gross (line) and tickets sold per
+run (bars) for the HTML reports, drawn from BookingSeries.trend(). Plain
+SVG with the report's CSS variables — no chart library to load.
+
+Usage:
+    from utils.trendChart import build_trend_section
+
+    trend_html = build_trend_section(trend, format_currency)    # "" when there are fewer than two runs
+"""
+
+from datetime import datetime
+
+
+WIDTH, HEIGHT = 1000, 260
+PAD_L, PAD_R, PAD_T, PAD_B = 70, 20, 20, 36
+
+
+def _label(run_at):
+    return datetime.strptime(run_at, "%Y-%m-%d %H:%M:%S").strftime("%H:%M")
+
+def build_trend_svg(trend, format_value):
+    """SVG markup for [(run_at, tickets, gross), ...] in run order."""
+    n = len(trend)
+    max_gross = max(g for _, _, g in trend) or 1
+    sold = [trend[0][1]] + [trend[i][1] - trend[i - 1][1] for i in range(1, n)]
+    max_sold = max(max(sold), 1)
+    plot_w, plot_h = WIDTH - PAD_L - PAD_R, HEIGHT - PAD_T - PAD_B
+    step = plot_w / max(n - 1, 1)
+
+    def x(i):
+        return PAD_L + i * step
+
+    def y(v, top):
+        return PAD_T + plot_h - (v / top) * plot_h
+
+    bar_w = max(2.0, min(24.0, step * 0.5))
+    bars = "".join(
+        f'<rect x="{x(i) - bar_w / 2:.1f}" y="{y(max(s, 0), max_sold):.1f}" width="{bar_w:.1f}" '
+        f'height="{PAD_T + plot_h - y(max(s, 0), max_sold):.1f}" fill="var(--district)" opacity="0.35">'
+        f'<title>{_label(run_at)} · +{s:,} tickets</title></rect>'
+        for i, ((run_at, _, _), s) in enumerate(zip(trend, sold))
+    )
+    points = " ".join(f"{x(i):.1f},{y(g, max_gross):.1f}" for i, (_, _, g) in enumerate(trend))
+    dots = "".join(
+        f'<circle cx="{x(i):.1f}" cy="{y(g, max_gross):.1f}" r="3.5" fill="var(--accent)">'
+        f'<title>{_label(run_at)} · {format_value(g)} · {t:,} tickets</title></circle>'
+        for i, (run_at, t, g) in enumerate(trend)
+    )
+    ticks = sorted({0, n // 2, n - 1})
+    x_labels = "".join(
+        f'<text x="{x(i):.1f}" y="{HEIGHT - 12}" text-anchor="middle" fill="var(--muted)" font-size="12">'
+        f'{_label(trend[i][0])}</text>'
+        for i in ticks
+    )
+    grid = "".join(
+        f'<line x1="{PAD_L}" x2="{WIDTH - PAD_R}" y1="{y(max_gross * f, max_gross):.1f}" '
+        f'y2="{y(max_gross * f, max_gross):.1f}" stroke="var(--border)" stroke-width="1"/>'
+        f'<text x="{PAD_L - 8}" y="{y(max_gross * f, max_gross) + 4:.1f}" text-anchor="end" '
+        f'fill="var(--muted)" font-size="11">{format_value(max_gross * f)}</text>'
+        for f in (0, 0.5, 1)
+    )
+    return (
+        f'<svg viewBox="0 0 {WIDTH} {HEIGHT}" width="100%" role="img" aria-label="Booking trend" '
+        f'style="display:block;background:var(--surface);border:1px solid var(--border);border-radius:12px">'
+        f'{grid}{bars}<polyline points="{points}" fill="none" stroke="var(--accent)" stroke-width="2.5"/>'
+        f'{dots}{x_labels}</svg>'
+    )
+
+def build_trend_section(trend, format_value):
+    """Report section with the trend chart and the pace over the last run interval."""
+    if not trend or len(trend) < 2:
+        return ""
+    (prev_at, prev_t, prev_g), (last_at, last_t, last_g) = trend[-2], trend[-1]
+    hours = (datetime.strptime(last_at, "%Y-%m-%d %H:%M:%S")
+             - datetime.strptime(prev_at, "%Y-%m-%d %H:%M:%S")).total_seconds() / 3600
+    pace = ""
+    if hours > 0:
+        pace = (f"{format_value((last_g - prev_g) / hours)}/hr · "
+                f"{round((last_t - prev_t) / hours):,} tickets/hr since {_label(prev_at)}")
+    return f"""
+    <section class="section">
+        <div class="section-header">
+            <div class="section-title">Booking Trend</div>
+            <div class="section-sub">{len(trend)} runs · {pace}</div>
+        </div>
+        {build_trend_svg(trend, format_value)}
+    </section>"""
@@ -0,0 +1,237 @@
+"""
+Shared Work Queue
+─────────────────
+SQLite-backed task queue used to shard a scrape across several worker
+processes, on one machine or several machines sharing the same file.
+
+The coordinator enqueues one task per (platform, state, city), workers lease
+tasks, scrape them and push the show records back, and the coordinator
+collects everything once the queue is drained.
+
+Usage:
+    from utils.workQueue import WorkQueue
+
+    queue = WorkQueue("reports/work_queue.db")
+    queue.reset()
+    queue.enqueue("bms", "Telangana", {"name": "Hyderabad", "slug": "hyderabad"})
+
+    task = queue.lease("worker-1")
+    queue.complete(task["id"], "worker-1", results)
+
+    all_bms_data = queue.collect_results("bms")
+
+A lease expires after `lease_seconds`; if the worker holding it dies, the task
+becomes available to the next worker, up to MAX_ATTEMPTS attempts. A worker
+still busy with a long task keeps its lease with renew().
+"""
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from utils.showRecord import ShowRecord
+
+
+# =============================================================================
+# ── CONFIGURATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+LEASE_SECONDS = 900     # a BMS city can take several minutes in one browser
+MAX_ATTEMPTS  = 3       # leases handed out before a task is marked failed
+POLL_INTERVAL = 5       # seconds between queue polls while waiting
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    platform    TEXT    NOT NULL,
+    state       TEXT    NOT NULL,
+    payload     TEXT    NOT NULL,
+    status      TEXT    NOT NULL DEFAULT 'pending',
+    worker      TEXT,
+    lease_until REAL    NOT NULL DEFAULT 0,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    results     TEXT,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, platform);
+"""
+
+
+# =============================================================================
+# ── SERIALISATION ─────────────────────────────────────────────────────────────
+# =============================================================================
+
+def decode_show(show):
+    """Restores the non-JSON types of a show record after a queue round-trip."""
+    psm = show.get("price_seat_map")
+    if isinstance(psm, dict):
+        show["price_seat_map"] = {float(k): v for k, v in psm.items()}
+    sig = show.get("price_seat_signature")
+    if isinstance(sig, list):
+        show["price_seat_signature"] = [tuple(p) for p in sig]
+    return show
+
+
+# =============================================================================
+# ── QUEUE ─────────────────────────────────────────────────────────────────────
+# =============================================================================
+
+class WorkQueue:
+    """Task queue stored in a single SQLite file."""
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path          = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts  = max_attempts
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ── Coordinator side ────────────────────────────────────────────────────
+    def reset(self):
+        """Drops every task from a previous run."""
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM tasks")
+
+    def enqueue(self, platform, state, payload):
+        """Adds one (platform, state, city) task. `payload` must be JSON-serialisable."""
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "INSERT INTO tasks (platform, state, payload) VALUES (?, ?, ?)",
+                (platform, state, json.dumps(payload, ensure_ascii=False)),
+            )
+            return cur.lastrowid
+
+    def counts(self):
+        """Returns {status: count} for the whole queue."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    def is_drained(self):
+        """True once every task is either done or failed."""
+        counts = self.counts()
+        return not counts.get("pending") and not counts.get("leased")
+
+    def wait_until_drained(self, poll_interval=POLL_INTERVAL, on_progress=None):
+        """Blocks until the queue is drained, calling on_progress(counts) on every change."""
+        last = None
+        while True:
+            counts = self.counts()
+            if counts != last and on_progress:
+                on_progress(counts)
+            last = counts
+            if not counts.get("pending") and not counts.get("leased"):
+                return counts
+            time.sleep(poll_interval)
+
+    def collect_results(self, platform):
+        """Returns every show record pushed back for `platform`."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT results FROM tasks WHERE platform = ? AND status = 'done' ORDER BY id",
+                (platform,),
+            ).fetchall()
+        shows = []
+        for r in rows:
+            shows.extend(ShowRecord.from_dict(decode_show(s)) for s in json.loads(r["results"] or "[]"))
+        return shows
+
+    def failed_tasks(self):
+        """Returns the tasks that ran out of attempts, with their last error."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, platform, state, payload, attempts, error FROM tasks WHERE status = 'failed'"
+            ).fetchall()
+        return [dict(r, payload=json.loads(r["payload"])) for r in rows]
+
+    # ── Worker side ─────────────────────────────────────────────────────────
+    def lease(self, worker_id, platforms=None):
+        """
+        Atomically claims the next available task for `worker_id`.
+
+        Expired leases are treated as available again. Returns a dict with
+        id, platform, state, payload and attempts, or None if nothing is left.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', error = COALESCE(error, 'lease expired') "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            query = (
+                "SELECT id, platform, state, payload, attempts FROM tasks "
+                "WHERE (status = 'pending' OR (status = 'leased' AND lease_until < ?))"
+            )
+            params = [now]
+            if platforms:
+                query += " AND platform IN (%s)" % ",".join("?" * len(platforms))
+                params.extend(platforms)
+            row = conn.execute(query + " ORDER BY id LIMIT 1", params).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (worker_id, now + self.lease_seconds, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return {
+            "id":       row["id"],
+            "platform": row["platform"],
+            "state":    row["state"],
+            "payload":  json.loads(row["payload"]),
+            "attempts": row["attempts"] + 1,
+        }
+
+    def renew(self, task_id, worker_id):
+        """Extends a lease `worker_id` still holds; returns False if it has been lost."""
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, task_id, worker_id),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, task_id, worker_id, results):
+        """
+        Stores the scraped show records for a task `worker_id` still holds;
+        returns False (and drops the results) if the lease was lost.
+        """
+        serializable = [
+            {k: (list(v) if isinstance(v, set) else v) for k, v in show.items()}
+            for show in results
+        ]
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status = 'done', results = ?, error = NULL "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (json.dumps(serializable, ensure_ascii=False), task_id, worker_id),
+            )
+            return cur.rowcount == 1
+
+    def fail(self, task_id, worker_id, error):
+        """Releases a task `worker_id` still holds after an error; it is retried until MAX_ATTEMPTS is reached."""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "lease_until = 0, error = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (self.max_attempts, str(error), task_id, worker_id),
+            )